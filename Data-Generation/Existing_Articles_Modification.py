@@ -1,14 +1,16 @@
-import pandas as pd
+import argparse
+import os
 import random
-import nltk
 import re
-from nltk.tokenize import word_tokenize
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import nltk
+import pandas as pd
 from nltk.stem import PorterStemmer
-import string
+from nltk.tokenize import word_tokenize
 
-print('Imported libraries')
-nltk.download('punkt')
-print('Downloaded')
 ps = PorterStemmer()
 
 nonsense_words = [
@@ -72,210 +74,214 @@ nonsense_words = [
     "oscillate", "proliferate", "synchronize", "percolate"
 ]
 
-# Method functions
-def insert_nonsense(text):
-    words = word_tokenize(text)
+# Negation swaps, applied in a single pass so a swap is never undone by a later one (is -> is not -> is)
+NEGATION_SWAPS = {
+    # Original mappings
+    "yes": "no",
+    "no": "yes",
+    "not": "is",
+    "never": "always",
+    "always": "sometimes",
+    "did": "did not",
+    "was": "was not",
+    "are": "are not",
+    "is": "is not",
+    "can": "cannot",
+    "did not": "did",
+    "was not": "was",
+    "are not": "are",
+    "is not": "is",
+    "am": "am not",
+    "am not": "am",
+    "were": "were not",
+    "were not": "were",
+    "be": "be not",
+    "be not": "be",
+    "being": "not being",
+    "been": "not been",
+    "cannot": "can",
+    "may": "may not",
+    "may not": "may",
+    "might": "might not",
+    "might not": "might",
+    "should": "should not",
+    "should not": "should",
+    "would": "would not",
+    "would not": "would",
+    "could": "could not",
+    "could not": "could",
+    "must": "must not",
+    "must not": "must",
+    "shall": "shall not",
+    "shall not": "shall",
+    "do": "do not",
+    "don't": "do",
+    "does": "does not",
+    "does not": "does",
+    "have": "have not",
+    "have not": "have",
+    "has": "has not",
+    "has not": "has",
+    "had": "had not",
+    "had not": "had",
+    "will": "will not",
+    "won't": "will",
+    "in": "out",
+    "out": "in",
+    "on": "off",
+    "off": "on",
+    "up": "down",
+    "down": "up",
+    "left": "right",
+    "right": "left",
+    "inside": "outside",
+    "outside": "inside",
+    "above": "below",
+    "below": "above",
+    "over": "under",
+    "under": "over",
+    "open": "closed",
+    "closed": "open",
+    "begin": "end",
+    "end": "begin",
+    "start": "stop",
+    "stop": "start",
+    "enter": "exit",
+    "exit": "enter",
+    "attach": "detach",
+    "detach": "attach",
+    "connect": "disconnect",
+    "disconnect": "connect",
+    "build": "destroy",
+    "destroy": "build",
+    "good": "bad",
+    "bad": "good",
+    "happy": "sad",
+    "sad": "happy",
+    "love": "hate",
+    "hate": "love",
+    "peace": "war",
+    "war": "peace",
+    "true": "false",
+    "false": "true",
+    "truth": "lie",
+    "lie": "truth",
+    "fear": "courage",
+    "courage": "fear",
+    "more": "less",
+    "less": "more",
+    "most": "least",
+    "least": "most",
+    "include": "exclude",
+    "exclude": "include",
+    "accept": "reject",
+    "reject": "accept",
+    "allow": "forbid",
+    "forbid": "allow",
+    "admit": "deny",
+    "deny": "admit",
+    "agree": "disagree",
+    "disagree": "agree",
+    "approve": "disapprove",
+    "disapprove": "approve",
+    "buy": "sell",
+    "sell": "buy",
+    "join": "leave",
+    "leave": "join",
+    "find": "lose",
+    "lose": "find",
+    "clean": "dirty",
+    "dirty": "clean",
+    "winter": "summer",
+    "summer": "winter",
+    "warm": "cold",
+    "cold": "warm",
+    "wet": "dry",
+    "dry": "wet",
+    "day": "night",
+    "night": "day",
+    "young": "old",
+    "old": "young",
+    "cat": "dog",
+    "dog": "cat",
+}
+
+# Longest phrases first, so "is not" wins over "is"; multi-word phrases match any whitespace
+NEGATION_PATTERN = re.compile(
+    r"\b(?:" + "|".join(r"\s+".join(map(re.escape, phrase.split()))
+                         for phrase in sorted(NEGATION_SWAPS, key=len, reverse=True)) + r")\b",
+    flags=re.IGNORECASE,
+)
+NUMBER_PATTERN = re.compile(r'\b\d+(\.\d+)?\b')
+COMMON_WORD_MAP = {
+    "the": "tha", "and": "an", "is": "iz", "to": "tu", "in": "inn", "of": "uv",
+    "that": "dat", "for": "fur", "on": "awn", "with": "wit"
+}
+PUNCTUATION = list("!?;:.,")
+
+# Method functions. Each takes the article text, its word_tokenize() tokens (computed once per
+# article and shared, never modified) and the random.Random to draw from.
+def insert_nonsense(text, words, rng):
     result = []
     for word in words:
         result.append(word)
-        if random.random() < 0.08:
-            result.append(random.choice(nonsense_words))
+        if rng.random() < 0.08:
+            result.append(rng.choice(nonsense_words))
     return ' '.join(result), "insert_nonsense"
 
-def rearrange_partial(text):
-    words = word_tokenize(text)
+def rearrange_partial(text, words, rng):
+    words = list(words)
     n = len(words)
     chunks = []
-    n_permutations = random.randint(2, 10)
+    n_permutations = rng.randint(2, 10)
     for _ in range(n_permutations):
         if n < 20: break
-        start = random.randint(0, n - 20)
+        start = rng.randint(0, n - 20)
         chunk = words[start:start+20]
-        random.shuffle(chunk)
+        rng.shuffle(chunk)
         chunks.append((start, chunk))
     for start, chunk in chunks:
         words[start:start+20] = chunk
     return ' '.join(words), "partial_shuffle"
 
-def apply_negations(text):
-    # Negation swaps
-    swaps = {
-    # Original mappings
-    r'\byes\b': 'no',
-    r'\bno\b': 'yes',
-    r'\bnot\b': 'is',
-    r'\bnever\b': 'always',
-    r'\balways\b': 'sometimes',
-    r'\bdid\b': 'did not',
-    r'\bwas\b': 'was not',
-    r'\bare\b': 'are not',
-    r'\bis\b': 'is not',
-    r'\bcan\b': 'cannot',
-    r'\bdid not\b': 'did',
-    r'\bwas not\b': 'was',
-    r'\bare not\b': 'are',
-    r'\bis not\b': 'is',
-    r'\bam\b': 'am not',
-    r'\bam not\b': 'am',
-    r'\bwere\b': 'were not',
-    r'\bwere not\b': 'were',
-    r'\bbe\b': 'be not',
-    r'\bbe not\b': 'be',
-    r'\bbeing\b': 'not being',
-    r'\bbeen\b': 'not been',
-    r'\bcannot\b': 'can',
-    r'\bmay\b': 'may not',
-    r'\bmay not\b': 'may',
-    r'\bmight\b': 'might not',
-    r'\bmight not\b': 'might',
-    r'\bshould\b': 'should not',
-    r'\bshould not\b': 'should',
-    r'\bwould\b': 'would not',
-    r'\bwould not\b': 'would',
-    r'\bcould\b': 'could not',
-    r'\bcould not\b': 'could',
-    r'\bmust\b': 'must not',
-    r'\bmust not\b': 'must',
-    r'\bshall\b': 'shall not',
-    r'\bshall not\b': 'shall',
-    r'\bdo\b': 'do not',
-    r'\bdon\'t\b': 'do',
-    r'\bdoes\b': 'does not',
-    r'\bdoes not\b': 'does',
-    r'\bhave\b': 'have not',
-    r'\bhave not\b': 'have',
-    r'\bhas\b': 'has not',
-    r'\bhas not\b': 'has',
-    r'\bhad\b': 'had not',
-    r'\bhad not\b': 'had',
-    r'\bwill\b': 'will not',
-    r'\bwon\'t\b': 'will',
-    r'\bin\b': 'out',
-    r'\bout\b': 'in',
-    r'\bon\b': 'off',
-    r'\boff\b': 'on',
-    r'\bup\b': 'down',
-    r'\bdown\b': 'up',
-    r'\bleft\b': 'right',
-    r'\bright\b': 'left',
-    r'\binside\b': 'outside',
-    r'\boutside\b': 'inside',
-    r'\babove\b': 'below',
-    r'\bbelow\b': 'above',
-    r'\bover\b': 'under',
-    r'\bunder\b': 'over',
-    r'\bopen\b': 'closed',
-    r'\bclosed\b': 'open',
-    r'\bbegin\b': 'end',
-    r'\bend\b': 'begin',
-    r'\bstart\b': 'stop',
-    r'\bstop\b': 'start',
-    r'\benter\b': 'exit',
-    r'\bexit\b': 'enter',
-    r'\battach\b': 'detach',
-    r'\bdetach\b': 'attach',
-    r'\bconnect\b': 'disconnect',
-    r'\bdisconnect\b': 'connect',
-    r'\bbuild\b': 'destroy',
-    r'\bdestroy\b': 'build',
-    r'\bgood\b': 'bad',
-    r'\bbad\b': 'good',
-    r'\bhappy\b': 'sad',
-    r'\bsad\b': 'happy',
-    r'\blove\b': 'hate',
-    r'\bhate\b': 'love',
-    r'\bpeace\b': 'war',
-    r'\bwar\b': 'peace',
-    r'\btrue\b': 'false',
-    r'\bfalse\b': 'true',
-    r'\btruth\b': 'lie',
-    r'\blie\b': 'truth',
-    r'\bfear\b': 'courage',
-    r'\bcourage\b': 'fear',
-    r'\bmore\b': 'less',
-    r'\bless\b': 'more',
-    r'\bmost\b': 'least',
-    r'\bleast\b': 'most',
-    r'\binclude\b': 'exclude',
-    r'\bexclude\b': 'include',
-    r'\baccept\b': 'reject',
-    r'\breject\b': 'accept',
-    r'\ballow\b': 'forbid',
-    r'\bforbid\b': 'allow',
-    r'\badmit\b': 'deny',
-    r'\bdeny\b': 'admit',
-    r'\bagree\b': 'disagree',
-    r'\bdisagree\b': 'agree',
-    r'\bapprove\b': 'disapprove',
-    r'\bdisapprove\b': 'approve',
-    r'\bbuy\b': 'sell',
-    r'\bsell\b': 'buy',
-    r'\bjoin\b': 'leave',
-    r'\bleave\b': 'join',
-    r'\bfind\b': 'lose',
-    r'\blose\b': 'find',
-    r'\bclean\b': 'dirty',
-    r'\bdirty\b': 'clean',
-    r'\bwinter\b': 'summer',
-    r'\bsummer\b': 'winter',
-    r'\bwarm\b': 'cold',
-    r'\bcold\b': 'warm',
-    r'\bwet\b': 'dry',
-    r'\bdry\b': 'wet',
-    r'\bday\b': 'night',
-    r'\bnight\b': 'day',
-    r'\byoung\b': 'old',
-    r'\bold\b': 'young',
-    r'\bcat\b': 'dog',
-    r'\bdog\b': 'cat',
-}
-    for k, v in swaps.items():
-        text = re.sub(k, v, text, flags=re.IGNORECASE)
+def apply_negations(text, words, rng):
+    text = NEGATION_PATTERN.sub(lambda m: NEGATION_SWAPS[' '.join(m.group().lower().split())], text)
     text = text.replace('?', '.')
     return text, "negation"
 
-def random_punctuation(text):
-    words = word_tokenize(text)
-    puncts = list("!?;:.,")
+def random_punctuation(text, words, rng):
     result = []
     for word in words:
         result.append(word)
-        if random.random() < 0.03:
-            result.append(random.choice(puncts))
+        if rng.random() < 0.03:
+            result.append(rng.choice(PUNCTUATION))
     return ' '.join(result), "punctuation"
 
-def duplicate_words(text):
-    words = word_tokenize(text)
+def duplicate_words(text, words, rng):
     result = []
     for word in words:
         result.append(word)
-        if random.random() < 0.05:
+        if rng.random() < 0.05:
             result.append(word)
     return ' '.join(result), "duplicate_words"
 
-def replace_common_words(text):
-    similar_map = {
-        "the": "tha", "and": "an", "is": "iz", "to": "tu", "in": "inn", "of": "uv",
-        "that": "dat", "for": "fur", "on": "awn", "with": "wit"
-    }
-    words = word_tokenize(text)
-    replaced = [similar_map.get(word.lower(), word) for word in words]
+def replace_common_words(text, words, rng):
+    replaced = [COMMON_WORD_MAP.get(word.lower(), word) for word in words]
     return ' '.join(replaced), "replace_common"
 
-def alter_numbers(text):
+def alter_numbers(text, words, rng):
     def replace_number(match):
         num = float(match.group())
-        op = random.choice(['multiply', 'divide', 'delete'])
+        op = rng.choice(['multiply', 'divide', 'delete'])
         if op == 'multiply':
-            return str(round(num * random.uniform(1.5, 3), 2))
+            return str(round(num * rng.uniform(1.5, 3), 2))
         elif op == 'divide':
-            return str(round(num / random.uniform(1.5, 3), 2))
+            return str(round(num / rng.uniform(1.5, 3), 2))
         else:  # delete
             return ''
-    return re.sub(r'\b\d+(\.\d+)?\b', replace_number, text), "number_manip"
+    return NUMBER_PATTERN.sub(replace_number, text), "number_manip"
 
-def apply_stemming(text):
-    words = word_tokenize(text)
+def apply_stemming(text, words, rng):
     stemmed = [ps.stem(w) for w in words]
     return ' '.join(stemmed), "stemming"
 
@@ -290,52 +296,129 @@ fake_methods = [
     alter_numbers,
     apply_stemming
 ]
+TEXT_ONLY_METHODS = {apply_negations, alter_numbers}
 
 # Main augmentation function
-def generate_fakes(content):
-    num_fakes = random.randint(0, 7)  # Generate between 0 and 6 fake articles
+def generate_fakes(content, rng=random):
+    """Return (fake_text, method_name) pairs; modifications that leave the text unchanged are dropped."""
+    num_fakes = rng.randint(0, 7)  # Generate between 0 and 7 fake articles
+    chosen_methods = rng.sample(fake_methods, k=min(num_fakes, len(fake_methods)))
+    words = None
     fake_contents = []
-    chosen_methods = random.sample(fake_methods, k=min(num_fakes, len(fake_methods)))
     for method in chosen_methods:
-        fake, method_name = method(content)
-        # if after modification, the text is the same, skip this modification
-        if fake == content:
-            print('After modification, the text is the same. Skipping this modification.')
-            continue
-        fake_contents.append((fake, method_name))
+        if words is None and method not in TEXT_ONLY_METHODS:
+            words = word_tokenize(content)  # tokenized once, shared by every method
+        fake, method_name = method(content, words, rng)
+        if fake != content:
+            fake_contents.append((fake, method_name))
     return fake_contents
 
-def main():
-    input_file = "articles_ALL_data.csv"
-    output_file = "FAKE_articles_ALL_data_FINAL.csv"
-    print('Started')
+def process_chunk(chunk_index, chunk, seed):
+    """Generate fakes for one chunk of articles with an RNG seeded from (seed, chunk_index).
 
-    df = pd.read_csv(input_file)
-    fake_data = []
+    Seeding per chunk rather than per process keeps the output identical for any
+    number of workers. Returns (fake rows, articles processed, errors).
+    """
+    rng = random.Random(f"{seed}-{chunk_index}")
+    chunk = chunk[chunk['source'] != 'fake article generator']
+    positions, contents, methods = [], [], []
     n_errors = 0
-    for _, row in df.iterrows():
-        # Skip rows with 'source' == 'fake article generator'
-        if _ % 100 == 0:
-            print(f"Processing row {_}...")
-        if row['source'] == 'fake article generator':
-            continue
-        content = row['content']
+    for position, content in enumerate(chunk['content']):
         try:
-            fakes = generate_fakes(content)
-            for fake_text, method_name in fakes:
-                new_row = row.copy()
-                new_row['content'] = fake_text
-                new_row['method'] = method_name
-                fake_data.append(new_row)
+            fakes = generate_fakes(content, rng)
         except Exception as e:
             n_errors += 1
-            print(f"Error processing row {_}: {e}")
+            print(f"Error processing row {chunk.index[position]}: {e}")
             continue
+        for fake_text, method_name in fakes:
+            positions.append(position)
+            contents.append(fake_text)
+            methods.append(method_name)
+    fake_df = chunk.iloc[positions].assign(content=contents, method=methods)
+    # The output is streamed, so rows are shuffled within each chunk rather than globally
+    fake_df = fake_df.sample(frac=1, random_state=rng.getrandbits(32)).reset_index(drop=True)
+    return fake_df, len(chunk), n_errors
+
+class FakeArticleWriter:
+    """Append DataFrames to a CSV or Parquet file as they arrive instead of collecting them in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.rows = 0
+        self._writer = None
+        self._header_written = False
+
+    def write(self, df):
+        if df.empty:
+            return
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode="a" if self._header_written else "w", header=not self._header_written, index=False)
+            self._header_written = True
+        self.rows += len(df)
 
-    fake_df = pd.DataFrame(fake_data)
-    fake_df = fake_df.sample(frac=1).reset_index(drop=True)  # Shuffle
-    fake_df.to_csv(output_file, index=False)
-    print(f"Generated {len(fake_df)} fake articles to '{output_file}'")
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def iter_results(chunks, seed, workers):
+    """Yield process_chunk results in input order, keeping at most 2 * workers chunks in flight."""
+    if workers <= 1:
+        for chunk_index, chunk in enumerate(chunks):
+            yield process_chunk(chunk_index, chunk, seed)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk_index, chunk in enumerate(chunks):
+            pending.append(executor.submit(process_chunk, chunk_index, chunk, seed))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run(input_file, output_file, workers=None, chunk_size=500, seed=42, limit=None):
+    """Stream input_file through generate_fakes and return (articles, fakes written, errors, seconds)."""
+    workers = workers or os.cpu_count() or 1
+    chunks = pd.read_csv(input_file, chunksize=chunk_size, nrows=limit)
+    writer = FakeArticleWriter(output_file)
+    n_articles = n_errors = 0
+    start = time.perf_counter()
+    try:
+        for fake_df, processed, errors in iter_results(chunks, seed, workers):
+            writer.write(fake_df)
+            n_articles += processed
+            n_errors += errors
+            elapsed = time.perf_counter() - start
+            print(f"Processed {n_articles} articles ({n_articles / elapsed:.1f} articles/sec), "
+                  f"{writer.rows} fakes written")
+    finally:
+        writer.close()
+    return n_articles, writer.rows, n_errors, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate corrupted copies of existing articles")
+    parser.add_argument("--input", default="articles_ALL_data.csv")
+    parser.add_argument("--output", default="FAKE_articles_ALL_data_FINAL.csv", help="a .csv or .parquet path")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limit", type=int, default=None, help="only read the first N rows")
+    args = parser.parse_args()
+
+    print('Started')
+    nltk.download('punkt', quiet=True)
+    nltk.download('punkt_tab', quiet=True)  # needed by word_tokenize on newer NLTK releases
+    n_articles, n_fakes, n_errors, elapsed = run(args.input, args.output, args.workers, args.chunk_size,
+                                                 args.seed, args.limit)
+    print(f"Generated {n_fakes} fake articles from {n_articles} articles to '{args.output}' "
+          f"in {elapsed:.1f}s ({n_articles / elapsed:.1f} articles/sec, {n_errors} errors)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,149 +1,290 @@
+import argparse
+import csv
+import datetime
+import functools
+import io
+import json
 import os
 import random
-import datetime
-import pandas as pd
+import resource
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Settings
 topics = [
-    "Animals","Arts","Business","Science","Nature","Demography","Geography", 
+    "Animals","Arts","Business","Science","Nature","Demography","Geography",
     "History","Culture","Education","AI","Languages","Education and Society",
     "Entertainment" "Environment","Health","Politics","Travel","Books","Space"
 ]
 
 output_folder = "fake_articles"
-output_csv = "fake_articles.csv"
-num_articles = 5000  # Change this number as you want
-
-# Create output folder
-os.makedirs(output_folder, exist_ok=True)
-
-# Helper functions
-def generate_fake_title(topic):
-    templates = [
-        "The Untold Secrets of {}",
-        "How {} Changed the World Forever",
-        "Discovering the Hidden Side of {}",
-        "10 Shocking Facts About {}",
-        "The Mythical Origins of {}",
-        "Why {} Might Be Different Than You Think",
-        "Exploring the Ancient History of {}",
-        "How {} Will Shape Our Future"
-    ]
-    template = random.choice(templates)
-    return template.format(topic)
-
-def generate_realistic_fake_body(topic, base_min_words=500, base_max_words=1000):
-    min_words = random.randint(base_min_words, base_min_words + 200)
-    max_words = random.randint(base_max_words - 200, base_max_words)
-    num_words = random.randint(min_words, max_words)
-
-    intro_sentences = [
-        f"Many experts have debated the true nature of {topic} for decades.",
-        f"Recent discoveries suggest that our understanding of {topic} might be completely wrong.",
-        f"Throughout history, {topic} has played a crucial role in shaping civilizations.",
-        f"New theories propose astonishing insights into {topic}."
-    ]
-    middle_sentences = [
-        f"In the early 20th century, several groundbreaking studies on {topic} were conducted, but many have since been debunked.",
-        f"Legends and folklore surrounding {topic} hint at a much deeper significance.",
-        f"Researchers now believe that the true story behind {topic} is far more complex and fascinating than previously thought.",
-        f"According to a fictitious report, the dynamics of {topic} are influenced by unknown cosmic forces."
-    ]
-    conclusion_sentences = [
-        f"Ultimately, the mystery of {topic} continues to captivate and bewilder scholars around the globe.",
-        f"Although the facts remain elusive, the fascination with {topic} is unlikely to fade anytime soon.",
-        f"As new fake discoveries are made, our perception of {topic} may change forever.",
-        f"Whether myth or reality, {topic} remains a topic of endless debate."
-    ]
-
-    paragraphs = []
-    current_word_count = 0
-
-    # Build body paragraphs
-    while current_word_count < num_words - 100:
-        paragraph = random.choice(intro_sentences) + " "
-        paragraph += " ".join(random.choice(middle_sentences) for _ in range(3)) + " "
-        paragraph = paragraph.strip()
-        if not paragraph.endswith("."):
-            paragraph += "."
-        paragraphs.append(paragraph)
-        current_word_count += len(paragraph.split())
-
-    # Add a final conclusion paragraph
-    conclusion_paragraph = random.choice(conclusion_sentences)
-    if not conclusion_paragraph.endswith("."):
-        conclusion_paragraph += "."
-    paragraphs.append(conclusion_paragraph)
-
-    body_text = "\n\n".join(paragraphs)
-    words = body_text.split()[:num_words]
-    final_body = " ".join(words)
+num_articles = 5000  # Change this number as you want (or pass --num-articles)
+
+TITLE_TEMPLATES = [
+    "The Untold Secrets of {}",
+    "How {} Changed the World Forever",
+    "Discovering the Hidden Side of {}",
+    "10 Shocking Facts About {}",
+    "The Mythical Origins of {}",
+    "Why {} Might Be Different Than You Think",
+    "Exploring the Ancient History of {}",
+    "How {} Will Shape Our Future"
+]
+INTRO_SENTENCES = [
+    "Many experts have debated the true nature of {topic} for decades.",
+    "Recent discoveries suggest that our understanding of {topic} might be completely wrong.",
+    "Throughout history, {topic} has played a crucial role in shaping civilizations.",
+    "New theories propose astonishing insights into {topic}."
+]
+MIDDLE_SENTENCES = [
+    "In the early 20th century, several groundbreaking studies on {topic} were conducted, but many have since been debunked.",
+    "Legends and folklore surrounding {topic} hint at a much deeper significance.",
+    "Researchers now believe that the true story behind {topic} is far more complex and fascinating than previously thought.",
+    "According to a fictitious report, the dynamics of {topic} are influenced by unknown cosmic forces."
+]
+CONCLUSION_SENTENCES = [
+    "Ultimately, the mystery of {topic} continues to captivate and bewilder scholars around the globe.",
+    "Although the facts remain elusive, the fascination with {topic} is unlikely to fade anytime soon.",
+    "As new fake discoveries are made, our perception of {topic} may change forever.",
+    "Whether myth or reality, {topic} remains a topic of endless debate."
+]
+SUMMARY_TEMPLATES = [
+    "An insightful exploration into the lesser-known aspects of {topic}.",
+    "This article challenges traditional views about {topic} with fictional evidence.",
+    "A creative journey uncovering myths and fabricated facts about {topic}.",
+    "Discover the surprising fictional history and future of {topic}."
+]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Quinn", "Jamie", "Skyler"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Williams", "Jones", "Garcia", "Miller", "Davis"]
+START_DATE = datetime.date(2010, 1, 1)
+END_DATE = datetime.date(2024, 12, 31)
 
+# Helper functions. Each draws from rng, so a seeded random.Random reproduces the same articles.
+def generate_fake_title(topic, rng=random):
+    return rng.choice(TITLE_TEMPLATES).format(topic)
+
+@functools.lru_cache(maxsize=None)
+def _sentence_words(topic):
+    """Every body sentence for a topic, pre-split into words once."""
+    split = lambda sentences: [tuple(s.format(topic=topic).split()) for s in sentences]
+    return split(INTRO_SENTENCES), split(MIDDLE_SENTENCES), split(CONCLUSION_SENTENCES)
+
+def generate_realistic_fake_body(topic, base_min_words=500, base_max_words=1000, rng=random):
+    min_words = rng.randint(base_min_words, base_min_words + 200)
+    max_words = rng.randint(base_max_words - 200, base_max_words)
+    num_words = rng.randint(min_words, max_words)
+    intros, middles, conclusions = _sentence_words(topic)
+
+    # Paragraphs of one intro and three middle sentences, then a conclusion; the body is
+    # the first num_words words, so words are collected directly instead of re-splitting text
+    words = []
+    while len(words) < num_words - 100:
+        words.extend(rng.choice(intros))
+        for _ in range(3):
+            words.extend(rng.choice(middles))
+    words.extend(rng.choice(conclusions))
+
+    final_body = " ".join(words[:num_words])
     if not final_body.endswith("."):
         final_body += "."
-
     return final_body
 
-def generate_summary(topic):
-    templates = [
-        f"An insightful exploration into the lesser-known aspects of {topic}.",
-        f"This article challenges traditional views about {topic} with fictional evidence.",
-        f"A creative journey uncovering myths and fabricated facts about {topic}.",
-        f"Discover the surprising fictional history and future of {topic}."
-    ]
-    return random.choice(templates)
-
-def generate_fake_author():
-    first_names = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Quinn", "Jamie", "Skyler"]
-    last_names = ["Smith", "Johnson", "Brown", "Williams", "Jones", "Garcia", "Miller", "Davis"]
-    return f"{random.choice(first_names)} {random.choice(last_names)}"
-
-def generate_fake_date():
-    start_date = datetime.date(2010, 1, 1)
-    end_date = datetime.date(2024, 12, 31)
-    time_between_dates = end_date - start_date
-    days_between_dates = time_between_dates.days
-    random_number_of_days = random.randrange(days_between_dates)
-    random_date = start_date + datetime.timedelta(days=random_number_of_days)
+def generate_summary(topic, rng=random):
+    return rng.choice(SUMMARY_TEMPLATES).format(topic=topic)
+
+def generate_fake_author(rng=random):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def generate_fake_date(rng=random):
+    random_number_of_days = rng.randrange((END_DATE - START_DATE).days)
+    random_date = START_DATE + datetime.timedelta(days=random_number_of_days)
     return random_date.strftime("%B %d, %Y")
 
-# Store articles data
-articles_data = []
-
-# Generate articles
-for i in range(num_articles):
-    topic = random.choice(topics)
-    title = generate_fake_title(topic)
-    body = generate_realistic_fake_body(topic)
-    summary = generate_summary(topic)
-    author = generate_fake_author()
-    date = generate_fake_date()
-
-    article_content = f"Title: {title}\n"
-    article_content += f"Author: {author}\n"
-    article_content += f"Date: {date}\n"
-    article_content += f"Topic: {topic}\n"
-    article_content += f"Summary: {summary}\n"
-    article_content += "\n"
-    article_content += body
-
-    # Save to individual file
-    filename = os.path.join(output_folder, f"article_{i+1}.txt")
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(article_content)
-
-    # Save to list for CSV
-    articles_data.append({
-        "Title": title,
-        "Author": author,
-        "Date": date,
+def generate_article(rng=random):
+    topic = rng.choice(topics)
+    return {
+        "Title": generate_fake_title(topic, rng),
+        "Author": generate_fake_author(rng),
+        "Date": generate_fake_date(rng),
         "Topic": topic,
-        "Summary": summary,
-        "Body": body
-    })
+        "Summary": generate_summary(topic, rng),
+        "Body": generate_realistic_fake_body(topic, rng=rng),
+    }
+
+def format_article_text(article):
+    """The article_{i}.txt layout."""
+    return (f"Title: {article['Title']}\nAuthor: {article['Author']}\nDate: {article['Date']}\n"
+            f"Topic: {article['Topic']}\nSummary: {article['Summary']}\n\n{article['Body']}")
+
+def shard_bounds(shard_index, shard_size, total):
+    start = shard_index * shard_size
+    return start, min(start + shard_size, total)
+
+def generate_articles(total, seed=42, shard_size=50000, shards=None):
+    """Lazily yield (article_number, article) for articles 1..total.
+
+    Every shard of shard_size articles has its own RNG seeded from (seed, shard), so a
+    shard's articles do not depend on which process generates it or in what order.
+    """
+    num_shards = -(-total // shard_size)
+    for shard in (range(num_shards) if shards is None else shards):
+        rng = random.Random(f"{seed}-{shard}")
+        start, end = shard_bounds(shard, shard_size, total)
+        for i in range(start, end):
+            yield i + 1, generate_article(rng)
+
+class ShardWriter:
+    """Append article chunks to one shard's Parquet/JSONL/CSV files and optional .txt outputs."""
+
+    def __init__(self, output_dir, name, formats, txt):
+        self.output_dir = output_dir
+        self.paths = {fmt: os.path.join(output_dir, f"{name}.{fmt}") for fmt in formats}
+        self.txt = txt
+        self._parquet = None
+        self._files = {fmt: open(path, "w", encoding="utf-8", newline="")
+                       for fmt, path in self.paths.items() if fmt in ("jsonl", "csv")}
+        self._csv = None
+        self._archive = None
+        if txt == "tar":
+            self._archive = tarfile.open(os.path.join(output_dir, f"{name}.tar"), "w")
+        elif txt == "zip":
+            self._archive = zipfile.ZipFile(os.path.join(output_dir, f"{name}.zip"), "w", zipfile.ZIP_DEFLATED)
+        elif txt == "files":
+            os.makedirs(os.path.join(output_dir, "txt"), exist_ok=True)
+
+    def write(self, numbered_articles):
+        articles = [article for _, article in numbered_articles]
+        if "parquet" in self.paths:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pylist(articles)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.paths["parquet"], table.schema)
+            self._parquet.write_table(table)
+        if "jsonl" in self._files:
+            self._files["jsonl"].writelines(json.dumps(a, ensure_ascii=False) + "\n" for a in articles)
+        if "csv" in self._files:
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._files["csv"], fieldnames=list(articles[0]))
+                self._csv.writeheader()
+            self._csv.writerows(articles)
+        if self.txt != "none":
+            for number, article in numbered_articles:
+                self._write_txt(f"article_{number}.txt", format_article_text(article).encode("utf-8"))
+
+    def _write_txt(self, filename, data):
+        if self.txt == "files":
+            with open(os.path.join(self.output_dir, "txt", filename), "wb") as f:
+                f.write(data)
+        elif self.txt == "tar":
+            info = tarfile.TarInfo(filename)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+        elif self.txt == "zip":
+            self._archive.writestr(filename, data)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        for f in self._files.values():
+            f.close()
+        if self._archive is not None:
+            self._archive.close()
+
+def write_shard(shard, total, output_dir, formats, txt, seed, shard_size, chunk_size):
+    """Generate one shard in chunks of chunk_size articles; returns (shard, articles, peak RSS in MB)."""
+    num_shards = -(-total // shard_size)
+    writer = ShardWriter(output_dir, f"articles-{shard:05d}-of-{num_shards:05d}", formats, txt)
+    count, chunk = 0, []
+    try:
+        for numbered in generate_articles(total, seed, shard_size, shards=[shard]):
+            chunk.append(numbered)
+            if len(chunk) == chunk_size:
+                writer.write(chunk)
+                count, chunk = count + len(chunk), []
+        if chunk:
+            writer.write(chunk)
+            count += len(chunk)
+    finally:
+        writer.close()
+    return shard, count, peak_rss_mb()
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(who).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def merge_archives(output_dir, txt, num_shards):
+    """Pack the per-shard archives into a single articles.tar/articles.zip, one member at a time."""
+    shard_paths = sorted(os.path.join(output_dir, name) for name in os.listdir(output_dir)
+                         if name.startswith("articles-") and name.endswith(f"-of-{num_shards:05d}.{txt}"))
+    merged = os.path.join(output_dir, f"articles.{txt}")
+    if txt == "tar":
+        with tarfile.open(merged, "w") as out:
+            for path in shard_paths:
+                with tarfile.open(path) as shard:
+                    for member in shard:
+                        out.addfile(member, shard.extractfile(member))
+    else:
+        with zipfile.ZipFile(merged, "w", zipfile.ZIP_DEFLATED) as out:
+            for path in shard_paths:
+                with zipfile.ZipFile(path) as shard:
+                    for name in shard.namelist():
+                        out.writestr(name, shard.read(name))
+    for path in shard_paths:
+        os.remove(path)
+    return merged
+
+def run(total, output_dir=output_folder, formats=("parquet",), txt="none", workers=None, seed=42,
+        shard_size=50000, chunk_size=1000):
+    """Generate `total` articles into output_dir across worker processes and report throughput."""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    num_shards = -(-total // shard_size)
+    args = (total, output_dir, formats, txt, seed, shard_size, chunk_size)
+    start = time.perf_counter()
+    done = 0
+    worker_rss = 0.0
+
+    def report(shard, count, rss):
+        nonlocal done, worker_rss
+        done += count
+        worker_rss = max(worker_rss, rss)
+        elapsed = time.perf_counter() - start
+        print(f"Shard {shard + 1}/{num_shards} done: {done}/{total} articles ({done / elapsed:.0f} articles/sec)")
+
+    if workers <= 1:
+        for shard in range(num_shards):
+            report(*write_shard(shard, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, num_shards)) as executor:
+            for result in executor.map(write_shard, range(num_shards), *[[a] * num_shards for a in args]):
+                report(*result)
+    if txt in ("tar", "zip"):
+        print(f"Packed .txt files into {merge_archives(output_dir, txt, num_shards)}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{done} fake articles generated in '{output_dir}' in {elapsed:.1f}s ({done / elapsed:.0f} articles/sec); "
+          f"peak RSS {peak_rss_mb():.0f} MB main, {worker_rss:.0f} MB per worker")
+    return done, elapsed
 
-# Save all articles into one CSV file
-df = pd.DataFrame(articles_data)
-df.to_csv(output_csv, index=False, encoding="utf-8")
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic fake articles into sharded Parquet/JSONL/CSV files")
+    parser.add_argument("--num-articles", type=int, default=num_articles)
+    parser.add_argument("--output-dir", default=output_folder)
+    parser.add_argument("--format", nargs="+", choices=["parquet", "jsonl", "csv"], default=["parquet"])
+    parser.add_argument("--txt", choices=["none", "files", "tar", "zip"], default="none",
+                        help="also write one article_{i}.txt per article, as files or packed into one archive")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shard-size", type=int, default=50000, help="articles per output shard")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="articles held in memory per write")
+    args = parser.parse_args()
+    run(args.num_articles, args.output_dir, args.format, args.txt, args.workers, args.seed,
+        args.shard_size, args.chunk_size)
 
-print(f"{num_articles} fake articles with summaries generated in folder '{output_folder}' and saved to '{output_csv}'!")
+if __name__ == "__main__":
+    main()
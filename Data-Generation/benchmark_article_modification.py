@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+import pandas as pd
+from nltk.tokenize import word_tokenize
+
+import Existing_Articles_Modification as eam
+
+SAMPLE_SENTENCES = [
+    "The government did not approve the new budget, and officials were left waiting for 3 more weeks.",
+    "Researchers found that 42 percent of the cold water samples are clean and safe to drink.",
+    "Is it true that the old bridge will open in summer? Experts say it may not happen before 2026.",
+    "The company can build 120 homes on the land, but the council has not agreed to sell it.",
+    "Local teams should start training early because the war of words over the stadium is far from over.",
+]
+
+def synthetic_articles(n, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "title": [f"Article {i}" for i in range(n)],
+        "content": [" ".join(rng.choices(SAMPLE_SENTENCES, k=rng.randint(20, 60))) for _ in range(n)],
+        "source": ["benchmark"] * n,
+    })
+
+def legacy_generate_fakes(content):
+    """The previous implementation: word_tokenize per method and one re.sub per negation entry."""
+    words = lambda: word_tokenize(content)
+    num_fakes = random.randint(0, 7)
+    fake_contents = []
+    for method in random.sample(eam.fake_methods, k=min(num_fakes, len(eam.fake_methods))):
+        if method is eam.apply_negations:
+            fake = content
+            for phrase, replacement in eam.NEGATION_SWAPS.items():
+                fake = re.sub(r"\b" + re.escape(phrase) + r"\b", replacement, fake, flags=re.IGNORECASE)
+            fake, method_name = fake.replace('?', '.'), "negation"
+        else:
+            fake, method_name = method(content, words(), random)
+        if fake != content:
+            fake_contents.append((fake, method_name))
+    return fake_contents
+
+def legacy_run(df):
+    fake_data = []
+    for _, row in df.iterrows():
+        if row['source'] == 'fake article generator':
+            continue
+        for fake_text, method_name in legacy_generate_fakes(row['content']):
+            new_row = row.copy()
+            new_row['content'] = fake_text
+            new_row['method'] = method_name
+            fake_data.append(new_row)
+    return pd.DataFrame(fake_data).sample(frac=1).reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="articles/sec of the previous single-process loop vs the chunked pipeline")
+    parser.add_argument("--input", default=None, help="articles CSV; defaults to synthetic articles")
+    parser.add_argument("--num-articles", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="article_modification_")
+    input_file = args.input or os.path.join(tmp_dir, "articles.csv")
+    if args.input is None:
+        synthetic_articles(args.num_articles).to_csv(input_file, index=False)
+    df = pd.read_csv(input_file, nrows=args.num_articles)
+
+    random.seed(42)
+    start = time.perf_counter()
+    legacy_run(df)
+    legacy_rate = len(df) / (time.perf_counter() - start)
+    print(f"{'previous loop':>16}: {legacy_rate:8.1f} articles/sec")
+
+    for workers in args.workers:
+        n_articles, _, _, elapsed = eam.run(input_file, os.path.join(tmp_dir, f"fakes_{workers}.parquet"),
+                                            workers, args.chunk_size, limit=args.num_articles)
+        rate = n_articles / elapsed
+        print(f"{f'{workers} worker(s)':>16}: {rate:8.1f} articles/sec ({rate / legacy_rate:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,173 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from inference import TruthSeekerInference
+from inference import AGGREGATIONS, TruthSeekerInference
+from batching import MicroBatchScheduler, QueueFullError
+from prediction_cache import DEFAULT_CACHE_PATH
+from model_registry import DEFAULT_REGISTRY_PATH, HotReloader, ModelRegistry
 import logging
+import os
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, resources={r"/analyze": {"origins": "http://localhost:8080"}})
+CORS(app, resources={r"/analyze.*": {"origins": "http://localhost:8080"}})
 
-model_path = "/Users/mattlaing/Desktop/TruthSeeker/models/finetuned"  # Update this path as needed
-inference = TruthSeekerInference(model_path)
+model_path = os.getenv("TRUTHSEEKER_MODEL_PATH", "models/finetuned")
+BATCH_SIZE = 32
+
+# Micro-batching: concurrent requests are merged into one forward pass
+MICROBATCH_ENABLED = os.getenv("TRUTHSEEKER_MICROBATCH", "1") != "0"
+MAX_WAIT_MS = float(os.getenv("TRUTHSEEKER_MAX_WAIT_MS", "5"))
+MAX_QUEUE_SIZE = int(os.getenv("TRUTHSEEKER_MAX_QUEUE_SIZE", "256"))
+# torch intra-op threads per process; 0 keeps torch's default (all cores), which oversubscribes with several workers
+INTRA_OP_THREADS = int(os.getenv("TRUTHSEEKER_INTRA_OP_THREADS", "0"))
+# Warm-up batches at several input lengths before /readyz goes green; 0 runs a single short prediction
+WARM_UP = os.getenv("TRUTHSEEKER_WARM_UP", "1") != "0"
+scheduler = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+def load_inference(path):
+    return TruthSeekerInference(path, cache_path=DEFAULT_CACHE_PATH)
+
+def warm_up_inference(inference):
+    # A hot-swapped version takes traffic at once, so it always gets the full warm-up plus a full batch
+    inference.warm_up(batch_size=BATCH_SIZE)
+
+# Loaded once per process that imports this module; serve.py imports it before forking its workers.
+# With TRUTHSEEKER_REGISTRY set, the registry's active version is served, and every worker swaps in
+# newly activated versions in the background (model_registry.py); otherwise model_path is served as is.
+# Responses carry model_version: the registry version name, or without a registry the same fingerprint the
+# prediction cache keys on. /readyz and /metrics report that cache fingerprint for registry versions too.
+registry = ModelRegistry(DEFAULT_REGISTRY_PATH) if DEFAULT_REGISTRY_PATH else None
+reloader = HotReloader(load_inference, registry, warm_up_fn=warm_up_inference)
+reloader.load(path=None if registry else model_path)
+
+def init_worker(intra_op_threads=INTRA_OP_THREADS, watch_registry=True):
+    """Per-process setup: torch threads, the micro-batching thread, a warm-up pass and the registry watcher.
+
+    Threads do not survive fork(), so this runs in every worker after it is forked
+    (serve.py's post_fork hook) and lazily on the first request otherwise. serve.py
+    passes watch_registry=False because its master follows the registry instead.
+    """
+    global scheduler, _worker_pid
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        import torch
+
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        scheduler = MicroBatchScheduler(
+            predict_with_current,
+            max_batch_size=BATCH_SIZE,
+            max_wait_ms=MAX_WAIT_MS,
+            max_queue_size=MAX_QUEUE_SIZE,
+        ) if MICROBATCH_ENABLED else None
+        with reloader.acquire() as serving:
+            if WARM_UP:
+                serving.model.warm_up()
+            else:
+                serving.model._predict_uncached(["Warm-up statement."], 1)  # bypasses the prediction cache
+            # Once released, a concurrent swap may free serving.model, so describe it while it is held
+            loaded = f"model {serving.version}: {serving.model.startup.summary()}"
+        if watch_registry:
+            reloader.watch()
+        _worker_pid = os.getpid()
+        logger.info(f"Worker {_worker_pid} ready ({torch.get_num_threads()} intra-op threads), {loaded}")
+
+def predict_with_current(texts):
+    """(model version, prediction) per text, from whichever version is current when the batch runs."""
+    with reloader.acquire() as serving:
+        return [(serving.version, p) for p in serving.model.predict_batch(texts, batch_size=BATCH_SIZE)]
+
+def run_predictions(texts):
+    """(predictions, model version); the scheduler never splits a request, so one version scores all of it."""
+    results = predict_with_current(texts) if scheduler is None else scheduler.predict(texts)
+    return [prediction for _, prediction in results], results[0][0]
 
 @app.route('/analyze', methods=['POST'])
 def analyze_statement():
     try:
-        data = request.get_json()
-        if not data or 'text' not in data:
+        init_worker()  # no-op once this process is set up
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        if data.get('long'):
+            # Whole articles: overlapping windows, aggregated per document (see TruthSeekerInference.predict_long)
+            texts = data.get('texts') or [data.get('text', '')]
+            if not isinstance(texts, list):
+                return jsonify({"error": "texts must be a non-empty list"}), 400
+            texts = [str(t).strip() for t in texts]
+            if not all(texts):
+                return jsonify({"error": "Text cannot be empty"}), 400
+            aggregation = data.get('aggregation', 'mean')
+            if aggregation not in AGGREGATIONS:
+                return jsonify({"error": f"aggregation must be one of {list(AGGREGATIONS)}"}), 400
+            with reloader.acquire() as serving:
+                predictions = serving.model.predict_long(texts, batch_size=BATCH_SIZE, aggregation=aggregation)
+            return jsonify({"statements": texts, "predictions": predictions, "model_version": serving.version}), 200
+
+        if 'texts' in data:
+            texts = data['texts']
+            if not isinstance(texts, list) or not texts:
+                return jsonify({"error": "texts must be a non-empty list"}), 400
+            texts = [str(t).strip() for t in texts]
+            if not all(texts):
+                return jsonify({"error": "Text cannot be empty"}), 400
+            predictions, version = run_predictions(texts)
+            return jsonify({"statements": texts, "predictions": predictions, "model_version": version}), 200
+
+        if 'text' not in data:
             return jsonify({"error": "No text provided"}), 400
+        if not isinstance(data['text'], str):
+            return jsonify({"error": "text must be a string"}), 400
 
         text = data['text'].strip()
         if not text:
             return jsonify({"error": "Text cannot be empty"}), 400
 
-        prediction = inference.predict(text)
-        return jsonify({"statement": text, "prediction": prediction}), 200
+        predictions, version = run_predictions([text])
+        return jsonify({"statement": text, "prediction": predictions[0]["label"], "model_version": version}), 200
+    except QueueFullError as e:
+        logger.warning(f"Rejecting request: {e}")
+        return jsonify({"error": "Server busy, retry later"}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error during inference: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('texts'), list):
+        return jsonify({"error": "texts must be a non-empty list"}), 400
+    return analyze_statement()
+
+@app.route('/healthz', methods=['GET'])
+def liveness():
+    return jsonify({"status": "alive", "pid": os.getpid()}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    # Ready once this process has its scheduler and has run a warm-up prediction
+    if _worker_pid != os.getpid():
+        return jsonify({"status": "starting", "pid": os.getpid()}), 503
+    with reloader.acquire() as serving:
+        return jsonify({"status": "ready", "pid": os.getpid(), "model_path": serving.path,
+                        "model_version": serving.version, "model_fingerprint": serving.fingerprint,
+                        "startup": serving.model.startup.report()}), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    stats = scheduler.metrics() if scheduler else {"microbatch": False}
+    with reloader.acquire() as serving:
+        stats["cache"] = serving.model.cache.stats()
+    stats["model"] = reloader.metrics()
+    return jsonify(stats), 200
+
 if __name__ == '__main__':
+    # Development server; see serve.py for the multi-worker production entrypoint
+    init_worker()
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -1,16 +1,19 @@
 import streamlit as st
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
 import logging
 import os
 import json
 import time
 from datetime import datetime
-from typing import Tuple, Optional, Dict, List
+from typing import Any, Tuple, Optional, Dict, List
 from pathlib import Path
 import csv
 from io import StringIO
-import threading
+from batching import QueueFullError
+from inference import LABEL_MAP
+from inference_executor import DeadlineExceededError, InferenceExecutor
+from model_registry import DEFAULT_REGISTRY_PATH, HotReloader, ModelRegistry
+from prediction_cache import PredictionCache, DEFAULT_CACHE_PATH, model_fingerprint
+from startup import StartupTimer, load_classifier, load_tokenizer
 
 # Constants
 DEFAULT_MODEL_PATH = Path.home() / "Desktop" / "TruthSeeker" / "models" / "finetuned"
@@ -21,6 +24,9 @@ HISTORY_FILE = "prediction_history.json"
 CONFIG_FILE = "truthseeker_config.json"
 LOG_FILE = "truthseeker.log"
 PREDICTION_TIMEOUT = 10
+# Shared by every Streamlit session: model calls run on a fixed pool, waiting in a bounded queue
+INFERENCE_WORKERS = int(os.getenv("TRUTHSEEKER_INFERENCE_WORKERS", "1"))
+MAX_QUEUED_PREDICTIONS = int(os.getenv("TRUTHSEEKER_MAX_QUEUED_PREDICTIONS", "8"))
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", handlers=[logging.FileHandler(LOG_FILE), logging.StreamHandler()])
@@ -43,28 +49,64 @@ def load_config() -> Dict:
             logger.error(f"Failed to load config: {e}")
     return default_config
 
-# Load model
-@st.cache_resource(show_spinner=True)
-def load_model(model_path: str) -> Tuple[Optional[AutoTokenizer], Optional[AutoModelForSequenceClassification], Optional[torch.device], float]:
+# Load model; torch and transformers are first imported here, once the page has started rendering
+def load_model(model_path: str) -> Tuple[Optional[Any], Optional[Any], Optional[Any], Dict[str, float]]:
     logger.info(f"Loading model from {model_path}")
-    start_time = time.time()
+    timer = StartupTimer()
     if not os.path.exists(model_path):
         logger.error(f"Model path does not exist: {model_path}")
-        return None, None, None, 0.0
+        return None, None, None, {}
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
-        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        with timer.phase("imports"):
+            import torch
+        tokenizer = load_tokenizer(model_path, timer)
+        model = load_classifier(model_path, timer)  # weights mmap'd from model.safetensors
         device = torch.device("cuda" if torch.cuda.is_available() and torch.cuda.get_device_properties(0).total_memory > 2e9 else "cpu")
-        model.to(device)
-        model.eval()
-        return tokenizer, model, device, time.time() - start_time
+        with timer.phase("device transfer"):
+            model.to(device)
+        with timer.phase("warm-up"), torch.no_grad():
+            model(**{k: v.to(device) for k, v in tokenizer(["Warm-up statement."], return_tensors="pt").items()})
+        logger.info(f"Model ready: {timer.summary()}")
+        return tokenizer, model, device, timer.report()
     except Exception as e:
         logger.error(f"Model loading failed: {e}")
-        return None, None, None, 0.0
+        return None, None, None, {}
+
+def load_serving_model(model_path: str) -> Tuple[Any, Any, Any, Dict[str, float]]:
+    loaded = load_model(model_path)
+    if loaded[1] is None:
+        raise RuntimeError(f"Could not load model from {model_path}")
+    return loaded
+
+# One reloader per server process (st.cache_resource). With TRUTHSEEKER_REGISTRY set it serves the registry's
+# active version and swaps in newly activated ones in the background; the old weights are freed after the
+# last analysis using them finishes. Otherwise model_path is served for the life of the process.
+@st.cache_resource(show_spinner=True)
+def load_reloader(model_path: str) -> HotReloader:
+    registry = ModelRegistry(DEFAULT_REGISTRY_PATH) if DEFAULT_REGISTRY_PATH else None
+    reloader = HotReloader(load_serving_model, registry)
+    reloader.load(path=None if registry else model_path)
+    reloader.watch()
+    return reloader
+
+# Persistent prediction cache, shared with api.py and interact_with_model.py
+@st.cache_resource(show_spinner=False)
+def load_prediction_cache(model_path: str) -> PredictionCache:
+    return PredictionCache(model_fingerprint(model_path, MAX_INPUT_LENGTH, LABEL_MAP), DEFAULT_CACHE_PATH)
+
+# One executor per server process, shared by all sessions (st.cache_resource)
+@st.cache_resource(show_spinner=False)
+def load_executor() -> InferenceExecutor:
+    return InferenceExecutor(workers=INFERENCE_WORKERS, max_queue_size=MAX_QUEUED_PREDICTIONS,
+                             default_timeout=PREDICTION_TIMEOUT, name="app-inference")
+
+def format_prediction(result: Dict) -> Tuple[str, float, str]:
+    confidence = result["confidence"] * 100
+    explanation = "High confidence." if confidence > 80 else "Moderate confidence; verify further." if confidence > 50 else "Low confidence; unreliable."
+    return result["label"], confidence, explanation
 
 # Prediction
-@st.cache_data(show_spinner=False)
-def predict(text: str, _tokenizer: AutoTokenizer, _model: AutoModelForSequenceClassification, _device: torch.device) -> Tuple[str, Optional[float], str]:
+def predict(text: str, _tokenizer: Any, _model: Any, _device: Any, _cache: Optional[PredictionCache] = None, _executor: Optional[InferenceExecutor] = None) -> Tuple[str, Optional[float], str]:
     if not text.strip():
         return "Please enter a statement.", None, ""
     text = text.strip()
@@ -74,30 +116,41 @@ def predict(text: str, _tokenizer: AutoTokenizer, _model: AutoModelForSequenceCl
         text = text[:MAX_INPUT_LENGTH]
         logger.warning(f"Input truncated to {MAX_INPUT_LENGTH} characters")
     try:
+        cached = _cache.get(text) if _cache else None
+        if cached:
+            return format_prediction(cached)
+
         def run_prediction():
+            import torch
+
             inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=MAX_INPUT_LENGTH)
             inputs = {k: v.to(_device) for k, v in inputs.items()}
             with torch.no_grad():
                 outputs = _model(**inputs)
-                probs = torch.softmax(outputs.logits, dim=1)[0]
-                prediction_idx = torch.argmax(outputs.logits, dim=1).item() - 1
-                confidence = probs[prediction_idx + 1].item() * 100
-                label_map = {-1: "False", 0: "Mixed", 1: "True"}
-                explanation = "High confidence." if confidence > 80 else "Moderate confidence; verify further." if confidence > 50 else "Low confidence; unreliable."
-            return label_map[prediction_idx], confidence, explanation
+                probs = torch.softmax(outputs.logits, dim=1)[0].tolist()
+            prediction_idx = max(range(len(probs)), key=probs.__getitem__) - 1
+            result = {
+                "label": LABEL_MAP[prediction_idx],
+                "confidence": probs[prediction_idx + 1],
+                "probabilities": {LABEL_MAP[j - 1]: p for j, p in enumerate(probs)},
+            }
+            if _cache:
+                _cache.put(text, result)
+            return format_prediction(result)
 
-        result = [None]
-        thread = threading.Thread(target=lambda: result.__setitem__(0, run_prediction()))
-        thread.start()
-        thread.join(timeout=PREDICTION_TIMEOUT)
-        return result[0] if result[0] else ("Prediction timed out.", None, "")
+        return (_executor or load_executor()).run(run_prediction, timeout=PREDICTION_TIMEOUT)
+    except QueueFullError:
+        logger.warning("Inference queue full; rejecting analysis")
+        return "Server busy; please retry in a moment.", None, ""
+    except DeadlineExceededError:
+        return "Prediction timed out.", None, ""
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
         return "Analysis unavailable.", None, ""
 
 # History management
-def save_to_history(statement: str, prediction: str, confidence: Optional[float]):
-    entry = {"timestamp": datetime.now().isoformat(), "statement": statement, "prediction": prediction, "confidence": confidence}
+def save_to_history(statement: str, prediction: str, confidence: Optional[float], model_version: Optional[str] = None):
+    entry = {"timestamp": datetime.now().isoformat(), "statement": statement, "prediction": prediction, "confidence": confidence, "model_version": model_version}
     try:
         history = load_history()
         history.append(entry)
@@ -117,7 +170,7 @@ def load_history() -> List[Dict]:
 
 def export_history(history: List[Dict]) -> StringIO:
     output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=["timestamp", "statement", "prediction", "confidence"])
+    writer = csv.DictWriter(output, fieldnames=["timestamp", "statement", "prediction", "confidence", "model_version"])
     writer.writeheader()
     for entry in history:
         writer.writerow(entry)
@@ -193,17 +246,30 @@ def main():
 
     # Model loading
     with st.spinner("Initializing model..."):
-        tokenizer, model, device, load_time = load_model(model_path)
-    if not tokenizer or not model:
+        try:
+            reloader = load_reloader(model_path)
+        except Exception as e:
+            logger.error(f"Model initialization failed: {e}")
+            reloader = None
+        executor = load_executor()
+    if reloader is None:
         st.error("Failed to initialize model. Check path or retry.")
         if st.button("Retry", key="retry"):
             st.cache_resource.clear()
             st.rerun()
         return
 
+    with reloader.acquire() as serving:
+        device, startup = serving.model[2], serving.model[3]
+        model_version, served_path = serving.version, serving.path
+    prediction_cache = load_prediction_cache(served_path)
+
     # Sidebar controls
+    startup_breakdown = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in startup.items() if phase != "total")
+    stats = executor.metrics()
+    executor_status = f"In flight: {stats['in_flight']}, queued: {stats['queued']}, timed out: {stats['timed_out']}, rejected: {stats['rejected']}"
     with st.sidebar:
-        st.markdown(f"<p style='color: {colors['subtle_text']}; font-size: 13px; text-align: center;'>Device: {device}<br>Load Time: {load_time:.2f}s</p>", unsafe_allow_html=True)
+        st.markdown(f"<p style='color: {colors['subtle_text']}; font-size: 13px; text-align: center;'>Model: {model_version}<br>Device: {device}<br>Load Time: {startup['total']:.2f}s<br>{startup_breakdown}<br>Cache hit rate: {prediction_cache.stats()['hit_rate']:.0%}<br>{executor_status}</p>", unsafe_allow_html=True)
         confidence_threshold = st.slider("Confidence Threshold", 0, 100, 50, step=5, format="%d%%", help="Minimum confidence for results")
         analysis_mode = st.selectbox("Mode", ["Quick", "Detailed"], help="Quick: Faster; Detailed: More thorough")
 
@@ -215,13 +281,13 @@ def main():
         st.selectbox("Try an Example", examples, key="example", on_change=lambda: st.session_state.update({"input_text": st.session_state["example"]}))
 
         with st.form("input_form"):
-            statement = st.text_area("Enter Statement", value=st.session_state["input_text"], height=120, key="input", disabled=not tokenizer, placeholder="Type a statement to analyze")
+            statement = st.text_area("Enter Statement", value=st.session_state["input_text"], height=120, key="input", placeholder="Type a statement to analyze")
             st.markdown(f"<p class='character-count'>{len(statement)}/{MAX_INPUT_LENGTH}</p>", unsafe_allow_html=True)
             col1, col2 = st.columns([1, 1])  # Equal columns for balanced buttons
             with col1:
-                analyze_clicked = st.form_submit_button("Analyze", type="primary", disabled=not tokenizer, help="Analyze the statement (Enter)")
+                analyze_clicked = st.form_submit_button("Analyze", type="primary", help="Analyze the statement (Enter)")
             with col2:
-                clear_clicked = st.form_submit_button("Clear", type="secondary", disabled=not tokenizer, help="Clear input (Esc)")
+                clear_clicked = st.form_submit_button("Clear", type="secondary", help="Clear input (Esc)")
 
     # Handle button actions
     if clear_clicked:
@@ -238,15 +304,19 @@ def main():
         else:
             st.session_state["last_submit"] = current_time
             with st.spinner(f"Analyzing in {analysis_mode} mode..."):
-                prediction, confidence, explanation = predict(statement, tokenizer, model, device)
+                with reloader.acquire() as serving:
+                    tokenizer, model, device, _ = serving.model
+                    model_version = serving.version
+                    prediction, confidence, explanation = predict(statement, tokenizer, model, device, load_prediction_cache(serving.path), executor)
                 st.session_state["input_text"] = statement
                 if confidence and confidence >= confidence_threshold:
-                    save_to_history(statement, prediction, confidence)
+                    save_to_history(statement, prediction, confidence, model_version)
                     st.markdown(f"""
                         <div class='result'>
                             <p><strong>Statement:</strong> {statement}</p>
                             <p><strong>Result:</strong> {prediction} ({confidence:.1f}%)</p>
                             <p class='explanation'>{explanation}</p>
+                            <p class='explanation'>Model version: {model_version}</p>
                         </div>
                     """, unsafe_allow_html=True)
                     st.progress(int(confidence))
@@ -0,0 +1,124 @@
+import logging
+import os
+
+import torch
+
+from startup import StartupTimer, load_classifier
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ONNX_FILE = "model.onnx"
+TORCHSCRIPT_FILE = "model.pt"
+QUANTIZED_FILE = "model_int8.pt"
+MODEL_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+class TorchBackend:
+    """Eager PyTorch execution of the Hugging Face checkpoint."""
+
+    name = "torch"
+
+    def __init__(self, model_path, device, timer=None):
+        timer = timer or StartupTimer()
+        self.model = load_classifier(model_path, timer)
+        with timer.phase("device transfer"):
+            self.model.to(device)
+
+    def __call__(self, batch):
+        return self.model(**batch).logits
+
+class TorchScriptBackend:
+    """Traced graph written by export_model.py; takes positional MODEL_INPUTS."""
+
+    name = "torchscript"
+
+    def __init__(self, model_path, device, timer=None):
+        timer = timer or StartupTimer()
+        path = os.path.join(model_path, TORCHSCRIPT_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No TorchScript export at {path}; run export_model.py --format torchscript")
+        # Needs only torch, not transformers' modeling code: the fastest cold start of the torch backends
+        with timer.phase("weights"):
+            self.module = torch.jit.load(path, map_location="cpu")
+            self.module.eval()
+        with timer.phase("device transfer"):
+            self.module.to(device)
+
+    def __call__(self, batch):
+        input_ids = batch["input_ids"]
+        token_type_ids = batch.get("token_type_ids")
+        if token_type_ids is None:
+            token_type_ids = torch.zeros_like(input_ids)
+        return self.module(input_ids, batch["attention_mask"], token_type_ids)
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime session on the CPU execution provider."""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path, device, timer=None, num_threads=None):
+        timer = timer or StartupTimer()
+        with timer.phase("imports"):
+            import onnxruntime as ort
+
+        path = os.path.join(model_path, ONNX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No ONNX export at {path}; run export_model.py --format onnx")
+        if device.type != "cpu":
+            logger.warning("onnxruntime backend runs on CPU; ignoring device %s", device)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        with timer.phase("weights"):
+            self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, batch):
+        feeds = {}
+        for name in self.input_names:
+            value = batch.get(name)
+            if value is None:
+                value = torch.zeros_like(batch["input_ids"])
+            feeds[name] = value.cpu().numpy()
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+def quantize_linear_layers(model):
+    """Dynamic INT8 quantization of every nn.Linear (weights int8, activations quantized per batch)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class QuantizedTorchBackend(TorchBackend):
+    """Dynamically quantized INT8 model published by quantize_model.py (CPU only)."""
+
+    name = "quantized"
+    # Outputs differ slightly from fp32, so cached predictions are keyed separately
+    variant = "int8"
+
+    def __init__(self, model_path, device, timer=None):
+        timer = timer or StartupTimer()
+        path = os.path.join(model_path, QUANTIZED_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No quantized artifact at {path}; run quantize_model.py")
+        if device.type != "cpu":
+            raise ValueError("The quantized backend only runs on CPU")
+        with timer.phase("imports"):
+            from transformers import AutoConfig, AutoModelForSequenceClassification
+        with timer.phase("weights"):
+            model = AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_path))
+            self.model = quantize_linear_layers(model.eval())
+            self.model.load_state_dict(torch.load(path, map_location="cpu"))
+            self.model.eval()
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    TorchScriptBackend.name: TorchScriptBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+}
+
+def load_backend(name, model_path, device, timer=None):
+    """Instantiate backend `name`, recording its startup phases on `timer` (a startup.StartupTimer)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}")
+    logger.info(f"Using {name} backend")
+    return BACKENDS[name](model_path, device, timer=timer)
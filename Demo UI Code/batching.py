@@ -0,0 +1,119 @@
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot accept more work."""
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class MicroBatchScheduler:
+    """Merge concurrent predict requests into shared model batches.
+
+    A single worker thread drains the queue and flushes a batch once it holds
+    max_batch_size statements or the oldest request has waited max_wait_ms.
+    """
+
+    def __init__(self, predict_batch_fn, max_batch_size=32, max_wait_ms=5, max_queue_size=256):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._rejected = 0
+        self._thread = threading.Thread(target=self._run, name="microbatch-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """Queue a list of statements and return a Future resolving to their predictions."""
+        request = _Request(list(texts))
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError(f"Prediction queue is full ({self._queue.maxsize} requests)")
+        return request.future
+
+    def predict(self, texts, timeout=None):
+        return self.submit(texts).result(timeout=timeout)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_size": self._queue.maxsize,
+                "rejected": self._rejected,
+                "batches": sum(self._batch_sizes.values()),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {
+                    "mean": 1000 * self._wait_total / self._wait_count if self._wait_count else 0.0,
+                    "max": 1000 * self._wait_max,
+                },
+            }
+
+    def _next_request(self, timeout=None):
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._next_request()]
+        size = len(batch[0].texts)
+        deadline = batch[0].enqueued_at + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._next_request(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(request.texts) > self.max_batch_size:
+                # Keep the overflow request for the next batch rather than splitting it
+                self._pending = request
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            started = time.perf_counter()
+            with self._lock:
+                self._batch_sizes[size] += 1
+                for request in batch:
+                    wait = started - request.enqueued_at
+                    self._wait_count += 1
+                    self._wait_total += wait
+                    self._wait_max = max(self._wait_max, wait)
+            try:
+                predictions = self.predict_batch_fn([text for request in batch for text in request.texts])
+            except Exception as e:
+                logger.error(f"Batch prediction failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            offset = 0
+            for request in batch:
+                request.future.set_result(predictions[offset:offset + len(request.texts)])
+                offset += len(request.texts)
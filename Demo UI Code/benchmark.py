@@ -0,0 +1,66 @@
+import argparse
+import logging
+import time
+
+import torch
+
+from data_processing import load_and_clean_data
+from inference import TruthSeekerInference
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+
+def load_statements(data_path, num_statements):
+    df = load_and_clean_data(data_path)
+    if df is None or df.empty:
+        raise ValueError(f"No statements loaded from {data_path}")
+    statements = df['statement'].tolist()
+    # Repeat the split if it is shorter than the requested sample
+    while len(statements) < num_statements:
+        statements += statements
+    return statements[:num_statements]
+
+def benchmark_batch_sizes(inference, statements, batch_sizes, warmup=8):
+    inference.predict_batch(statements[:warmup], batch_size=warmup)
+    results = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        inference.predict_batch(statements, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        results[batch_size] = len(statements) / elapsed
+    return results
+
+def benchmark_per_statement(inference, statements):
+    logging.getLogger("inference").setLevel(logging.WARNING)
+    start = time.perf_counter()
+    for statement in statements:
+        inference.predict(statement)
+    return len(statements) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TruthSeekerInference throughput on CPU")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--data-path", default="../Fine-Tuning Data/fake_news_data/LIAR_DATASET/test.tsv")
+    parser.add_argument("--num-statements", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's choice)")
+    parser.add_argument("--backends", nargs="+", default=["torch"], help="torch, onnxruntime and/or torchscript")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    statements = load_statements(args.data_path, args.num_statements)
+    print(f"Benchmarking {len(statements)} statements on CPU ({torch.get_num_threads()} threads)")
+
+    for backend in args.backends:
+        inference = TruthSeekerInference(args.model_path, device="cpu", backend=backend)
+        print(f"--- {backend} ---")
+        per_call = benchmark_per_statement(inference, statements)
+        print(f"{'per-call predict()':>20}: {per_call:8.1f} statements/sec ({1000 / per_call:.2f} ms latency)")
+        for batch_size, throughput in benchmark_batch_sizes(inference, statements, args.batch_sizes).items():
+            print(f"{f'batch_size={batch_size}':>20}: {throughput:8.1f} statements/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from startup import STARTUP_PHASES
+
+STATEMENT = "The Eiffel Tower is located in Berlin."
+
+def baseline_child(model_path):
+    """The loading path before startup.py: eager top-level imports, auto classes, from_pretrained."""
+    start = time.perf_counter()
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    import torch
+    phases = {"imports": time.perf_counter() - start}
+    mark = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    phases["tokenizer"] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    phases["weights"] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    model.to("cpu")
+    model.eval()
+    phases["device transfer"] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    with torch.inference_mode():
+        torch.softmax(model(**tokenizer([STATEMENT], return_tensors="pt")).logits, dim=-1).tolist()
+    phases["first prediction"] = time.perf_counter() - mark
+    return phases, time.perf_counter() - start
+
+def fast_child(model_path, backend, warm_up):
+    start = time.perf_counter()
+    from inference import TruthSeekerInference
+    inference = TruthSeekerInference(model_path, device="cpu", backend=backend, warm_up=warm_up)
+    phases = inference.startup.report()
+    phases.pop("total")
+    mark = time.perf_counter()
+    inference.predict_batch([STATEMENT])
+    phases["first prediction"] = time.perf_counter() - mark
+    return phases, time.perf_counter() - start
+
+def run_child(args, mode, backend=None, warm_up=False):
+    """(phases, in-process time to first prediction, wall time including interpreter startup) of a fresh process."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--model-path", args.model_path]
+    if backend:
+        command += ["--backend", backend]
+    if warm_up:
+        command.append("--warm-up")
+    start = time.perf_counter()
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    wall = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["phases"], result["time_to_first_prediction"], wall
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start to first prediction: previous loading path vs startup.py")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh processes per configuration (median reported)")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--warm-up", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child == "baseline":
+            phases, elapsed = baseline_child(args.model_path)
+        else:
+            phases, elapsed = fast_child(args.model_path, args.backend, args.warm_up)
+        print(json.dumps({"phases": phases, "time_to_first_prediction": elapsed}))
+        return
+
+    configurations = [("previous (auto classes, eager imports)", "baseline", None, False),
+                      ("startup.py, torch backend", "fast", "torch", False),
+                      ("startup.py, torch backend + warm-up", "fast", "torch", True)]
+    if os.path.exists(os.path.join(args.model_path, "model.pt")):
+        configurations.append(("startup.py, torchscript backend", "fast", "torchscript", False))
+    columns = list(STARTUP_PHASES) + ["first prediction"]
+    print(f"{args.model_path}, median of {args.repeats} fresh processes (seconds)")
+    print(f"{'configuration':>40} | " + " | ".join(f"{c:>8.8}" for c in columns) + " | to 1st pred | process wall")
+    for label, mode, backend, warm_up in configurations:
+        runs = [run_child(args, mode, backend, warm_up) for _ in range(args.repeats)]
+        medians = {c: statistics.median(r[0].get(c, 0.0) for r in runs) for c in columns}
+        first = statistics.median(r[1] for r in runs)
+        wall = statistics.median(r[2] for r in runs)
+        print(f"{label:>40} | " + " | ".join(f"{medians[c]:>8.2f}" for c in columns) +
+              f" | {first:>11.2f} | {wall:>12.2f}")
+
+if __name__ == "__main__":
+    main()
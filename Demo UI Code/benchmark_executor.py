@@ -0,0 +1,136 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+from batching import QueueFullError
+from inference_executor import DeadlineExceededError, InferenceExecutor
+from load_test import SAMPLE_STATEMENTS, percentile
+from startup import StartupTimer, load_classifier, load_tokenizer
+
+logging.basicConfig(level=logging.WARNING)
+
+class ModelCall:
+    """app.py's per-statement model call, counting how many run at the same time."""
+
+    def __init__(self, model_path):
+        import torch
+
+        self.torch = torch
+        timer = StartupTimer()
+        self.tokenizer = load_tokenizer(model_path, timer)
+        self.model = load_classifier(model_path, timer)
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+            with self.torch.no_grad():
+                return self.torch.softmax(self.model(**inputs).logits, dim=1)[0].tolist()
+        finally:
+            with self._lock:
+                self.running -= 1
+
+def thread_per_request(fn, timeout):
+    """The wrapper app.py used before: a new thread per call, abandoned (still running) on timeout."""
+    def call(text):
+        result = [None]
+        thread = threading.Thread(target=lambda: result.__setitem__(0, fn(text)), daemon=True)
+        thread.start()
+        thread.join(timeout=timeout)
+        if result[0] is None:
+            raise DeadlineExceededError("thread still running")
+        return result[0]
+    return call
+
+def open_loop(call, rate, duration):
+    """Fire one client per arrival at `rate` per second for `duration` seconds.
+
+    Returns (latency, outcome) per request and the seconds the arrivals actually took:
+    arrivals share the GIL with the model threads, so under the old wrapper they fall behind.
+    """
+    results, lock, clients = [], threading.Lock(), []
+
+    def client(text):
+        start = time.perf_counter()
+        try:
+            call(text)
+            outcome = "ok"
+        except DeadlineExceededError:
+            outcome = "timed out"
+        except QueueFullError:
+            outcome = "rejected"
+        with lock:
+            results.append((time.perf_counter() - start, outcome))
+
+    start = time.perf_counter()
+    for i in range(int(rate * duration)):
+        time.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        clients.append(threading.Thread(target=client, args=(f"{SAMPLE_STATEMENTS[i % len(SAMPLE_STATEMENTS)]} #{i}",)))
+        clients[-1].start()
+    arrivals = time.perf_counter() - start
+    for thread in clients:
+        thread.join()
+    return results, arrivals, start + arrivals
+
+def wait_for_idle(fn, since, timeout=600):
+    """Seconds from `since` until no model call is running any more (abandoned threads included)."""
+    deadline = time.perf_counter() + timeout
+    while fn.running and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    return time.perf_counter() - since
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of app.py's model calls at 1x and 10x load: "
+                                                 "thread per request vs the bounded InferenceExecutor")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of offered load per run")
+    parser.add_argument("--loads", default="1,10", help="offered load as multiples of the measured capacity")
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-request deadline (app.py uses 10s)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-queue-size", type=int, default=8)
+    args = parser.parse_args()
+
+    fn = ModelCall(args.model_path)
+    for text in SAMPLE_STATEMENTS:  # warm-up
+        fn(text)
+    start = time.perf_counter()
+    for i in range(20):
+        fn(f"{SAMPLE_STATEMENTS[i % len(SAMPLE_STATEMENTS)]} #{i}")
+    service = (time.perf_counter() - start) / 20
+    print(f"{1000 * service:.1f} ms per model call, so capacity ~{1 / service:.1f} req/s; "
+          f"{args.duration:.0f}s per run, {args.timeout:.1f}s deadline")
+    print(f"{'strategy':>18} | {'load':>4} | {'offered/s':>9} | {'ok':>5} | {'ok p50 ms':>9} | {'ok p99 ms':>9} | "
+          f"{'all p99 ms':>10} | {'timed out':>9} | {'rejected':>8} | {'peak model calls':>16} | "
+          f"{'busy after last arrival s':>26}")
+    for load in map(float, args.loads.split(",")):
+        rate = load / service
+        for strategy in ("thread per request", "bounded executor"):
+            fn.peak = 0
+            executor = None
+            if strategy == "bounded executor":
+                executor = InferenceExecutor(args.workers, args.max_queue_size, args.timeout, name="benchmark")
+                call = lambda text: executor.run(fn, text)  # noqa: E731
+            else:
+                call = thread_per_request(fn, args.timeout)
+            results, arrivals, last_arrival = open_loop(call, rate, args.duration)
+            drain = wait_for_idle(fn, last_arrival)
+            if executor:
+                executor.shutdown()
+            ok = [latency for latency, outcome in results if outcome == "ok"]
+            every = [latency for latency, _ in results]
+            count = lambda name: sum(outcome == name for _, outcome in results)  # noqa: E731
+            print(f"{strategy:>18} | {load:>3.0f}x | {len(results) / arrivals:>9.1f} | {len(ok):>5} | "
+                  f"{1000 * statistics.median(ok) if ok else float('nan'):>9.0f} | "
+                  f"{1000 * percentile(ok, 99) if ok else float('nan'):>9.0f} | "
+                  f"{1000 * percentile(every, 99):>10.0f} | "
+                  f"{count('timed out'):>9} | {count('rejected'):>8} | {fn.peak:>16} | {drain:>26.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+from inference import AGGREGATIONS, TruthSeekerInference
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data-Generation"))
+from New_Articles_Generation import format_article_text, generate_articles  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_articles(path, num_articles, seed):
+    """Article texts from a New_Articles_Generation.py output file, or freshly generated ones."""
+    if path:
+        df = pd.read_parquet(path) if path.endswith(".parquet") else (
+            pd.read_json(path, lines=True) if path.endswith(".jsonl") else pd.read_csv(path))
+        records = df.head(num_articles).to_dict("records")
+    else:
+        records = [article for _, article in generate_articles(num_articles, seed=seed)]
+    return [format_article_text(article) for article in records]
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of long-document scoring on 500-1000 word articles")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--articles", default=None,
+                        help="Parquet/JSONL/CSV written by New_Articles_Generation.py (default: generate them)")
+    parser.add_argument("--num-articles", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--stride", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+
+    articles = load_articles(args.articles, args.num_articles, args.seed)
+    inference = TruthSeekerInference(args.model_path, backend=args.backend)
+    logging.getLogger("inference").setLevel(logging.WARNING)
+    words = sum(len(a.split()) for a in articles) / len(articles)
+    windows = len(inference.tokenizer(articles, truncation=True, max_length=inference.max_length, stride=args.stride,
+                                      return_overflowing_tokens=True)["input_ids"])
+    print(f"{len(articles)} articles, {words:.0f} words on average, {windows} windows of {inference.max_length} tokens")
+    inference.predict_long(articles[:2], batch_size=args.batch_size)  # warm-up
+
+    start = time.perf_counter()
+    inference._predict_uncached(articles, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{'truncated (predict_batch)':>32}: {len(articles) / elapsed:7.1f} articles/sec, "
+          f"{len(articles) / elapsed:7.1f} windows/sec  (only the first {inference.max_length} tokens are read)")
+
+    start = time.perf_counter()
+    for article in articles:
+        inference.predict_long([article], batch_size=args.batch_size, stride=args.stride)
+    elapsed = time.perf_counter() - start
+    print(f"{'long, one document at a time':>32}: {len(articles) / elapsed:7.1f} articles/sec, "
+          f"{windows / elapsed:7.1f} windows/sec")
+
+    for aggregation in AGGREGATIONS:
+        start = time.perf_counter()
+        results = inference.predict_long(articles, batch_size=args.batch_size, aggregation=aggregation,
+                                         stride=args.stride)
+        elapsed = time.perf_counter() - start
+        labels = pd.Series([r["label"] for r in results]).value_counts().to_dict()
+        print(f"{f'long, batched ({aggregation})':>32}: {len(articles) / elapsed:7.1f} articles/sec, "
+              f"{windows / elapsed:7.1f} windows/sec  labels {labels}")
+
+if __name__ == "__main__":
+    main()
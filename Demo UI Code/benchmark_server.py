@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import psutil
+
+from load_test import http_caller, percentile, run_load
+
+SERVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py")
+
+def wait_until_ready(base_url, workers, timeout=180):
+    """Poll /readyz until every worker process has answered ready."""
+    ready, deadline = set(), time.time() + timeout
+    while len(ready) < workers:
+        if time.time() > deadline:
+            raise TimeoutError(f"only {len(ready)} of {workers} workers became ready")
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=5) as response:
+                ready.add(json.load(response)["pid"])
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+
+def memory_mb(server):
+    """(total RSS, total PSS, mean worker USS) in MB across the gunicorn master and its workers."""
+    procs = [server] + server.children(recursive=True)
+    infos = [p.memory_full_info() for p in procs]
+    workers = infos[1:] or infos
+    return (sum(i.rss for i in infos) / 1e6, sum(i.pss for i in infos) / 1e6,
+            sum(i.uss for i in workers) / len(workers) / 1e6)
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and memory of serve.py from 1 to N worker processes")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="default: 1, 2, 4, ... up to the cores")
+    parser.add_argument("--threads", type=int, default=4, help="request threads per worker")
+    parser.add_argument("--clients-per-worker", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--port", type=int, default=8199)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{cores} cores; each worker gets cores / workers intra-op threads")
+    print(f"{'workers':>7} | {'req/s':>7} | {'p50 ms':>7} | {'p99 ms':>7} | {'errors':>6} | "
+          f"{'RSS MB':>7} | {'PSS MB':>7} | {'USS/worker MB':>13}")
+    for workers in worker_counts:
+        env = dict(os.environ, TRUTHSEEKER_MODEL_PATH=args.model_path, TRUTHSEEKER_MICROBATCH="1")
+        process = subprocess.Popen([sys.executable, SERVE_PATH, "--bind", f"127.0.0.1:{args.port}",
+                                    "--workers", str(workers), "--threads", str(args.threads)],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(base_url, workers)
+            # Distinct statements, so the shared prediction cache does not answer for the model
+            counter = iter(range(10 ** 9))
+            call = http_caller(f"{base_url}/analyze")
+            latencies, errors, elapsed = run_load(lambda text: call(f"{text} #{next(counter)}"),
+                                                  workers * args.clients_per_worker, args.requests)
+            rss, pss, uss = memory_mb(psutil.Process(process.pid))
+            print(f"{workers:>7} | {len(latencies) / elapsed:>7.1f} | "
+                  f"{1000 * percentile(latencies, 50):>7.1f} | {1000 * percentile(latencies, 99):>7.1f} | "
+                  f"{len(errors):>6} | {rss:>7.0f} | {pss:>7.0f} | {uss:>13.0f}")
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+    print("RSS counts shared pages once per process; PSS splits them, so it is the real total footprint.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import inspect
+import logging
+import os
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from backends import MODEL_INPUTS, ONNX_FILE, TORCHSCRIPT_FILE, load_backend
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARITY_STATEMENTS = [
+    "The sky is blue.",
+    "The Earth is flat.",
+    "Says the unemployment rate for young people has doubled over the last four years.",
+    "Water boils at 100 degrees Celsius at sea level, but at lower temperatures at altitude.",
+]
+
+class LogitsWrapper(torch.nn.Module):
+    """Positional-argument wrapper so tracing and ONNX export see plain tensors in and logits out."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+def example_inputs(tokenizer):
+    encoded = tokenizer(PARITY_STATEMENTS[:2], padding=True, return_tensors="pt")
+    input_ids = encoded["input_ids"]
+    token_type_ids = encoded.get("token_type_ids", torch.zeros_like(input_ids))
+    return input_ids, encoded["attention_mask"], token_type_ids
+
+def export_onnx(wrapper, inputs, output_path, opset=17):
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in MODEL_INPUTS}
+    dynamic_axes["logits"] = {0: "batch"}
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # the TorchScript-based exporter handles BERT's dynamic axes without extra deps
+    torch.onnx.export(
+        wrapper, inputs, output_path,
+        input_names=list(MODEL_INPUTS), output_names=["logits"],
+        dynamic_axes=dynamic_axes, opset_version=opset, do_constant_folding=True, **kwargs,
+    )
+    logger.info(f"Wrote ONNX graph to {output_path}")
+
+def export_torchscript(wrapper, inputs, output_path):
+    traced = torch.jit.trace(wrapper, inputs, strict=False)
+    traced = torch.jit.freeze(traced.eval())
+    traced.save(output_path)
+    logger.info(f"Wrote TorchScript module to {output_path}")
+
+def check_parity(model_path, backend, atol=1e-3):
+    """Compare a backend's logits and labels against eager PyTorch on PARITY_STATEMENTS."""
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    device = torch.device("cpu")
+    eager = load_backend("torch", model_path, device)
+    candidate = load_backend(backend, model_path, device)
+    # Different padded lengths exercise the dynamic sequence axis
+    for statements in (PARITY_STATEMENTS, PARITY_STATEMENTS[:1]):
+        batch = dict(tokenizer(statements, padding=True, return_tensors="pt"))
+        with torch.inference_mode():
+            expected = eager(batch).float()
+            actual = candidate(batch).float()
+        max_diff = (expected - actual).abs().max().item()
+        labels_match = torch.equal(expected.argmax(dim=-1), actual.argmax(dim=-1))
+        if max_diff > atol or not labels_match:
+            raise AssertionError(f"{backend} diverges from eager: max |Δlogit| = {max_diff:.2e}, labels match = {labels_match}")
+        logger.info(f"{backend} parity OK on {len(statements)} statements (max |Δlogit| = {max_diff:.2e})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the fine-tuned classifier for CPU serving backends")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--format", choices=["onnx", "torchscript", "all"], default="all")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--skip-verify", action="store_true", help="skip the parity check against eager mode")
+    parser.add_argument("--atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model_path)
+    model.eval()
+    wrapper = LogitsWrapper(model).eval()
+    inputs = example_inputs(tokenizer)
+
+    exported = []
+    with torch.no_grad():
+        if args.format in ("onnx", "all"):
+            export_onnx(wrapper, inputs, os.path.join(args.model_path, ONNX_FILE), args.opset)
+            exported.append("onnxruntime")
+        if args.format in ("torchscript", "all"):
+            export_torchscript(wrapper, inputs, os.path.join(args.model_path, TORCHSCRIPT_FILE))
+            exported.append("torchscript")
+
+    if not args.skip_verify:
+        for backend in exported:
+            check_parity(args.model_path, backend, args.atol)
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,172 @@
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-import torch
 import logging
+import os
+
+from prediction_cache import PredictionCache, model_fingerprint, normalize_text
+from startup import StartupTimer, load_tokenizer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+LABEL_MAP = {-1: "False", 0: "Mixed", 1: "True"}
+LONG_DOCUMENT_STRIDE = 128  # tokens shared by consecutive windows in predict_long
+AGGREGATIONS = ("mean", "min", "confidence")
+WARM_UP_LENGTHS = (8, 32, 128)  # words per warm-up statement
+
 class TruthSeekerInference:
-    def __init__(self, model_path):
+    def __init__(self, model_path, device=None, max_length=512, cache_path=None, backend=None, warm_up=False,
+                 tokenizer=None):
         logger.info(f"Loading model from {model_path}")
+        # Per-phase startup timing (imports, tokenizer, weights, device transfer, warm-up); see startup.py
+        self.startup = StartupTimer()
+        with self.startup.phase("imports"):
+            import torch
+            from backends import load_backend
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+            # A tokenizer passed in is shared with other models of the same vocabulary (see model_pool.py)
+            self.tokenizer = tokenizer or load_tokenizer(model_path, self.startup)
+            # torch (eager), onnxruntime, torchscript or quantized; see export_model.py and quantize_model.py
+            self.backend = load_backend(backend or os.getenv("TRUTHSEEKER_BACKEND", "torch"), model_path, self.device,
+                                        timer=self.startup)
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
-        logger.info(f"Model loaded on {self.device}")
+        self.model = getattr(self.backend, "model", None)
+        self.max_length = max_length
+        self.model_path = model_path
+        # Loading a checkpoint yields a new fingerprint, which invalidates older cached predictions
+        self.fingerprint = model_fingerprint(model_path, max_length, LABEL_MAP, getattr(self.backend, "variant", None))
+        self.cache = PredictionCache(self.fingerprint, cache_path) if cache_path else None
+        if warm_up:
+            self.warm_up()
+        logger.info(f"Model loaded on {self.device} ({self.backend.name} backend): {self.startup.summary()}")
+
+    def warm_up(self, lengths=WARM_UP_LENGTHS, runs=2, batch_size=None):
+        """Throwaway predictions at a few input lengths, bypassing the prediction cache.
+
+        Pays the one-time costs (allocator growth, oneDNN primitive creation, TorchScript's
+        profiling runs, cuDNN autotuning) before the process reports ready, instead of on
+        the first requests. batch_size adds one full batch mixing those lengths, the shape
+        a busy server runs. Returns the startup report.
+        """
+        texts = [" ".join(["warm-up"] * n) for n in lengths]
+        with self.startup.phase("warm-up"):
+            for _ in range(runs):
+                for text in texts:
+                    self._predict_uncached([text], 1)
+            if batch_size:
+                self._predict_uncached([texts[i % len(texts)] for i in range(batch_size)], batch_size)
+        return self.startup.report()
 
     def predict(self, text):
         logger.info(f"Predicting: {text}")
+        return self.predict_batch([text])[0]["label"]
+
+    def predict_batch(self, texts, batch_size=32):
+        """Score a list of statements, returning the label and softmax distribution for each."""
+        texts = [str(t) for t in texts]
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._predict_uncached(texts, batch_size)
+        results = self.cache.get_many(texts)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            # Score each distinct miss once even if it repeats within the request
+            unique = list(dict.fromkeys(normalize_text(texts[i]) for i in missing))
+            scored = dict(zip(unique, self._predict_uncached(unique, batch_size)))
+            self.cache.put_many(unique, [scored[t] for t in unique])
+            for i in missing:
+                results[i] = scored[normalize_text(texts[i])]
+        return results
+
+    def _predict_uncached(self, texts, batch_size):
         try:
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                prediction = torch.argmax(outputs.logits, dim=1).item() - 1  # Shift [0,1,2] to [-1,0,1]
-                label_map = {-1: "False", 0: "Mixed", 1: "True"}
-                return label_map[prediction]
+            encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+            return [prediction_result(row) for row in self._score_encodings(encodings, batch_size)]
         except Exception as e:
             logger.error(f"Prediction error: {e}")
             raise
 
+    def _score_encodings(self, encodings, batch_size):
+        """Softmax distributions for already tokenized (unpadded) sequences, in input order."""
+        import torch
+
+        # Sort by length so each chunk pads only to its own longest input
+        order = sorted(range(len(encodings["input_ids"])), key=lambda i: len(encodings["input_ids"][i]))
+        rows = [None] * len(order)
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                batch = self.tokenizer.pad({k: [v[i] for i in chunk] for k, v in encodings.items()}, return_tensors="pt")
+                batch = {k: v.to(self.device) for k, v in batch.items()}
+                probs = torch.softmax(self.backend(batch).float(), dim=-1).cpu()
+                for i, row in zip(chunk, probs.tolist()):
+                    rows[i] = row
+        return rows
+
+    def predict_long(self, texts, batch_size=32, aggregation="mean", stride=LONG_DOCUMENT_STRIDE):
+        """Score documents longer than max_length from overlapping token windows.
+
+        Each document is split into windows of max_length tokens, consecutive
+        windows sharing `stride` tokens. The windows of all documents are scored
+        together in length-sorted batches, then combined per document by
+        `aggregation`: "mean" averages the window distributions, "confidence"
+        weights them by each window's confidence, and "min" takes the window with
+        the lowest truth score. Results carry the per-window scores under "chunks",
+        with character offsets into the document.
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"aggregation must be one of {AGGREGATIONS}, got {aggregation!r}")
+        if not self.tokenizer.is_fast:
+            raise ValueError("predict_long needs a fast tokenizer for overflowing windows")
+        texts = [str(t) for t in texts]
+        if not texts:
+            return []
+        # Overlap at most half a window, so every window still advances through the text
+        stride = min(stride, (self.max_length - self.tokenizer.num_special_tokens_to_add()) // 2)
+        try:
+            encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length, stride=stride,
+                                       return_overflowing_tokens=True, return_offsets_mapping=True)
+            owners = encodings.pop("overflow_to_sample_mapping")
+            offsets = encodings.pop("offset_mapping")
+            rows = self._score_encodings(encodings, batch_size)
+        except Exception as e:
+            logger.error(f"Prediction error: {e}")
+            raise
+        chunks = [[] for _ in texts]
+        for owner, row, window in zip(owners, rows, offsets):
+            spans = [(s, e) for s, e in window if e > s]  # special tokens map to (0, 0)
+            chunk = prediction_result(row)
+            chunk.update(start_char=spans[0][0] if spans else 0, end_char=spans[-1][1] if spans else 0)
+            chunks[owner].append((row, chunk))
+        return [aggregate_chunks(doc_chunks, aggregation) for doc_chunks in chunks]
+
+def prediction_result(row):
+    """label / confidence / probabilities for a softmax row over LABEL_MAP's classes."""
+    prediction = max(range(len(row)), key=row.__getitem__) - 1  # Shift [0,1,2] to [-1,0,1]
+    return {
+        "label": LABEL_MAP[prediction],
+        "confidence": row[prediction + 1],
+        "probabilities": {LABEL_MAP[j - 1]: p for j, p in enumerate(row)},
+    }
+
+def truth_score(probabilities):
+    """Expected truthfulness in [0, 1]: P(True) plus half of P(Mixed)."""
+    return probabilities.get("True", 0.0) + 0.5 * probabilities.get("Mixed", 0.0)
+
+def aggregate_chunks(chunks, aggregation):
+    """Combine (softmax row, chunk result) pairs of one document into its article-level result."""
+    rows = [row for row, _ in chunks]
+    if aggregation == "min":
+        combined = min(rows, key=lambda row: truth_score(prediction_result(row)["probabilities"]))
+    else:
+        weights = [max(row) if aggregation == "confidence" else 1.0 for row in rows]
+        combined = [sum(w * row[j] for w, row in zip(weights, rows)) / sum(weights) for j in range(len(rows[0]))]
+    result = prediction_result(combined)
+    result.update(aggregation=aggregation, chunks=[chunk for _, chunk in chunks])
+    return result
+
 # Add to bottom of src/inference.py if not there
 if __name__ == "__main__":
     model_path = "models/finetuned"  # Relative path for portability
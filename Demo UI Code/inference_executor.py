@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from batching import QueueFullError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a job's deadline passes before it could start or before its result arrived."""
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "enqueued_at", "deadline", "timed_out")
+
+    def __init__(self, fn, args, kwargs, timeout):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.deadline = self.enqueued_at + timeout
+        self.timed_out = False
+
+class InferenceExecutor:
+    """A fixed number of worker threads running model calls from a bounded admission queue.
+
+    submit() rejects work with QueueFullError once max_queue_size jobs are waiting, so
+    overload turns into fast "busy" answers instead of an ever-growing backlog. Every
+    job carries a deadline; a worker checks it right before starting the job and fails
+    it with DeadlineExceededError rather than running work whose caller has given up.
+    Cancelling a queued job's future (run() does this on timeout) removes it from the
+    queue. A job that has already started cannot be interrupted, so at most `workers`
+    abandoned jobs ever compete for the CPU.
+    """
+
+    def __init__(self, workers=1, max_queue_size=16, default_timeout=10.0, name="inference"):
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.default_timeout = default_timeout
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._counts = dict.fromkeys(("submitted", "completed", "failed", "timed_out", "rejected", "cancelled"), 0)
+        self._shutdown = False
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        """Queue fn(*args, **kwargs) and return its Future; the job must start within `timeout` seconds."""
+        return self._submit(fn, args, kwargs, timeout).future
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """submit() and wait for the result until the job's deadline, cancelling it if the deadline passes."""
+        job = self._submit(fn, args, kwargs, timeout)
+        try:
+            return job.future.result(timeout=job.deadline - time.perf_counter())
+        except FutureTimeoutError:
+            with self._condition:
+                self._mark_timed_out(job)
+            job.future.cancel()  # drops it from the queue; a job that already started runs to completion
+            raise DeadlineExceededError(f"No result within {job.deadline - job.enqueued_at:.2f}s") from None
+
+    def metrics(self):
+        with self._condition:
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "max_queue_size": self.max_queue_size,
+                **self._counts,
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting work, cancel everything still queued and let the workers exit."""
+        with self._condition:
+            self._shutdown = True
+            pending = list(self._queue)
+            self._condition.notify_all()
+        for job in pending:
+            job.future.cancel()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _submit(self, fn, args, kwargs, timeout):
+        job = _Job(fn, args, kwargs, self.default_timeout if timeout is None else timeout)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("InferenceExecutor has been shut down")
+            if len(self._queue) >= self.max_queue_size:
+                self._counts["rejected"] += 1
+                raise QueueFullError(f"Inference queue is full ({self.max_queue_size} requests)")
+            self._queue.append(job)
+            self._counts["submitted"] += 1
+            self._condition.notify()
+        job.future.add_done_callback(lambda future: self._discard(job) if future.cancelled() else None)
+        return job
+
+    def _mark_timed_out(self, job):
+        # Caller and worker may both notice the same expired job; count it once
+        if not job.timed_out:
+            job.timed_out = True
+            self._counts["timed_out"] += 1
+
+    def _discard(self, job):
+        with self._condition:
+            try:
+                self._queue.remove(job)
+            except ValueError:
+                return  # a worker already took it
+            if not job.timed_out:
+                self._counts["cancelled"] += 1
+
+    def _next_job(self):
+        """(job, expired) for the next job that was not cancelled, or (None, False) on shutdown."""
+        with self._condition:
+            while True:
+                while not self._queue:
+                    if self._shutdown:
+                        return None, False
+                    self._condition.wait()
+                job = self._queue.popleft()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                if time.perf_counter() > job.deadline:
+                    self._mark_timed_out(job)
+                    return job, True
+                self._in_flight += 1
+                return job, False
+
+    def _run(self):
+        while True:
+            job, expired = self._next_job()
+            if job is None:
+                return
+            if expired:
+                waited = time.perf_counter() - job.enqueued_at
+                job.future.set_exception(DeadlineExceededError(f"Deadline passed after {waited:.1f}s in the queue"))
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                logger.error(f"Inference job failed: {e}")
+                outcome = "failed"
+                job.future.set_exception(e)
+            else:
+                outcome = "completed"
+                job.future.set_result(result)
+            with self._condition:
+                self._in_flight -= 1
+                self._counts[outcome] += 1
@@ -1,46 +1,22 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+from inference import TruthSeekerInference as CachedInference
+from prediction_cache import DEFAULT_CACHE_PATH
 import logging
 
 # Set up logging to see what’s happening
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class TruthSeekerInference:
-    def __init__(self, model_path):
-        """Load the trained model and tokenizer."""
-        logger.info(f"Loading model from {model_path}")
-        try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
-        except Exception as e:
-            logger.error(f"Error loading model: {e}")
-            raise
+class TruthSeekerInference(CachedInference):
+    def __init__(self, model_path, cache_path=DEFAULT_CACHE_PATH):
+        """Load the trained model and tokenizer, sharing the on-disk prediction cache."""
         # Use CPU for simplicity, change to "cuda" if you’ve got a GPU
-        self.device = torch.device("cpu")
-        self.model.to(self.device)
-        self.model.eval()
-        logger.info(f"Model loaded on {self.device}")
+        super().__init__(model_path, device="cpu", cache_path=cache_path)
 
     def predict(self, text):
         """Make a prediction on the input text."""
-        logger.info(f"Predicting: {text}")
         try:
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                prediction = torch.argmax(outputs.logits, dim=1).item() - 1  # Shift [0,1,2] to [-1,0,1]
-                label_map = {-1: "False", 0: "Mixed", 1: "True"}
-                return label_map[prediction]
+            return super().predict(text)
         except Exception as e:
-            logger.error(f"Prediction error: {e}")
             return f"Error: {str(e)}"
 
 def interact_with_model(model_path):
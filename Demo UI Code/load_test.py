@@ -0,0 +1,102 @@
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+logging.basicConfig(level=logging.WARNING)
+
+SAMPLE_STATEMENTS = [
+    "The Earth is flat.",
+    "Water boils at 100 degrees Celsius at sea level.",
+    "The moon is made of cheese.",
+    "Says the unemployment rate has doubled since the last election.",
+    "Vaccines cause more deaths than the diseases they prevent.",
+    "The Great Wall of China is visible from space with the naked eye.",
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_load(call, concurrency, requests_per_client):
+    """Run `concurrency` closed-loop clients and collect per-request latencies."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client(client_id):
+        for i in range(requests_per_client):
+            text = SAMPLE_STATEMENTS[(client_id + i) % len(SAMPLE_STATEMENTS)]
+            start = time.perf_counter()
+            try:
+                call(text)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+def report(name, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{name:>14}: all {len(errors)} requests failed")
+        return
+    print(f"{name:>14}: p50 {1000 * statistics.median(latencies):7.1f} ms | "
+          f"p99 {1000 * percentile(latencies, 99):7.1f} ms | "
+          f"{len(latencies) / elapsed:7.1f} req/s | {len(errors)} errors")
+
+def http_caller(url):
+    def call(text):
+        body = json.dumps({"text": text}).encode()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return json.load(response)
+    return call
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the /analyze prediction path")
+    parser.add_argument("--url", help="POST to a running api.py (e.g. http://localhost:8000/analyze) instead of in-process")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.url:
+        # Start api.py with TRUTHSEEKER_MICROBATCH=0 and =1 to compare both paths over HTTP
+        for concurrency in args.concurrency:
+            report(f"http c={concurrency}", *run_load(http_caller(args.url), concurrency, args.requests))
+        return
+
+    from batching import MicroBatchScheduler
+    from inference import TruthSeekerInference
+
+    inference = TruthSeekerInference(args.model_path, device="cpu")
+    logging.getLogger("inference").setLevel(logging.WARNING)
+    scheduler = MicroBatchScheduler(
+        inference.predict_batch,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue_size=max(args.concurrency) * 2,
+    )
+    for concurrency in args.concurrency:
+        print(f"--- concurrency {concurrency} ---")
+        report("per-request", *run_load(lambda t: inference.predict_batch([t]), concurrency, args.requests))
+        report("micro-batched", *run_load(lambda t: scheduler.predict([t]), concurrency, args.requests))
+    print(json.dumps(scheduler.metrics(), indent=2))
+
+if __name__ == "__main__":
+    main()
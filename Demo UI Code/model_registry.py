@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import fcntl
+import gc
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+from prediction_cache import model_fingerprint
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.getenv("TRUTHSEEKER_REGISTRY")  # None serves TRUTHSEEKER_MODEL_PATH without reloading
+POLL_SECONDS = float(os.getenv("TRUTHSEEKER_REGISTRY_POLL_S", "30"))
+MANIFEST_FILE = "registry.json"
+VERSION_FORMAT = "v{:04d}"
+
+class ModelRegistry:
+    """Versioned copies of model checkpoints under one directory, described by registry.json.
+
+    Each version is a full checkpoint directory (v0001/, v0002/, ...) that is never
+    modified after registration. The manifest records where every version came from,
+    its fingerprint and metrics, and which version is active; serving processes
+    follow "active". The manifest is rewritten atomically under a file lock.
+
+    The manifest fingerprint identifies the checkpoint files only. Cached
+    predictions are keyed on the loaded model's own fingerprint, which also
+    covers max_length, the label map and the backend; see ServingModel.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+
+    def read(self):
+        if not os.path.exists(self.manifest_path):
+            return {"active": None, "versions": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @contextlib.contextmanager
+    def _update(self):
+        """Yield the manifest for editing under an exclusive lock, then write it back atomically."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self.read()
+            yield manifest
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    def versions(self):
+        return self.read()["versions"]
+
+    def active_version(self):
+        return self.read()["active"]
+
+    def path(self, version):
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version {version!r} in {self.root}")
+        return os.path.join(self.root, version)
+
+    def resolve(self, version=None):
+        """(version, path) of `version`, or of the active version when None."""
+        version = version or self.active_version()
+        if version is None:
+            raise LookupError(f"No active model version in {self.root}")
+        return version, self.path(version)
+
+    def register(self, source, metrics=None, activate=False, note=None):
+        """Copy the checkpoint directory `source` in as the next version and return its name."""
+        if not os.path.exists(os.path.join(source, "config.json")):
+            raise ValueError(f"{source} is not a model checkpoint (no config.json)")
+        with self._update() as manifest:
+            numbers = [int(m.group(1)) for m in map(re.compile(r"v(\d+)$").match, manifest["versions"]) if m]
+            version = VERSION_FORMAT.format(max(numbers, default=0) + 1)
+            tmp_dir = os.path.join(self.root, f".{version}.tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.copytree(source, tmp_dir)
+            os.replace(tmp_dir, os.path.join(self.root, version))
+            manifest["versions"][version] = {
+                "source": os.path.abspath(source),
+                "registered_at": time.time(),
+                "fingerprint": model_fingerprint(os.path.join(self.root, version), None, None),
+                "metrics": metrics if metrics is not None else trainer_metrics(source),
+                "note": note,
+            }
+            if activate or manifest["active"] is None:
+                manifest["active"] = version
+        logger.info(f"Registered {source} as {version}{' (active)' if manifest['active'] == version else ''}")
+        return version
+
+    def activate(self, version):
+        """Point serving processes at `version`; also how a rollout is rolled back."""
+        with self._update() as manifest:
+            if version not in manifest["versions"]:
+                raise KeyError(f"Unknown model version {version!r} in {self.root}")
+            manifest["active"] = version
+        logger.info(f"Activated {version}")
+
+def trainer_metrics(checkpoint):
+    """The last evaluation metrics in a Trainer checkpoint's trainer_state.json, or {}."""
+    path = os.path.join(checkpoint, "trainer_state.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        history = json.load(f).get("log_history", [])
+    evals = [entry for entry in history if any(key.startswith("eval_") for key in entry)]
+    return evals[-1] if evals else {}
+
+def latest_checkpoint(checkpoints_dir):
+    """The highest checkpoint-N directory, as the notebook's get_latest_checkpoint picks it."""
+    checkpoints = [d for d in os.listdir(checkpoints_dir)
+                   if re.fullmatch(r"checkpoint-\d+", d) and os.path.isdir(os.path.join(checkpoints_dir, d))]
+    if not checkpoints:
+        raise FileNotFoundError(f"No checkpoints found in {checkpoints_dir}")
+    return os.path.join(checkpoints_dir, max(checkpoints, key=lambda d: int(d.split("-")[1])))
+
+class ServingModel:
+    """One loaded model version; requests hold it through HotReloader.acquire() while they use it.
+
+    `version` is the registry's name for it (v0001, ...), or for a path served
+    outside a registry the model's prediction-cache fingerprint. `fingerprint` is
+    always the key PredictionCache uses for the loaded model (None if the model
+    has none), so responses and cache rows can be matched through it.
+    """
+
+    def __init__(self, version, path, model):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.fingerprint = getattr(model, "fingerprint", None)
+        self.loaded_at = time.time()
+        self.users = 0
+        self.retired = False
+
+class HotReloader:
+    """Serve one model version at a time and switch to a new one without a restart.
+
+    reload() loads the new version on a background thread with load_fn(path), warms
+    it up with warm_up_fn(model) and then swaps it in under a lock, so new requests
+    see it immediately. Requests that acquired the previous version keep using it
+    until they finish; the last one to release it frees it (close_fn, then the
+    reference is dropped). Until then both versions are resident. A version that
+    fails to load or warm up is logged and the current one stays active.
+    watch() polls the registry's active version, so every worker process follows
+    `model_registry.py activate` on its own.
+    """
+
+    def __init__(self, load_fn, registry=None, warm_up_fn=None, close_fn=None, poll_interval=POLL_SECONDS):
+        self.load_fn = load_fn
+        self.registry = registry
+        self.warm_up_fn = warm_up_fn
+        self.close_fn = close_fn
+        self.poll_interval = poll_interval
+        self._current = None
+        self._lock = threading.Lock()
+        self._loading = None  # thread loading the next version
+        self._retired = []    # swapped out, still used by in-flight requests
+        self._counts = {"reloads": 0, "failed_reloads": 0, "freed": 0}
+        self._last_error = None
+        self._watcher = None
+
+    def load(self, version=None, path=None):
+        """Load synchronously and make it current; a path outside the registry is versioned by its fingerprint."""
+        if path is None:
+            version, path = self.registry.resolve(version)
+        model = self.load_fn(path)
+        version = version or getattr(model, "fingerprint", None) or model_fingerprint(path, None, None)
+        serving = ServingModel(version, path, model)
+        self._swap(serving)
+        return serving
+
+    @property
+    def version(self):
+        return self._current.version if self._current else None
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Yield the current ServingModel; it stays loaded until the block exits, even if swapped out meanwhile."""
+        with self._lock:
+            serving = self._current
+            serving.users += 1
+        try:
+            yield serving
+        finally:
+            with self._lock:
+                serving.users -= 1
+                release = serving.retired and serving.users == 0
+            if release:
+                self._release(serving)
+
+    def reload(self, version=None):
+        """Load `version` (default: the registry's active one) in the background; returns the loading thread.
+
+        Returns None if that version is already current or another reload is running.
+        """
+        version, path = self.registry.resolve(version)
+        with self._lock:
+            if version == self.version or self._loading is not None:
+                return None
+            self._loading = threading.Thread(target=self._load_in_background, args=(version, path),
+                                             name=f"reload-{version}", daemon=True)
+            self._loading.start()
+            return self._loading
+
+    def check(self):
+        """Start a reload if the registry's active version is not the one being served."""
+        if self.registry is None:
+            return None
+        try:
+            return self.reload()
+        except (LookupError, OSError, ValueError) as e:
+            logger.error(f"Cannot read model registry {self.registry.root}: {e}")
+            return None
+
+    def watch(self):
+        """Poll the registry every poll_interval seconds from a daemon thread (start it after forking)."""
+        if self.registry is None or self._watcher is not None:
+            return
+
+        def poll():
+            while True:
+                time.sleep(self.poll_interval)
+                self.check()
+
+        self._watcher = threading.Thread(target=poll, name="registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def metrics(self):
+        with self._lock:
+            current = self._current
+            return {
+                "version": current.version if current else None,
+                "fingerprint": current.fingerprint if current else None,
+                "path": current.path if current else None,
+                "loaded_at": current.loaded_at if current else None,
+                "in_flight": current.users if current else 0,
+                "loading": self._loading.name.removeprefix("reload-") if self._loading else None,
+                "retired_in_use": [serving.version for serving in self._retired],
+                "last_error": self._last_error,
+                **self._counts,
+            }
+
+    def _load_in_background(self, version, path):
+        started = time.perf_counter()
+        try:
+            serving = ServingModel(version, path, self.load_fn(path))
+            if self.warm_up_fn:
+                self.warm_up_fn(serving.model)
+        except Exception as e:
+            logger.error(f"Failed to load model version {version} from {path}: {e!r}")
+            with self._lock:
+                self._counts["failed_reloads"] += 1
+                self._last_error = f"{version}: {e!r}"
+                self._loading = None
+            return
+        previous = self._swap(serving)
+        with self._lock:
+            self._counts["reloads"] += 1
+            self._loading = None
+        logger.info(f"Swapped model {previous.version if previous else None} -> {version} "
+                    f"after {time.perf_counter() - started:.1f}s in the background")
+
+    def _swap(self, serving):
+        with self._lock:
+            previous, self._current = self._current, serving
+            release = previous is not None and previous.users == 0
+            if previous is not None:
+                previous.retired = True
+                if not release:
+                    self._retired.append(previous)
+        if release:
+            self._release(previous)
+        return previous
+
+    def _release(self, serving):
+        with self._lock:
+            if serving in self._retired:
+                self._retired.remove(serving)
+            self._counts["freed"] += 1
+        if self.close_fn:
+            self.close_fn(serving.model)
+        serving.model = None
+        gc.collect()
+        logger.info(f"Freed model version {serving.version}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry that api.py and app.py "
+                                                 "follow when TRUTHSEEKER_REGISTRY is set")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_PATH, required=DEFAULT_REGISTRY_PATH is None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="copy a checkpoint in as the next version")
+    register.add_argument("checkpoint", help="checkpoint directory, or with --latest a directory of checkpoint-N")
+    register.add_argument("--latest", action="store_true", help="register its highest checkpoint-N")
+    register.add_argument("--metrics", help="JSON file of metrics (default: trainer_state.json's last evaluation)")
+    register.add_argument("--note", default=None)
+    register.add_argument("--activate", action="store_true", help="make it the served version")
+    activate = commands.add_parser("activate", help="serve this version (rollout or rollback)")
+    activate.add_argument("version")
+    commands.add_parser("list", help="print the manifest")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == "register":
+        checkpoint = latest_checkpoint(args.checkpoint) if args.latest else args.checkpoint
+        metrics = None
+        if args.metrics:
+            with open(args.metrics, encoding="utf-8") as f:
+                metrics = json.load(f)
+        print(registry.register(checkpoint, metrics, args.activate, args.note))
+    elif args.command == "activate":
+        registry.activate(args.version)
+    else:
+        print(json.dumps(registry.read(), indent=2))
+
+if __name__ == "__main__":
+    main()
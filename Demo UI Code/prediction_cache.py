@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv("TRUTHSEEKER_CACHE_PATH", "prediction_cache.sqlite3")
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+# Pruning on open; limits apply to the whole file, which api.py, app.py, backends and registry versions share
+DEFAULT_MAX_AGE_DAYS = float(os.getenv("TRUTHSEEKER_CACHE_MAX_AGE_DAYS", "30"))
+DEFAULT_MAX_ROWS = int(os.getenv("TRUTHSEEKER_CACHE_MAX_ROWS", "1000000"))
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+def normalize_text(text):
+    """Canonical form used for cache keys: NFKC, trimmed, single-spaced."""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).split())
+
+def model_fingerprint(model_path, max_length, label_map, variant=None):
+    """Identify a checkpoint cheaply: config, weight file sizes/mtimes, max_length and label map."""
+    digest = hashlib.sha256()
+    digest.update(os.path.abspath(str(model_path)).encode())
+    if variant:
+        digest.update(f"#{variant}".encode())
+    digest.update(json.dumps({"max_length": max_length, "label_map": label_map}, sort_keys=True).encode())
+    config_path = os.path.join(model_path, "config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "rb") as f:
+            digest.update(f.read())
+    for name in WEIGHT_FILES:
+        path = os.path.join(model_path, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+class PredictionCache:
+    """Two-tier prediction cache: a size-bounded in-memory LRU in front of SQLite.
+
+    Keys hash the normalized text together with the model fingerprint, so a new
+    checkpoint never reads stale results, and models with different fingerprints
+    can share one file. Opening the cache prunes rows older than max_age_days and
+    then the oldest rows beyond max_rows, whichever model wrote them. SQLite runs
+    in WAL mode so several worker processes can share one file.
+    """
+
+    def __init__(self, fingerprint, db_path=DEFAULT_CACHE_PATH, max_memory_bytes=DEFAULT_MEMORY_BYTES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS, max_rows=DEFAULT_MAX_ROWS):
+        self.fingerprint = fingerprint
+        self.db_path = db_path
+        self.max_memory_bytes = max_memory_bytes
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "writes": 0}
+        if db_path:
+            self._init_db()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.fingerprint}\0{normalize_text(text)}".encode()).hexdigest()
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # Forked (e.g. a preloaded server worker): never reuse the parent's SQLite connections
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)")
+            expired = conn.execute("DELETE FROM predictions WHERE created < ?",
+                                   (time.time() - self.max_age_days * 86400,)).rowcount
+            overflow = conn.execute(
+                "DELETE FROM predictions WHERE key IN "
+                "(SELECT key FROM predictions ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+            ).rowcount
+        if expired or overflow:
+            logger.info(f"Pruned {expired} cached predictions older than {self.max_age_days:g} days "
+                        f"and {overflow} beyond {self.max_rows} rows")
+
+    def _remember(self, key, encoded):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(key) + len(self._memory.pop(key))
+            self._memory[key] = encoded
+            self._memory_bytes += len(key) + len(encoded)
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                old_key, old_value = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_key) + len(old_value)
+                self._counters["evictions"] += 1
+
+    def get_many(self, texts):
+        """Return cached values for texts, with None for misses."""
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                encoded = self._memory.get(key)
+                if encoded is None:
+                    missing.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    results[i] = json.loads(encoded)
+                    self._counters["memory_hits"] += 1
+        if missing and self.db_path:
+            wanted = list({keys[i] for i in missing})
+            found = {}
+            conn = self._connection()
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM predictions WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+            for key, encoded in found.items():
+                self._remember(key, encoded)
+            for i in missing:
+                encoded = found.get(keys[i])
+                if encoded is not None:
+                    results[i] = json.loads(encoded)
+        with self._lock:
+            hits_on_disk = sum(1 for i in missing if results[i] is not None)
+            self._counters["disk_hits"] += hits_on_disk
+            self._counters["misses"] += len(missing) - hits_on_disk
+        return results
+
+    def put_many(self, texts, values):
+        rows = []
+        for text, value in zip(texts, values):
+            key = self.key(text)
+            encoded = json.dumps(value)
+            self._remember(key, encoded)
+            rows.append((key, self.fingerprint, encoded, time.time()))
+        if rows and self.db_path:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows)
+        with self._lock:
+            self._counters["writes"] += len(rows)
+
+    def get(self, text):
+        return self.get_many([text])[0]
+
+    def put(self, text, value):
+        self.put_many([text], [value])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update(fingerprint=self.fingerprint, memory_entries=len(self._memory), memory_bytes=self._memory_bytes)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.db_path:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM predictions")
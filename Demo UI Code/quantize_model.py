@@ -0,0 +1,133 @@
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+import torch
+from sklearn.metrics import f1_score
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from backends import QUANTIZED_FILE, quantize_linear_layers
+from data_processing import load_and_clean_data
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TrueGL_training_and_inference"))
+from granite_inference import build_prediction_prompt, load_causal_lm, quantize_causal_lm  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def serialized_size_mb(model):
+    """Size of the state dict as it would be written to disk (the resident weight footprint)."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+def evaluate(model, tokenizer, statements, labels, batch_size=32, max_length=512):
+    """Return macro-F1 and mean per-batch latency on CPU. Labels are in [-1, 0, 1]."""
+    predictions, batch_times = [], []
+    with torch.inference_mode():
+        for start in range(0, len(statements), batch_size):
+            batch = tokenizer(statements[start:start + batch_size], truncation=True, padding=True,
+                              max_length=max_length, return_tensors="pt")
+            batch_start = time.perf_counter()
+            logits = model(**batch).logits
+            batch_times.append(time.perf_counter() - batch_start)
+            predictions.extend((logits.argmax(dim=-1) - 1).tolist())  # Shift [0,1,2] to [-1,0,1]
+    return {
+        "macro_f1": f1_score(labels, predictions, average="macro"),
+        "batch_latency_ms": 1000 * sum(batch_times) / len(batch_times),
+    }
+
+def next_tokens(model, tokenizer, statements, batch_size=8, max_length=512):
+    """Greedy next token after each reliability prompt, and mean per-batch latency on CPU."""
+    tokens, batch_times = [], []
+    with torch.inference_mode():
+        for start in range(0, len(statements), batch_size):
+            prompts = [build_prediction_prompt(s) for s in statements[start:start + batch_size]]
+            batch = tokenizer(prompts, truncation=True, padding=True, max_length=max_length, return_tensors="pt")
+            batch_start = time.perf_counter()
+            logits = model(**batch).logits[:, -1]
+            batch_times.append(time.perf_counter() - batch_start)
+            tokens.extend(logits.argmax(dim=-1).tolist())
+    return tokens, 1000 * sum(batch_times) / len(batch_times)
+
+def quantize_granite(model_path, statements, batch_size=8):
+    """INT8 linear layers (attention and LM head) for the Granite causal LM, saved as QUANTIZED_FILE in model_path.
+
+    The artifact is reloaded through load_causal_lm(quantized=True), the path serving
+    uses, and compared with the fp32 model on the reliability prompt of each statement.
+    """
+    tokenizer, model = load_causal_lm(model_path, "cpu")
+    tokenizer.padding_side = "left"  # next-token logits are read at the last position
+    report = {"fp32": {"weights_mb": serialized_size_mb(model)}}
+    output_path = os.path.join(model_path, QUANTIZED_FILE)
+    torch.save(quantize_causal_lm(model).state_dict(), output_path)
+
+    load_start = time.perf_counter()
+    _, quantized = load_causal_lm(model_path, "cpu", tokenizer=tokenizer, quantized=True)
+    report["int8"] = {"weights_mb": serialized_size_mb(quantized), "load_s": time.perf_counter() - load_start}
+    fp32_tokens, report["fp32"]["batch_latency_ms"] = next_tokens(model, tokenizer, statements, batch_size)
+    int8_tokens, report["int8"]["batch_latency_ms"] = next_tokens(quantized, tokenizer, statements, batch_size)
+    report["next_token_agreement"] = sum(a == b for a, b in zip(fp32_tokens, int8_tokens)) / len(statements)
+
+    for name in ("fp32", "int8"):
+        stats = report[name]
+        logger.info(f"Granite {name}: {stats['weights_mb']:.1f} MB | "
+                    f"{stats['batch_latency_ms']:.1f} ms/batch of {batch_size}")
+    logger.info(f"Granite next-token agreement {report['next_token_agreement']:.3f} on {len(statements)} prompts; "
+                f"saved {output_path}")
+    with open(os.path.join(model_path, "quantization_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a dynamically quantized INT8 classifier if it passes the accuracy gate")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--test-path", default="../Fine-Tuning Data/fake_news_data/LIAR_DATASET/test.tsv")
+    parser.add_argument("--max-f1-drop", type=float, default=0.01, help="largest allowed absolute macro-F1 drop")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None, help="evaluate on the first N test statements only")
+    parser.add_argument("--granite-path", default=None, help="also quantize this Granite checkpoint's linear layers "
+                                                                  "(load with load_causal_lm(quantized=True))")
+    args = parser.parse_args()
+
+    df = load_and_clean_data(args.test_path)
+    if df is None or df.empty:
+        sys.exit(f"No evaluation data at {args.test_path}")
+    if args.limit:
+        df = df.head(args.limit)
+    statements = df['statement'].tolist()
+    labels = df['label'].astype(int).tolist()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model_path).eval()
+    report = {"fp32": {"weights_mb": serialized_size_mb(model)}}
+    report["fp32"].update(evaluate(model, tokenizer, statements, labels, args.batch_size))
+    quantized = quantize_linear_layers(model)
+    report["int8"] = {"weights_mb": serialized_size_mb(quantized)}
+    report["int8"].update(evaluate(quantized, tokenizer, statements, labels, args.batch_size))
+
+    for name, stats in report.items():
+        logger.info(f"{name}: macro-F1 {stats['macro_f1']:.4f} | {stats['weights_mb']:.1f} MB | "
+                    f"{stats['batch_latency_ms']:.1f} ms/batch of {args.batch_size}")
+    drop = report["fp32"]["macro_f1"] - report["int8"]["macro_f1"]
+    report["macro_f1_drop"] = drop
+    report["max_f1_drop"] = args.max_f1_drop
+    report["published"] = drop <= args.max_f1_drop
+
+    with open(os.path.join(args.model_path, "quantization_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    if not report["published"]:
+        logger.error(f"Macro-F1 dropped by {drop:.4f} (> {args.max_f1_drop}); not publishing {QUANTIZED_FILE}")
+        sys.exit(1)
+    torch.save(quantized.state_dict(), os.path.join(args.model_path, QUANTIZED_FILE))
+    logger.info(f"Published {QUANTIZED_FILE} (macro-F1 drop {drop:.4f})")
+
+    if args.granite_path:
+        quantize_granite(args.granite_path, statements, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+from inference import TruthSeekerInference, truth_score
+from prediction_cache import normalize_text
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TrueGL_training_and_inference"))
+from search_index import iter_pages  # noqa: E402  (the page reader shared with the search index)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIDECAR_PATH = os.getenv("TRUTHSEEKER_SCORES_PATH", "truth_scores.parquet")
+SIDECAR_COLUMNS = ["url", "content_hash", "truth_score", "confidence", "label", "model_version", "scored_at"]
+
+def page_text(title, content):
+    """What the classifier reads for a page; it truncates to its max_length."""
+    return normalize_text(f"{title}. {content}" if title else content)
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+class TruthScoreSidecar:
+    """Per-page scores stored column-wise; get(url) is a dict lookup into the column arrays."""
+
+    def __init__(self, path=DEFAULT_SIDECAR_PATH):
+        self.path = path
+        df = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame(columns=SIDECAR_COLUMNS)
+        self.columns = {name: df[name].to_numpy() for name in SIDECAR_COLUMNS}
+        self.rows = {url: i for i, url in enumerate(self.columns["url"])}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, url):
+        return url in self.rows
+
+    def get(self, url):
+        row = self.rows.get(url)
+        if row is None:
+            return None
+        return {name: values[row].item() if hasattr(values[row], "item") else values[row]
+                for name, values in self.columns.items()}
+
+def write_sidecar(rows, path):
+    """Write the sidecar atomically so readers never see a half-written file."""
+    df = pd.DataFrame(rows, columns=SIDECAR_COLUMNS)
+    df = df.astype({"truth_score": "float32", "confidence": "float32", "scored_at": "float64"})
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def score_pages(inference, pages, sidecar_path=DEFAULT_SIDECAR_PATH, batch_size=256, model_batch_size=32,
+                checkpoint_every=50_000, rescore_all=False):
+    """Score new or changed pages and rewrite the sidecar; returns counts for the run.
+
+    A page keeps its previous row when its content hash and the model version are
+    unchanged. Pages that are no longer in the store are dropped from the sidecar.
+    """
+    previous = TruthScoreSidecar(sidecar_path)
+    model_version = inference.fingerprint
+    rows, pending, seen = {}, [], set()
+    counts = {"pages": 0, "scored": 0, "unchanged": 0}
+    next_checkpoint = checkpoint_every
+    start = time.perf_counter()
+
+    def score_pending():
+        nonlocal next_checkpoint
+        results = inference.predict_batch([text for _, text, _ in pending], batch_size=model_batch_size)
+        now = time.time()
+        for (url, _, digest), result in zip(pending, results):
+            rows[url] = (url, digest, truth_score(result["probabilities"]), result["confidence"], result["label"],
+                         model_version, now)
+        counts["scored"] += len(pending)
+        pending.clear()
+        if checkpoint_every and counts["scored"] >= next_checkpoint:
+            write_sidecar(list(rows.values()) + _unvisited(previous, seen), sidecar_path)
+            next_checkpoint += checkpoint_every
+        elapsed = time.perf_counter() - start
+        logger.info(f"Scored {counts['scored']} pages ({counts['scored'] / elapsed:.1f} pages/sec), "
+                    f"{counts['unchanged']} unchanged")
+
+    for url, title, content in pages:
+        if url in seen:
+            continue
+        seen.add(url)
+        counts["pages"] += 1
+        text = page_text(title, content)
+        digest = content_hash(text)
+        old = previous.get(url)
+        if not rescore_all and old and old["content_hash"] == digest and old["model_version"] == model_version:
+            rows[url] = tuple(old[name] for name in SIDECAR_COLUMNS)
+            counts["unchanged"] += 1
+            continue
+        pending.append((url, text, digest))
+        if len(pending) >= batch_size:
+            score_pending()
+    if pending:
+        score_pending()
+
+    counts["removed"] = sum(1 for url in previous.rows if url not in rows)
+    write_sidecar(list(rows.values()), sidecar_path)
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+def _unvisited(previous, seen):
+    """Previous rows this run has not decided on yet, kept in checkpoints so a crash loses nothing."""
+    return [tuple(previous.get(url)[name] for name in SIDECAR_COLUMNS) for url in previous.rows if url not in seen]
+
+def main():
+    parser = argparse.ArgumentParser(description="Score crawled pages once with the classifier and store the "
+                                                 "results in a columnar sidecar for the search path")
+    parser.add_argument("pages", help="crawler.js index.json, crawler.py .sqlite3 store, or .jsonl/.csv/.parquet")
+    parser.add_argument("--model-path", default="models/finetuned")
+    parser.add_argument("--sidecar", default=DEFAULT_SIDECAR_PATH)
+    parser.add_argument("--batch-size", type=int, default=256, help="pages handed to the classifier at once")
+    parser.add_argument("--model-batch-size", type=int, default=32)
+    parser.add_argument("--checkpoint-every", type=int, default=50_000, help="rewrite the sidecar every N scored pages")
+    parser.add_argument("--rescore-all", action="store_true", help="ignore content hashes and rescore every page")
+    parser.add_argument("--backend", default=None, help="torch, onnxruntime, torchscript or quantized")
+    args = parser.parse_args()
+
+    inference = TruthSeekerInference(args.model_path, backend=args.backend)
+    logging.getLogger("inference").setLevel(logging.WARNING)
+    counts = score_pages(inference, iter_pages(args.pages), args.sidecar, args.batch_size, args.model_batch_size,
+                         args.checkpoint_every, args.rescore_all)
+    logger.info(f"{counts['pages']} pages: {counts['scored']} scored, {counts['unchanged']} unchanged, "
+                f"{counts['removed']} removed in {counts['seconds']}s -> {args.sidecar}")
+
+if __name__ == "__main__":
+    main()
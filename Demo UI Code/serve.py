@@ -0,0 +1,115 @@
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BIND = os.getenv("TRUTHSEEKER_BIND", "0.0.0.0:8000")
+DEFAULT_WORKERS = int(os.getenv("TRUTHSEEKER_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_THREADS = int(os.getenv("TRUTHSEEKER_THREADS", "4"))  # request threads per worker, feeding its micro-batcher
+
+class AnalyzeServer(BaseApplication):
+    """gunicorn running api.py's app in several preforked worker processes.
+
+    The app, and with it the model, is imported once in the master before the
+    workers are forked. Workers therefore share the weights' memory pages
+    copy-on-write instead of loading their own copy, and only their private
+    state (scheduler thread, activations, caches) adds to RSS per worker.
+
+    With a registry, the master rather than each worker follows the active
+    version (watch_registry): it loads a newly activated version itself and then
+    sends itself SIGHUP, so gunicorn forks fresh workers that share the new
+    weights and gracefully retires the old ones. Steady-state memory stays at one
+    copy of the model. During a swap the master briefly holds both versions, and
+    old workers keep the previous one until their in-flight requests finish.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import api
+        return api.app
+
+def post_fork(server, worker):
+    import api
+    api.init_worker(int(os.environ["TRUTHSEEKER_INTRA_OP_THREADS"]), watch_registry=False)
+
+def watch_registry(server):
+    """when_ready hook: poll the registry from the master and re-fork the workers onto each new version.
+
+    Per-worker watchers would each load a private copy of every new version,
+    growing RSS to workers x model size after the first swap. The master only
+    loads the weights; warm-up runs in the re-forked workers (init_worker).
+    """
+    import api
+    from model_registry import POLL_SECONDS
+
+    if api.registry is None:
+        return
+
+    def poll():
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                version = api.registry.active_version()
+                if version is None or version == api.reloader.version:
+                    continue
+                api.reloader.load(version)
+            except Exception as e:
+                logger.error(f"Cannot load the active model version from {api.registry.root}: {e!r}")
+                continue
+            logger.info(f"Loaded model {version} in the master; re-forking workers")
+            os.kill(server.pid, signal.SIGHUP)
+
+    threading.Thread(target=poll, name="registry-watcher", daemon=True).start()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve /analyze from several worker processes sharing one model")
+    parser.add_argument("--model-path", default=None, help="overrides TRUTHSEEKER_MODEL_PATH")
+    parser.add_argument("--registry", default=None, help="overrides TRUTHSEEKER_REGISTRY; serves its active version")
+    parser.add_argument("--bind", default=DEFAULT_BIND)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="request threads per worker")
+    parser.add_argument("--intra-op-threads", type=int, default=None,
+                        help="torch threads per worker (default: cores / workers, at least 1)")
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    if args.model_path:
+        os.environ["TRUTHSEEKER_MODEL_PATH"] = args.model_path
+    if args.registry:
+        os.environ["TRUTHSEEKER_REGISTRY"] = args.registry
+    intra_op_threads = args.intra_op_threads or max(1, (os.cpu_count() or 1) // args.workers)
+    # Read by api.py on import and by post_fork; also caps OpenMP in every worker
+    os.environ["TRUTHSEEKER_INTRA_OP_THREADS"] = str(intra_op_threads)
+    os.environ.setdefault("OMP_NUM_THREADS", str(intra_op_threads))
+    logger.info(f"Starting {args.workers} workers x {args.threads} threads, {intra_op_threads} intra-op threads each")
+    if os.getenv("TRUTHSEEKER_REGISTRY"):
+        logger.info("Following the model registry from the master: a new active version is loaded once there and "
+                    "the workers are re-forked onto it (both versions are resident in the master during the swap)")
+    AnalyzeServer({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "when_ready": watch_registry,
+        "timeout": args.timeout,
+        "graceful_timeout": 30,
+    }).run()
+
+if __name__ == "__main__":
+    main()
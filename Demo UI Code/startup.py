@@ -0,0 +1,144 @@
+import contextlib
+import importlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Nothing heavy is imported at module level: torch and transformers are imported inside the
+# "imports" phase of whichever loader runs, so importing this module (or inference.py) is instant.
+STARTUP_PHASES = ("imports", "tokenizer", "weights", "device transfer", "warm-up")
+SAFETENSORS_FILE = "model.safetensors"
+TOKENIZER_FILE = "tokenizer.json"
+SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+class StartupTimer:
+    """Wall-clock seconds per startup phase; a phase entered several times accumulates."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        """{phase: seconds} in STARTUP_PHASES order (then any others), plus "total"."""
+        names = [p for p in STARTUP_PHASES if p in self.phases] + [p for p in self.phases if p not in STARTUP_PHASES]
+        report = {name: round(self.phases[name], 4) for name in names}
+        report["total"] = round(sum(self.phases.values()), 4)
+        return report
+
+    def summary(self):
+        report = self.report()
+        total = report.pop("total")
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report.items()) + f" (total {total:.2f}s)"
+
+def load_tokenizer(model_path, timer):
+    """PreTrainedTokenizerFast straight from tokenizer.json when the checkpoint has one.
+
+    AutoTokenizer resolves the concrete tokenizer class through the auto mappings,
+    which imports far more of transformers than the fast tokenizer base class does.
+    Without a tokenizer.json (slow-only checkpoints) it falls back to AutoTokenizer.
+    """
+    with timer.phase("imports"):
+        if os.path.exists(os.path.join(model_path, TOKENIZER_FILE)):
+            from transformers import PreTrainedTokenizerFast as tokenizer_class
+        else:
+            from transformers import AutoTokenizer as tokenizer_class
+    with timer.phase("tokenizer"):
+        return tokenizer_class.from_pretrained(model_path)
+
+def load_safetensors(path):
+    """State dict whose tensors are views into a private mmap of a .safetensors file.
+
+    Nothing is read up front: pages fault in on first use and live in the page cache,
+    shared with every other process mapping the same file (e.g. serve.py's workers).
+    ACCESS_COPY keeps the file on disk untouched should anything write to a tensor.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header.pop("__metadata__", None)
+    state = {}
+    for name, info in header.items():
+        if info["dtype"] not in SAFETENSORS_DTYPES:
+            raise ValueError(f"Unsupported safetensors dtype {info['dtype']} for {name} in {path}")
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        if end == start:
+            state[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        state[name] = torch.frombuffer(buffer, dtype=dtype, count=(end - start) // dtype.itemsize,
+                                       offset=8 + header_size + start).view(info["shape"])
+    return state
+
+def resolve_model_class(model_path):
+    """(model class, config) named by config.json's architectures, or (None, None) if it cannot be resolved.
+
+    Importing transformers.models.<type>.modeling_<type> directly skips the auto
+    class mappings, which is all AutoModelForSequenceClassification would add.
+    """
+    try:
+        with open(os.path.join(model_path, "config.json")) as f:
+            config = json.load(f)
+        model_type = config["model_type"].replace("-", "_")
+        module = importlib.import_module(f"transformers.models.{model_type}.modeling_{model_type}")
+        model_class = getattr(module, config["architectures"][0])
+    except (OSError, KeyError, IndexError, TypeError, ImportError, AttributeError) as e:
+        logger.info(f"Could not resolve the model class from config.json ({e}); using the auto classes")
+        return None, None
+    return model_class, model_class.config_class.from_pretrained(model_path)
+
+def no_init_weights():
+    """transformers' context manager that skips random weight init while a model is built."""
+    try:
+        from transformers.initialization import no_init_weights as context  # transformers >= 5
+    except ImportError:
+        from transformers.modeling_utils import no_init_weights as context
+    return context()
+
+def load_classifier(model_path, timer):
+    """Sequence classifier on the CPU, in eval mode, with its weights mapped from model.safetensors.
+
+    The model is built without running weight init, then takes the mapped tensors as
+    its parameters (load_state_dict(assign=True)) instead of copying them in. Sharded
+    or .bin checkpoints, and any key mismatch, fall back to from_pretrained.
+    """
+    weights_path = os.path.join(model_path, SAFETENSORS_FILE)
+    with timer.phase("imports"):
+        import torch  # noqa: F401
+        model_class, config = resolve_model_class(model_path)
+    if model_class is not None and os.path.exists(weights_path):
+        with timer.phase("weights"):
+            state = load_safetensors(weights_path)
+            with no_init_weights():
+                model = model_class(config)
+            missing, unexpected = model.load_state_dict(state, strict=False, assign=True)
+            model.tie_weights()
+            # Tied parameters (e.g. shared embeddings) are missing from the file but now point at loaded storage
+            loaded, current = {t.data_ptr() for t in state.values()}, model.state_dict(keep_vars=True)
+            missing = [k for k in missing if current[k].data_ptr() not in loaded]
+        if not missing and not unexpected:
+            return model.eval()
+        logger.warning(f"{weights_path} does not match {model_class.__name__} (missing {missing[:3]}, "
+                       f"unexpected {unexpected[:3]}); falling back to from_pretrained")
+    with timer.phase("imports"):
+        from transformers import AutoModelForSequenceClassification
+    with timer.phase("weights"):
+        return AutoModelForSequenceClassification.from_pretrained(model_path).eval()
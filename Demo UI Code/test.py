@@ -1,4 +1,5 @@
-from transformers import BertForSequenceClassification
+from startup import StartupTimer, load_classifier
 model_path = "/Users/mattlaing/Desktop/TruthSeeker/models/finetuned"
-model = BertForSequenceClassification.from_pretrained(model_path)
-print("Model loaded successfully!")
+timer = StartupTimer()
+model = load_classifier(model_path, timer)
+print(f"Model loaded successfully! ({timer.summary()})")
@@ -2,6 +2,14 @@ from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trai
 import torch
 from torch.utils.data import Dataset
 import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TrueGL_training_and_inference"))
+from dynamic_padding import DynamicPaddingCollator
+from token_cache import LIAR_TEMPLATE, build_token_cache
+
+TOKEN_CACHE_DIR = '/Users/mattlaing/Desktop/TruthSeeker/data/token_cache'  # None to tokenize the CSVs on every run
 
 class LiarDataset(Dataset):
     def __init__(self, csv_file, tokenizer):
@@ -18,12 +26,29 @@ class LiarDataset(Dataset):
     def __len__(self):
         return len(self.labels)
 
+class CachedLiarDataset(Dataset):
+    """LiarDataset read zero-copy from a pre-tokenized TokenCache; padding happens per batch in the collator."""
+
+    def __init__(self, csv_file, tokenizer, cache_dir=TOKEN_CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache = build_token_cache(csv_file, tokenizer, cache_dir, LIAR_TEMPLATE, min(tokenizer.model_max_length, 512), label_column='label')
+
+    def __getitem__(self, idx):
+        return {
+            'input_ids': torch.from_numpy(self.cache[idx].astype('int64')),
+            'labels': torch.tensor(int(self.cache.labels[idx])),
+        }
+
+    def __len__(self):
+        return len(self.cache)
+
 def train_model():
     tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
     model = AutoModelForSequenceClassification.from_pretrained('bert-base-uncased', num_labels=3)
 
-    train_dataset = LiarDataset('/Users/mattlaing/Desktop/TruthSeeker/data/processed/train.csv', tokenizer)
-    valid_dataset = LiarDataset('/Users/mattlaing/Desktop/TruthSeeker/data/processed/valid.csv', tokenizer)
+    dataset_class = CachedLiarDataset if TOKEN_CACHE_DIR else LiarDataset
+    train_dataset = dataset_class('/Users/mattlaing/Desktop/TruthSeeker/data/processed/train.csv', tokenizer)
+    valid_dataset = dataset_class('/Users/mattlaing/Desktop/TruthSeeker/data/processed/valid.csv', tokenizer)
 
     training_args = TrainingArguments(
         output_dir='./models/finetuned',
@@ -45,6 +70,7 @@ def train_model():
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=valid_dataset,
+        data_collator=DynamicPaddingCollator(tokenizer.pad_token_id) if TOKEN_CACHE_DIR else None,
     )
 
     trainer.train()
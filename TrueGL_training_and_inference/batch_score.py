@@ -0,0 +1,255 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from granite_inference import (
+    BASE_MODEL_PATH,
+    CHECKPOINTS_DIR,
+    MAX_LENGTH_JUSTIFICATION,
+    MAX_LENGTH_PREDICTION,
+    MAX_NEW_TOKENS_JUSTIFICATION,
+    build_justification_prompt,
+    clean_justification,
+    get_latest_checkpoint,
+    load_causal_lm,
+)
+from justification_service import MAX_BATCH_SIZE, ContinuousBatchingEngine, JustificationError
+from reliability_scorer import SCORE_BINS, GraniteReliabilityScorer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Demo UI Code"))
+from prediction_cache import model_fingerprint  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+TEXT_COLUMN = "statement"
+CHUNK_ROWS = 1024  # rows per output part; also the unit of work that is skipped on restart
+SCORE_BATCH_SIZE = 8
+# Part files and manifests live side by side; the leading "_" keeps pd.read_parquet(output_dir) off the manifests
+PART_NAME = "part-{chunk:06d}.parquet"
+MANIFEST_NAME = "_manifest-{shard}-of-{num_shards}.json"
+
+def parse_shard(value):
+    """'i/N' -> (i, N): this host scores chunks i, i + N, i + 2N, ..."""
+    try:
+        shard, num_shards = map(int, value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}") from None
+    if num_shards < 1 or not 0 <= shard < num_shards:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {num_shards}), got {shard}")
+    return shard, num_shards
+
+def count_rows(path, text_column=TEXT_COLUMN):
+    """Rows in a CSV or Parquet file; Parquet reads the footer, CSV parses only the text column."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=[text_column], chunksize=100_000))
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """(chunk index, DataFrame) for consecutive blocks of chunk_rows rows, without loading the whole file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        batches = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        batches = pd.read_csv(path, chunksize=chunk_rows)
+    start = 0
+    for chunk, df in enumerate(batches):
+        df.index = pd.RangeIndex(start, start + len(df), name="row")
+        start += len(df)
+        yield chunk, df
+
+def shard_chunks(total_rows, shard, num_shards, chunk_rows=CHUNK_ROWS):
+    """{chunk index: rows} of the chunks that belong to this shard."""
+    chunks = range(shard, -(-total_rows // chunk_rows), num_shards)
+    return {chunk: min(chunk_rows, total_rows - chunk * chunk_rows) for chunk in chunks}
+
+def write_atomic(write, path):
+    """Call write(tmp_path), then rename over path, so readers and restarts never see a partial file."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+class ShardManifest:
+    """Finished chunks of one shard; a chunk counts only if it was scored with the current config."""
+
+    def __init__(self, output_dir, shard, num_shards, config):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME.format(shard=shard, num_shards=num_shards))
+        self.config = config
+        self.data = {"shard": shard, "num_shards": num_shards, "config": config, "chunks": {}}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                previous = json.load(f)
+            if previous["config"] == config:
+                self.data["chunks"] = previous["chunks"]
+            else:
+                logger.warning(f"{self.path} was written with a different config; rescoring every chunk")
+
+    def is_done(self, chunk):
+        entry = self.data["chunks"].get(str(chunk))
+        return entry is not None and os.path.exists(os.path.join(self.output_dir, entry["file"]))
+
+    def rows_done(self):
+        return sum(entry["rows"] for chunk, entry in self.data["chunks"].items() if self.is_done(chunk))
+
+    def add(self, chunk, file, rows, seconds):
+        self.data["chunks"][str(chunk)] = {"file": file, "rows": rows, "seconds": round(seconds, 3),
+                                           "finished_at": time.time()}
+        self.save()
+
+    def save(self):
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2)
+        write_atomic(write, self.path)
+
+class BatchJustifier:
+    """Synchronous justifications for a list of statements, decoded together by the continuous-batching engine."""
+
+    def __init__(self, model_path=BASE_MODEL_PATH, device=None, max_batch_size=MAX_BATCH_SIZE,
+                 max_length=MAX_LENGTH_JUSTIFICATION, max_new_tokens=MAX_NEW_TOKENS_JUSTIFICATION, seed=None):
+        tokenizer, model = load_causal_lm(model_path, device)
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.max_new_tokens = max_new_tokens
+        self.engine = ContinuousBatchingEngine(model, tokenizer, max_batch_size, seed=seed).start()
+
+    def justify_batch(self, statements, scores):
+        finished = threading.Semaphore(0)
+        requests = []
+        for statement, score in zip(statements, scores):
+            prompt_ids = self.tokenizer(build_justification_prompt(statement, score), truncation=True,
+                                        max_length=self.max_length)["input_ids"]
+            requests.append(self.engine.submit(prompt_ids, self.max_new_tokens,
+                                               lambda delta, done: done and finished.release()))
+        for _ in requests:
+            finished.acquire()
+        failed = [request.error for request in requests if request.error is not None]
+        if failed:
+            # The chunk is not recorded in the manifest, so a rerun scores it again
+            raise JustificationError(f"{len(failed)} of {len(requests)} justifications failed: {failed[0]!r}") from failed[0]
+        return [clean_justification(request.text) for request in requests]
+
+    def close(self):
+        self.engine.stop()
+
+def score_chunk(df, scorer, justifier=None, text_column=TEXT_COLUMN, batch_size=SCORE_BATCH_SIZE):
+    """The chunk's rows with reliability_score and answer_mass columns, plus justification if a justifier is given."""
+    statements = df[text_column].fillna("").astype(str).tolist()
+    results = scorer.score_batch(statements, batch_size=batch_size)
+    out = df.copy()
+    out["reliability_score"] = [r["score"] for r in results]
+    out["answer_mass"] = [r["answer_mass"] for r in results]
+    if justifier is not None:
+        out["justification"] = justifier.justify_batch(statements, out["reliability_score"].round(2).tolist())
+    return out.astype({"reliability_score": "float32", "answer_mass": "float32"})
+
+def run_config(input_path, granite_path, max_length, chunk_rows, text_column, justification_path=None,
+               max_new_tokens=MAX_NEW_TOKENS_JUSTIFICATION):
+    """Everything that changes a part file's contents; finished chunks are only reused under the same config."""
+    config = {
+        "input": os.path.abspath(input_path),
+        "chunk_rows": chunk_rows,
+        "text_column": text_column,
+        "scorer": model_fingerprint(granite_path, max_length, SCORE_BINS),
+        "justification": None,
+    }
+    if justification_path:
+        config["justification"] = {"model": model_fingerprint(justification_path, MAX_LENGTH_JUSTIFICATION, None),
+                                   "max_new_tokens": max_new_tokens}
+    return config
+
+def score_corpus(input_path, output_dir, scorer, config, shard=0, num_shards=1, justifier=None,
+                 batch_size=SCORE_BATCH_SIZE, total_rows=None):
+    """Score this shard's chunks of input_path into output_dir, skipping chunks a previous run finished.
+
+    Returns counts for the run. Each part file is written atomically and then
+    recorded in the shard's manifest, so an interrupted run loses at most the chunk
+    it was working on.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    chunk_rows, text_column = config["chunk_rows"], config["text_column"]
+    total_rows = count_rows(input_path, text_column) if total_rows is None else total_rows
+    mine = shard_chunks(total_rows, shard, num_shards, chunk_rows)
+    manifest = ShardManifest(output_dir, shard, num_shards, config)
+    shard_rows, resumed = sum(mine.values()), manifest.rows_done()
+    counts = {"chunks": len(mine), "skipped": 0, "scored": 0, "rows": 0}
+    logger.info(f"Shard {shard}/{num_shards}: {len(mine)} of {-(-total_rows // chunk_rows)} chunks, "
+                f"{shard_rows} rows ({resumed} already done)")
+    start = time.perf_counter()
+    for chunk, df in iter_chunks(input_path, chunk_rows):
+        if chunk not in mine:
+            continue
+        if manifest.is_done(chunk):
+            counts["skipped"] += 1
+            continue
+        began = time.perf_counter()
+        scored = score_chunk(df, scorer, justifier, text_column, batch_size)
+        name = PART_NAME.format(chunk=chunk)
+        write_atomic(lambda tmp_path: scored.to_parquet(tmp_path, index=True), os.path.join(output_dir, name))
+        manifest.add(chunk, name, len(scored), time.perf_counter() - began)
+        counts["scored"] += 1
+        counts["rows"] += len(scored)
+        elapsed = time.perf_counter() - start
+        rate = counts["rows"] / elapsed
+        remaining = shard_rows - resumed - counts["rows"]
+        logger.info(f"Chunk {chunk}: {resumed + counts['rows']}/{shard_rows} rows, {rate:.2f} rows/sec, "
+                    f"ETA {format_eta(remaining / rate)}")
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large CSV/Parquet corpus with Granite into resumable "
+                                                 "Parquet parts; run one --shard i/N per host to split the work")
+    parser.add_argument("input", help="CSV or Parquet file with a text column")
+    parser.add_argument("output_dir", help="part-*.parquet files and one _manifest-i-of-N.json per shard")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), metavar="i/N")
+    parser.add_argument("--text-column", default=TEXT_COLUMN)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--model-path", default=None, help="defaults to the latest checkpoint in CHECKPOINTS_DIR")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH_PREDICTION)
+    parser.add_argument("--batch-size", type=int, default=SCORE_BATCH_SIZE)
+    parser.add_argument("--justify", action="store_true", help="also generate a justification for every row")
+    parser.add_argument("--justification-model-path", default=BASE_MODEL_PATH)
+    parser.add_argument("--max-new-tokens", type=int, default=MAX_NEW_TOKENS_JUSTIFICATION)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE, help="justifications decoded together")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    shard, num_shards = args.shard
+    model_path = args.model_path or get_latest_checkpoint(CHECKPOINTS_DIR)
+    if model_path is None:
+        parser.error(f"no checkpoint found in {CHECKPOINTS_DIR}; pass --model-path")
+    justification_path = args.justification_model_path if args.justify else None
+    config = run_config(args.input, model_path, args.max_length, args.chunk_rows, args.text_column,
+                        justification_path, args.max_new_tokens)
+    scorer = GraniteReliabilityScorer(model_path, device=args.device, max_length=args.max_length)
+    justifier = None
+    if justification_path:
+        justifier = BatchJustifier(justification_path, args.device, args.max_batch_size,
+                                   max_new_tokens=args.max_new_tokens)
+    try:
+        counts = score_corpus(args.input, args.output_dir, scorer, config, shard, num_shards, justifier,
+                              args.batch_size)
+    finally:
+        if justifier:
+            justifier.close()
+    logger.info(f"Shard {shard}/{num_shards}: {counts['scored']} chunks scored ({counts['rows']} rows), "
+                f"{counts['skipped']} already done, in {counts['seconds']}s -> {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cascade_scorer import CLASSIFIER_PATH, GRANITE_BATCH_SIZE, CascadeScorer
+from granite_inference import CHECKPOINTS_DIR, MAX_LENGTH_PREDICTION, get_latest_checkpoint
+from inference import TruthSeekerInference, truth_score  # on sys.path via cascade_scorer
+from reliability_scorer import GraniteReliabilityScorer
+
+def agreement(scores, reference):
+    """(MAE, share within 0.1, share on the same side of 0.5) of scores against the Granite-only scores."""
+    diff = np.abs(scores - reference)
+    return diff.mean(), (diff <= 0.1).mean(), ((scores >= 0.5) == (reference >= 0.5)).mean()
+
+def plot_sweep(sweep, path):
+    """Throughput against agreement with Granite-only scoring, one point per threshold."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    ax.plot(sweep["same_side"] * 100, sweep["statements_per_sec"], marker="o")
+    for row in sweep.itertuples():
+        ax.annotate(f"{row.threshold:.2f}", (row.same_side * 100, row.statements_per_sec),
+                    textcoords="offset points", xytext=(4, 4), fontsize=8)
+    ax.set_xlabel("agreement with Granite-only (% on the same side of 0.5)")
+    ax.set_ylabel("statements / sec")
+    ax.set_yscale("log")
+    ax.set_title("BERT -> Granite cascade: confidence threshold sweep")
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    print(f"Saved plot to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the cascade's confidence threshold: throughput vs agreement "
+                                                 "with scoring everything by Granite")
+    parser.add_argument("--csv-path", default="val_articles_fine_tuning.csv")
+    parser.add_argument("--num-rows", type=int, default=200)
+    parser.add_argument("--classifier-path", default=CLASSIFIER_PATH)
+    parser.add_argument("--granite-path", default=None, help="defaults to the latest checkpoint in CHECKPOINTS_DIR")
+    parser.add_argument("--granite-batch-size", type=int, default=GRANITE_BATCH_SIZE)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH_PREDICTION)
+    parser.add_argument("--thresholds", default="0,0.35,0.4,0.5,0.6,0.7,0.8,0.85,0.9,0.95,1.01")
+    parser.add_argument("--check-threshold", type=float, default=0.8,
+                        help="run the real cascade at this threshold to check the sweep's estimate")
+    parser.add_argument("--plot", default="cascade_sweep.png", help="'' to skip (needs matplotlib)")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv_path)
+    df = df.sample(n=min(args.num_rows, len(df)), random_state=42).reset_index(drop=True)
+    statements = df["statement"].astype(str).tolist()
+    classifier = TruthSeekerInference(args.classifier_path, device=args.device)
+    granite = GraniteReliabilityScorer(args.granite_path or get_latest_checkpoint(CHECKPOINTS_DIR),
+                                       device=args.device, max_length=args.max_length)
+    classifier._predict_uncached(statements[:4], 4)  # warm-up
+    granite.score_batch(statements[:2], batch_size=2)
+
+    # Score everything with both stages once; every threshold is then a mix of the two
+    start = time.perf_counter()
+    predictions = classifier._predict_uncached(statements, 32)
+    classifier_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = np.array([r["score"] for r in granite.score_batch(statements, batch_size=args.granite_batch_size)])
+    granite_seconds = time.perf_counter() - start
+    classifier_scores = np.array([truth_score(p["probabilities"]) for p in predictions])
+    confidence = np.array([p["confidence"] for p in predictions])
+    n = len(statements)
+    print(f"{n} statements | classifier {n / classifier_seconds:.1f}/s | Granite-only {n / granite_seconds:.2f}/s")
+
+    rows = []
+    for threshold in map(float, args.thresholds.split(",")):
+        escalated = confidence < threshold
+        scores = np.where(escalated, reference, classifier_scores)
+        # Escalations are batched, so their cost is Granite's measured per-statement time
+        seconds = classifier_seconds + escalated.sum() * granite_seconds / n
+        mae, close, same_side = agreement(scores, reference)
+        rows.append({"threshold": threshold, "escalated": escalated.mean(), "statements_per_sec": n / seconds,
+                     "speedup": granite_seconds / seconds, "mae": mae, "within_0.1": close, "same_side": same_side})
+    sweep = pd.DataFrame(rows)
+    print(sweep.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    cascade = CascadeScorer(classifier, granite, confidence_threshold=args.check_threshold,
+                            granite_batch_size=args.granite_batch_size)
+    start = time.perf_counter()
+    results = cascade.score_batch(statements)
+    seconds = time.perf_counter() - start
+    mae, _, same_side = agreement(np.array([r["score"] for r in results]), reference)
+    stats = cascade.stats()
+    print(f"cascade run at threshold {args.check_threshold}: {n / seconds:.2f} statements/sec, "
+          f"{stats['escalation_rate']:.1%} escalated, MAE {mae:.4f}, same side {same_side:.1%}")
+    if args.plot:
+        plot_sweep(sweep, args.plot)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+from collections import Counter
+
+from crawler import Crawler
+
+WORDS = ("claim report study council budget vaccine climate election market court energy health science "
+         "policy school water city river growth record data").split()
+
+TAIL_HTML = "<html><body><p>tail of the big page</p></body></html>"
+
+class FixtureSite:
+    """Synthetic pages spread over several local ports, each port standing in for one host.
+
+    Page i links to a handful of other pages (on every host), every tenth page repeats
+    the text of the page before it, and robots.txt disallows /private/. /big is a page
+    much larger than one network read whose only link, /tail, comes at its very end.
+    """
+
+    def __init__(self, num_pages, num_hosts, latency, base_port):
+        self.num_pages = num_pages
+        self.ports = [base_port + h for h in range(num_hosts)]
+        self.latency = latency
+        self.runners = []
+        self.requests = Counter()  # path -> times served, across every host
+
+    def url(self, page):
+        return f"http://127.0.0.1:{self.ports[page % len(self.ports)]}/page/{page}"
+
+    def text(self, page):
+        if page % 10 == 9:
+            page -= 1
+        rng = random.Random(page)
+        return " ".join(rng.choice(WORDS) for _ in range(120))
+
+    def html(self, page):
+        rng = random.Random(f"links-{page}")
+        links = [self.url(rng.randrange(self.num_pages)) for _ in range(5)] + [self.url((page + 1) % self.num_pages)]
+        links.append(f"/private/{page}")
+        anchors = "".join(f'<a href="{link}">link</a> ' for link in links)
+        return (f"<html><head><title>Page {page}</title><script>var x = 1;</script></head>"
+                f"<body><p>{self.text(page)}</p>{anchors}</body></html>")
+
+    def big_html(self):
+        paragraphs = "".join(f"<p>{self.text(page)}</p>" for page in range(600))
+        return f"<html><head><title>Big page</title></head><body>{paragraphs}<a href=\"/tail\">tail</a></body></html>"
+
+    async def start(self):
+        from aiohttp import web
+
+        async def page(request):
+            await asyncio.sleep(self.latency)
+            number = int(request.match_info["number"])
+            if number >= self.num_pages:
+                raise web.HTTPNotFound()
+            return web.Response(text=self.html(number), content_type="text/html")
+
+        async def big(request):
+            return web.Response(text=self.big_html(), content_type="text/html")
+
+        async def tail(request):
+            return web.Response(text=TAIL_HTML, content_type="text/html")
+
+        async def robots(request):
+            return web.Response(text="User-agent: *\nDisallow: /private/\n")
+
+        @web.middleware
+        async def count(request, handler):
+            self.requests[request.path] += 1
+            return await handler(request)
+
+        app = web.Application(middlewares=[count])
+        app.router.add_get("/page/{number}", page)
+        app.router.add_get("/big", big)
+        app.router.add_get("/tail", tail)
+        app.router.add_get("/robots.txt", robots)
+        for port in self.ports:
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+            self.runners.append(runner)
+
+    async def stop(self):
+        for runner in self.runners:
+            await runner.cleanup()
+
+async def crawl(site, db_path, concurrency, per_host_rate, max_pages=None, seeds=None):
+    crawler = Crawler(db_path, concurrency, per_host_rate, max_pages=max_pages, max_depth=10_000)
+    try:
+        return await crawler.crawl([site.url(0)] if seeds is None else seeds)
+    finally:
+        crawler.close()
+
+async def run(args):
+    site = FixtureSite(args.num_pages, args.num_hosts, args.latency_ms / 1000, args.base_port)
+    await site.start()
+    unique = args.num_pages - args.num_pages // 10
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print(f"{args.num_pages} pages ({unique} unique) on {args.num_hosts} hosts, "
+                  f"{args.latency_ms:.0f} ms server latency, {args.per_host_rate or 'unlimited'} req/s per host")
+            for concurrency in map(int, args.concurrency.split(",")):
+                stats = await crawl(site, os.path.join(work_dir, f"c{concurrency}.sqlite3"), concurrency,
+                                    args.per_host_rate)
+                print(f"  concurrency {concurrency:>3}: {stats['fetched'] / stats['seconds']:7.1f} pages/sec | "
+                      f"{stats['stored']} stored, {stats['duplicates']} duplicates, {stats['skipped']} skipped "
+                      f"(robots.txt), {stats['failed']} failed in {stats['seconds']:.1f}s")
+
+            # Stop halfway, then resume from the SQLite store without seeds
+            db_path = os.path.join(work_dir, "resume.sqlite3")
+            concurrency = int(args.concurrency.split(",")[-1])
+            first = await crawl(site, db_path, concurrency, args.per_host_rate, max_pages=unique // 2)
+            first_stored = first["stored"]
+            second = await crawl(site, db_path, concurrency, args.per_host_rate, seeds=[])
+            with sqlite3.connect(db_path) as conn:
+                rows, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT content_hash) FROM pages").fetchone()
+            print(f"  resume: {first_stored} pages, then {second['stored'] - first_stored} more after restart; "
+                  f"{rows} rows, {distinct} distinct contents (expected {unique})")
+
+            # A body spanning many reads must arrive whole, with a stable hash, and its last link must be followed
+            big_url = f"http://127.0.0.1:{site.ports[0]}/big"
+            hashes = set()
+            for run in range(2):
+                db_path = os.path.join(work_dir, f"big{run}.sqlite3")
+                stats = await crawl(site, db_path, concurrency, args.per_host_rate, seeds=[big_url])
+                with sqlite3.connect(db_path) as conn:
+                    hashes.update(h for (h,) in conn.execute("SELECT content_hash FROM pages WHERE url = ?", (big_url,)))
+                    tail_found = conn.execute("SELECT COUNT(*) FROM pages WHERE url LIKE '%/tail'").fetchone()[0]
+            served = len(site.big_html().encode()) + len(TAIL_HTML.encode())
+            print(f"  large page: {served} bytes served, {stats['bytes']} read; /tail followed: {bool(tail_found)}; "
+                  f"{len(hashes)} distinct content hash(es) over 2 fetches")
+    finally:
+        await site.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Pages/sec of crawler.py against a local fixture site")
+    parser.add_argument("--num-pages", type=int, default=2000)
+    parser.add_argument("--num-hosts", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated server response time")
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--per-host-rate", type=float, default=0, help="requests/sec per host; 0 = no limit")
+    parser.add_argument("--base-port", type=int, default=18080)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
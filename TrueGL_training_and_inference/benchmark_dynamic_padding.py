@@ -0,0 +1,100 @@
+import argparse
+import time
+
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+
+from dynamic_padding import DynamicPaddingCollator, LengthGroupedBatchSampler, padding_ratio
+from finetune_granite_on_articles import MAX_LENGTH, StatementDataset
+from granite_inference import MAX_LENGTH_PREDICTION, PredictionDataset, load_causal_lm
+
+def build_dataset(kind, df, tokenizer, max_length, padding):
+    if kind == "train":
+        return StatementDataset(df['statement'].tolist(), df['labels'].tolist(), tokenizer, max_length, padding)
+    return PredictionDataset(df['statement'].tolist(), tokenizer, max_length, padding)
+
+def run_batches(model, dataloader, num_batches, train):
+    """Return (real tokens/sec, padded tokens/sec) over the first num_batches batches."""
+    real_tokens = padded_tokens = 0
+    start = time.perf_counter()
+    for step, batch in enumerate(dataloader):
+        if step == num_batches:
+            break
+        batch = {k: v.to(model.device) for k, v in batch.items()}
+        if train:
+            labels = batch.get("labels", batch["input_ids"])
+            model(**{**batch, "labels": labels}).loss.backward()
+            model.zero_grad(set_to_none=True)
+        else:
+            with torch.no_grad():
+                model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+        real_tokens += batch["attention_mask"].sum().item()
+        padded_tokens += batch["input_ids"].numel()
+    elapsed = time.perf_counter() - start
+    return real_tokens / elapsed, padded_tokens / elapsed
+
+def max_feasible_batch_size(model, make_loader, train, limit=256):
+    """Double the batch size on the longest batch until CUDA runs out of memory."""
+    if model.device.type != "cuda":
+        return None
+    best, batch_size = 0, 1
+    while batch_size <= limit:
+        try:
+            # Unshuffled, the length-grouped sampler yields its longest batch first
+            batch = next(iter(make_loader(batch_size, shuffle=False)))
+            run_batches(model, [batch], 1, train)
+            best = batch_size
+            batch_size *= 2
+        except torch.cuda.OutOfMemoryError:
+            break
+        finally:
+            torch.cuda.empty_cache()
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare max_length padding with length-grouped dynamic padding")
+    parser.add_argument("--model-path", required=True)
+    parser.add_argument("--csv-path", default="val_articles_fine_tuning.csv")
+    parser.add_argument("--kind", choices=["train", "predict"], default="train",
+                        help="StatementDataset (training) or PredictionDataset (batch inference)")
+    parser.add_argument("--num-rows", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=7)
+    parser.add_argument("--num-batches", type=int, default=10)
+    parser.add_argument("--max-length", type=int, default=None)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    train = args.kind == "train"
+    max_length = args.max_length or (MAX_LENGTH if train else MAX_LENGTH_PREDICTION)
+    df = pd.read_csv(args.csv_path).head(args.num_rows)
+    tokenizer, model = load_causal_lm(args.model_path, args.device)
+    if train:
+        model.train()
+    padding_side = "right" if train else "left"
+
+    dynamic = build_dataset(args.kind, df, tokenizer, max_length, padding=False)
+    lengths = dynamic.lengths()
+    fixed = build_dataset(args.kind, df, tokenizer, max_length, padding="max_length")
+
+    def fixed_loader(batch_size, shuffle=False):
+        return DataLoader(fixed, batch_size=batch_size, shuffle=shuffle)
+
+    def dynamic_loader(batch_size, shuffle=train):
+        sampler = LengthGroupedBatchSampler(lengths, batch_size, shuffle=shuffle)
+        return DataLoader(dynamic, batch_sampler=sampler,
+                          collate_fn=DynamicPaddingCollator(tokenizer.pad_token_id, 8, padding_side))
+
+    sorted_batches = list(LengthGroupedBatchSampler(lengths, args.batch_size, shuffle=train))
+    fixed_ratio = 1 - sum(lengths) / (len(lengths) * max_length)
+    print(f"{len(lengths)} samples, mean length {sum(lengths) / len(lengths):.0f} tokens, max_length {max_length}")
+    print(f"padding ratio: max_length {fixed_ratio:.1%} -> dynamic {padding_ratio(lengths, sorted_batches):.1%}")
+
+    for name, make_loader in (("max_length", fixed_loader), ("dynamic", dynamic_loader)):
+        real, padded = run_batches(model, make_loader(args.batch_size), args.num_batches, train)
+        best = max_feasible_batch_size(model, make_loader, train)
+        feasible = f", max feasible batch size {best}" if best is not None else ""
+        print(f"{name:>10}: {real:9.1f} real tokens/sec ({padded:9.1f} incl. padding){feasible}")
+
+if __name__ == "__main__":
+    main()
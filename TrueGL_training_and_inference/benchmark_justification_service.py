@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from granite_inference import BASE_MODEL_PATH, MAX_LENGTH_JUSTIFICATION, build_justification_prompt, load_causal_lm
+from justification_service import TEMPERATURE, TOP_P, REPETITION_PENALTY, JustificationService
+
+def load_requests(csv_path, num_requests):
+    if csv_path:
+        df = pd.read_csv(csv_path).head(num_requests)
+        scores = df['labels'] if 'labels' in df else [0.5] * len(df)
+        return list(zip(df['statement'].tolist(), scores))
+    return [(f"Claim {i}: the city council approved a new budget for public transport in {2000 + i}.", (i % 10) / 10)
+            for i in range(num_requests)]
+
+def static_batches(model, tokenizer, requests, batch_size, max_new_tokens, interval):
+    """The notebook's path: generate() over fixed batches; nothing is visible until a batch completes.
+
+    A batch starts once its last request has arrived (requests arrive every `interval` seconds).
+    """
+    tokenizer.padding_side = "left"
+    start = time.perf_counter()
+    ttft, tokens = [], 0
+    with torch.inference_mode():
+        for i in range(0, len(requests), batch_size):
+            prompts = [build_justification_prompt(s, score) for s, score in requests[i:i + batch_size]]
+            time.sleep(max(0.0, start + (i + len(prompts) - 1) * interval - time.perf_counter()))
+            batch = tokenizer(prompts, truncation=True, max_length=MAX_LENGTH_JUSTIFICATION, padding=True,
+                              return_tensors="pt").to(model.device)
+            outputs = model.generate(**batch, max_new_tokens=max_new_tokens, do_sample=True, temperature=TEMPERATURE,
+                                     top_p=TOP_P, repetition_penalty=REPETITION_PENALTY,
+                                     pad_token_id=tokenizer.pad_token_id)
+            new_tokens = outputs[:, batch["input_ids"].shape[1]:]
+            tokens += int((new_tokens != tokenizer.pad_token_id).sum())
+            done = time.perf_counter() - start
+            ttft += [done - (i + j) * interval for j in range(len(prompts))]
+    return ttft, tokens, time.perf_counter() - start
+
+async def stream_in_process(service, requests, max_new_tokens, interval):
+    async def one(i, statement, score):
+        await asyncio.sleep(i * interval)
+        start = time.perf_counter()
+        first = None
+        async for _ in service.stream(statement, score, max_new_tokens):
+            first = first or time.perf_counter()
+        return (first or time.perf_counter()) - start, time.perf_counter() - start
+    return await asyncio.gather(*[one(i, s, score) for i, (s, score) in enumerate(requests)])
+
+async def stream_http(url, requests, max_new_tokens, interval):
+    import aiohttp
+
+    async def one(session, i, statement, score):
+        await asyncio.sleep(i * interval)
+        start = time.perf_counter()
+        first = None
+        payload = {"statement": statement, "score": score, "max_new_tokens": max_new_tokens}
+        async with session.post(f"{url}/justify", json=payload) as response:
+            async for line in response.content:
+                if line.startswith(b"data:") and first is None and "text" in json.loads(line[5:]):
+                    first = time.perf_counter()
+        return (first or time.perf_counter()) - start, time.perf_counter() - start
+
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*[one(session, i, s, score) for i, (s, score) in enumerate(requests)])
+
+def report(name, ttft, tokens, elapsed):
+    ttft_ms = np.array(ttft) * 1000
+    print(f"{name:>22}: TTFT p50 {np.percentile(ttft_ms, 50):8.0f} ms, p95 {np.percentile(ttft_ms, 95):8.0f} ms | "
+          f"{tokens / elapsed:7.1f} tokens/sec aggregate over {elapsed:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="TTFT and tokens/sec of the streaming justification service under load")
+    parser.add_argument("--model-path", default=BASE_MODEL_PATH, help="a small stand-in causal LM works on CPU")
+    parser.add_argument("--csv-path", default=None, help="statements/labels CSV; defaults to synthetic statements")
+    parser.add_argument("--num-requests", type=int, default=40)
+    parser.add_argument("--arrival-interval", type=float, default=0.0, help="seconds between request arrivals")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--static-batch-size", type=int, default=20, help="the notebook's BATCH_SIZE_JUSTIFICATION")
+    parser.add_argument("--url", default=None, help="benchmark a running justification_service.py instead")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    requests = load_requests(args.csv_path, args.num_requests)
+    if args.url:
+        start = time.perf_counter()
+        results = asyncio.run(stream_http(args.url, requests, args.max_new_tokens, args.arrival_interval))
+        elapsed = time.perf_counter() - start
+        print(f"{'streaming (HTTP)':>22}: TTFT p50 {np.percentile([r[0] for r in results], 50) * 1000:8.0f} ms, "
+              f"p95 {np.percentile([r[0] for r in results], 95) * 1000:8.0f} ms | {elapsed:.1f}s for {len(results)} requests")
+        return
+
+    tokenizer, model = load_causal_lm(args.model_path, args.device)
+    print(f"{len(requests)} requests, {args.max_new_tokens} new tokens max, arrivals every {args.arrival_interval}s")
+    ttft, tokens, elapsed = static_batches(model, tokenizer, requests, args.static_batch_size, args.max_new_tokens,
+                                          args.arrival_interval)
+    report(f"static batches of {args.static_batch_size}", ttft, tokens, elapsed)
+
+    service = JustificationService(tokenizer=tokenizer, model=model, max_batch_size=args.max_batch_size)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(stream_in_process(service, requests, args.max_new_tokens, args.arrival_interval))
+        elapsed = time.perf_counter() - start
+        report("continuous batching", [r[0] for r in results], service.metrics()["tokens"], elapsed)
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
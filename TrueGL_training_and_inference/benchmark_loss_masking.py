@@ -0,0 +1,120 @@
+import argparse
+import time
+
+import pandas as pd
+import torch
+from transformers import TrainingArguments
+
+from dynamic_padding import DynamicPaddingCollator
+from finetune_granite_on_articles import MAX_LENGTH, LengthGroupedTrainer, StatementDataset, split_data
+from granite_inference import load_causal_lm
+from packing import PackedDataset, PackingCollator
+
+MODES = {
+    # name: (loss_masking, packing)
+    "full": ("full", False),
+    "label": ("label", False),
+    "label+packing": ("label", True),
+}
+
+class TokenCountingCollator:
+    """Wrap a collator and count real (non-padding) and supervised tokens per training batch."""
+
+    def __init__(self, collator):
+        self.collator = collator
+        self.real_tokens = self.supervised_tokens = 0
+
+    def __call__(self, features):
+        self.real_tokens += sum(len(f["input_ids"]) for f in features)
+        batch = self.collator(features)
+        self.supervised_tokens += (batch["labels"][:, 1:] != -100).sum().item()
+        return batch
+
+class CountingTrainer(LengthGroupedTrainer):
+    """Evaluate with the wrapped collator so only training batches are counted."""
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        counting, self.data_collator = self.data_collator, self.data_collator.collator
+        try:
+            return super().get_eval_dataloader(eval_dataset)
+        finally:
+            self.data_collator = counting
+
+def run_mode(name, args, train_df, val_df):
+    loss_masking, packing = MODES[name]
+    tokenizer, model = load_causal_lm(args.model_path, args.device)
+    model.train()
+    train_dataset = StatementDataset(train_df['statement'].tolist(), train_df['labels'].tolist(),
+                                     tokenizer, args.max_length, padding=False, loss_masking=loss_masking)
+    # Every mode is evaluated on label-only loss, so the curves measure the same thing
+    val_dataset = StatementDataset(val_df['statement'].tolist(), val_df['labels'].tolist(),
+                                   tokenizer, args.max_length, padding=False, loss_masking="label")
+    if packing:
+        train_dataset = PackedDataset(train_dataset, args.max_length)
+        collator = PackingCollator(tokenizer.pad_token_id, mask_dtype=model.dtype)
+    else:
+        collator = DynamicPaddingCollator(tokenizer.pad_token_id)
+    counter = TokenCountingCollator(collator)
+
+    training_args = TrainingArguments(
+        output_dir=args.output_dir,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        max_steps=args.steps,
+        learning_rate=args.learning_rate,
+        eval_strategy="steps",
+        eval_steps=args.eval_steps,
+        logging_steps=args.eval_steps,
+        save_strategy="no",
+        report_to="none",
+        use_cpu=args.device == "cpu",
+    )
+    trainer = CountingTrainer(model=model, args=training_args, train_dataset=train_dataset,
+                              eval_dataset=val_dataset, data_collator=counter)
+
+    start = time.perf_counter()
+    trainer.train()
+    eval_seconds = sum(log["eval_runtime"] for log in trainer.state.log_history if "eval_runtime" in log)
+    elapsed = time.perf_counter() - start - eval_seconds
+    curve = [(log["step"], log["eval_loss"]) for log in trainer.state.log_history if "eval_loss" in log]
+    return {
+        "mode": name,
+        "steps/sec": args.steps / elapsed,
+        "tokens/sec": counter.real_tokens / elapsed,
+        "supervised tokens/sec": counter.supervised_tokens / elapsed,
+        "curve": curve,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-sequence loss with label-only loss and packing")
+    parser.add_argument("--model-path", required=True)
+    parser.add_argument("--csv-path", default="val_articles_fine_tuning.csv")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--num-rows", type=int, default=512)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--eval-steps", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=7)
+    parser.add_argument("--learning-rate", type=float, default=3e-5)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--output-dir", default="loss_masking_benchmark")
+    parser.add_argument("--curve-csv", default=None, help="optionally write the validation loss curves here")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv_path).head(args.num_rows)
+    train_df, val_df = split_data(df)
+    results = [run_mode(name, args, train_df, val_df) for name in args.modes]
+
+    print(f"\n{'mode':>14} {'steps/sec':>10} {'tokens/sec':>11} {'supervised/sec':>15}")
+    for r in results:
+        print(f"{r['mode']:>14} {r['steps/sec']:10.2f} {r['tokens/sec']:11.1f} {r['supervised tokens/sec']:15.1f}")
+    print("\nValidation loss (label tokens only):")
+    for r in results:
+        print(f"{r['mode']:>14}: " + "  ".join(f"{step}:{loss:.3f}" for step, loss in r["curve"]))
+    if args.curve_csv:
+        rows = [{"mode": r["mode"], "step": step, "eval_loss": loss} for r in results for step, loss in r["curve"]]
+        pd.DataFrame(rows).to_csv(args.curve_csv, index=False)
+        print(f"Saved curves to {args.curve_csv}")
+
+if __name__ == "__main__":
+    main()
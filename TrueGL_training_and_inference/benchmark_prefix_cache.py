@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import torch
+
+from benchmark_justification_service import load_requests, stream_in_process
+from granite_inference import BASE_MODEL_PATH, MAX_LENGTH_JUSTIFICATION, build_justification_prompt, load_causal_lm
+from justification_service import JustificationService
+from prefix_cache import SharedPrefixCache
+
+def time_prefill(model, tokenizer, prefix_cache, requests, batch_size, repeats):
+    """Median seconds to prefill one batch of prompts, whole vs. suffix-only on top of the cached prefix."""
+    prompts = [tokenizer(build_justification_prompt(s, score), truncation=True,
+                         max_length=MAX_LENGTH_JUSTIFICATION)["input_ids"] for s, score in requests[:batch_size]]
+    width = max(map(len, prompts))
+    input_ids = torch.full((len(prompts), width), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, ids in enumerate(prompts):
+        input_ids[row, width - len(ids):] = torch.tensor(ids)
+        attention_mask[row, width - len(ids):] = 1
+    full = dict(input_ids=input_ids.to(model.device), attention_mask=attention_mask.to(model.device),
+                position_ids=(attention_mask.cumsum(dim=1) - 1).clamp(min=0).to(model.device))
+    suffix_ids, suffix_mask, suffix_positions = prefix_cache.prefill_inputs(
+        [prefix_cache.suffix(ids) for ids in prompts], tokenizer.pad_token_id)
+
+    def run(with_prefix):
+        if with_prefix:
+            model(input_ids=suffix_ids.to(model.device), attention_mask=suffix_mask.to(model.device),
+                  position_ids=suffix_positions.to(model.device), past_key_values=prefix_cache.expand(len(prompts)),
+                  use_cache=True)
+        else:
+            model(**full, use_cache=True)
+
+    timings = {}
+    with torch.inference_mode():
+        for with_prefix in (False, True):
+            run(with_prefix)  # warm-up
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run(with_prefix)
+                samples.append(time.perf_counter() - start)
+            timings[with_prefix] = float(np.median(samples))
+    return timings, width, suffix_ids.shape[1]
+
+def end_to_end(model, tokenizer, requests, max_new_tokens, interval, prefix_reuse):
+    service = JustificationService(tokenizer=tokenizer, model=model, prefix_reuse=prefix_reuse)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(stream_in_process(service, requests, max_new_tokens, interval))
+        return results, time.perf_counter() - start
+    finally:
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefill time and justification latency with and without reusing "
+                                                 "the few-shot prefix KV cache")
+    parser.add_argument("--model-path", default=BASE_MODEL_PATH, help="a small stand-in causal LM works on CPU")
+    parser.add_argument("--csv-path", default=None, help="statements/labels CSV; defaults to synthetic statements")
+    parser.add_argument("--num-requests", type=int, default=32)
+    parser.add_argument("--batch-sizes", default="1,4,16")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--arrival-interval", type=float, default=0.05, help="seconds between request arrivals")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    tokenizer, model = load_causal_lm(args.model_path, args.device)
+    requests = load_requests(args.csv_path, args.num_requests)
+
+    start = time.perf_counter()
+    prefix_cache = SharedPrefixCache(model, tokenizer)
+    print(f"Prefix: {len(prefix_cache)} tokens, cached once in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print("\nPrefill (median per batch):")
+    for batch_size in map(int, args.batch_sizes.split(",")):
+        timings, width, suffix_width = time_prefill(model, tokenizer, prefix_cache, requests, batch_size, args.repeats)
+        print(f"  batch {batch_size:>3}: full prompt ({width} tokens) {timings[False] * 1000:8.1f} ms | "
+              f"suffix only ({suffix_width} tokens) {timings[True] * 1000:8.1f} ms | "
+              f"{timings[False] / timings[True]:.1f}x")
+
+    print(f"\nEnd to end: {len(requests)} requests, arrivals every {args.arrival_interval}s, "
+          f"{args.max_new_tokens} new tokens max")
+    for prefix_reuse in (False, True):
+        results, elapsed = end_to_end(model, tokenizer, requests, args.max_new_tokens, args.arrival_interval, prefix_reuse)
+        ttft = np.array([r[0] for r in results]) * 1000
+        total = np.array([r[1] for r in results]) * 1000
+        name = "prefix reuse" if prefix_reuse else "full prefill"
+        print(f"  {name:>12}: TTFT p50 {np.percentile(ttft, 50):7.0f} ms, p95 {np.percentile(ttft, 95):7.0f} ms | "
+              f"latency p50 {np.percentile(total, 50):7.0f} ms, p95 {np.percentile(total, 95):7.0f} ms | {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
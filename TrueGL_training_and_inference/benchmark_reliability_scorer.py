@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+
+from granite_inference import (
+    CHECKPOINTS_DIR,
+    MAX_LENGTH_PREDICTION,
+    MAX_NEW_TOKENS_PREDICTION,
+    PredictionDataset,
+    extract_label,
+    get_latest_checkpoint,
+    load_causal_lm,
+)
+from reliability_scorer import GraniteReliabilityScorer
+
+def generate_scores(model, tokenizer, statements, batch_size, max_length):
+    """The notebook's reliability pass: generate(), decode, regex-parse, -1.0 on failure."""
+    dataloader = DataLoader(PredictionDataset(statements, tokenizer, max_length), batch_size=batch_size, shuffle=False)
+    scores = []
+    with torch.no_grad():
+        for batch in dataloader:
+            outputs = model.generate(
+                input_ids=batch["input_ids"].to(model.device),
+                attention_mask=batch["attention_mask"].to(model.device),
+                max_new_tokens=MAX_NEW_TOKENS_PREDICTION,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id
+            )
+            for text in tokenizer.batch_decode(outputs, skip_special_tokens=True):
+                label = extract_label(text)
+                scores.append(-1.0 if label is None else min(max(label, 0.0), 1.0))
+    return np.array(scores)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare score-only Granite inference with the generate()-based path")
+    parser.add_argument("--model-path", default=None, help="defaults to the latest checkpoint in CHECKPOINTS_DIR")
+    parser.add_argument("--csv-path", default="val_articles_fine_tuning.csv")
+    parser.add_argument("--num-rows", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH_PREDICTION)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    model_path = args.model_path or get_latest_checkpoint(CHECKPOINTS_DIR)
+    df = pd.read_csv(args.csv_path)
+    df = df.sample(n=min(args.num_rows, len(df)), random_state=42).reset_index(drop=True)
+    statements = df['statement'].tolist()
+
+    tokenizer, model = load_causal_lm(model_path, args.device)
+    scorer = GraniteReliabilityScorer(model_path, tokenizer=tokenizer, model=model, max_length=args.max_length)
+
+    start = time.perf_counter()
+    generated = generate_scores(model, tokenizer, statements, args.batch_size, args.max_length)
+    generate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scored = np.array([r["score"] for r in scorer.score_batch(statements, batch_size=args.batch_size)])
+    score_time = time.perf_counter() - start
+
+    parsed = generated != -1.0
+    print(f"generate() path : {len(statements) / generate_time:7.2f} statements/sec, "
+          f"{(~parsed).sum()} parse failures")
+    print(f"score-only path : {len(statements) / score_time:7.2f} statements/sec, 0 parse failures "
+          f"({generate_time / score_time:.1f}x faster)")
+    if parsed.any():
+        diff = np.abs(generated[parsed] - scored[parsed])
+        print(f"agreement on parsed rows: MAE {diff.mean():.4f}, "
+              f"|Δ| <= 0.1 for {(diff <= 0.1).mean():.1%}, same side of 0.5 for "
+              f"{((generated[parsed] >= 0.5) == (scored[parsed] >= 0.5)).mean():.1%}")
+    if 'labels' in df.columns:
+        labels = df['labels'].to_numpy(dtype=float)
+        generate_mae = f"{np.abs(generated[parsed] - labels[parsed]).mean():.4f}" if parsed.any() else "n/a"
+        print(f"MAE vs labels: generate {generate_mae} (parsed rows only), "
+              f"score-only {np.abs(scored - labels).mean():.4f} (all rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from search_index import SearchIndex, build_index, index_size
+
+def synthetic_pages(num_docs, vocab_size, doc_words, seed, chunk=10_000):
+    """Pages whose words follow a Zipf distribution, like natural text; every fifth one has a truth score."""
+    rng = np.random.default_rng(seed)
+    probs = 1.0 / np.arange(1, vocab_size + 1)
+    probs /= probs.sum()
+    words = np.array([f"term{i}" for i in range(vocab_size)])
+    for start in range(0, num_docs, chunk):
+        n = min(chunk, num_docs - start)
+        lengths = rng.integers(doc_words // 2, doc_words * 3 // 2, size=n)
+        tokens = words[rng.choice(vocab_size, size=int(lengths.sum()), p=probs)]
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        for i in range(n):
+            yield f"https://example.org/{start + i}", f"Page {start + i}", " ".join(tokens[bounds[i]:bounds[i + 1]])
+
+def sample_queries(num_queries, vocab_size, seed):
+    """1-3 term queries; terms are drawn log-uniformly over frequency ranks, so both head and tail terms appear."""
+    rng = np.random.default_rng(seed)
+    ranks = np.exp(rng.uniform(0, np.log(vocab_size), size=(num_queries, 3))).astype(int) - 1
+    return [" ".join(f"term{r}" for r in row[:rng.integers(1, 4)]) for row in ranks]
+
+def main():
+    parser = argparse.ArgumentParser(description="Index size and query latency of search_index.py")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated corpus sizes")
+    parser.add_argument("--vocab-size", type=int, default=100_000)
+    parser.add_argument("--doc-words", type=int, default=80, help="average words per page")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--work-dir", default=None, help="where to build the indexes (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="search_index_bench_")
+    queries = sample_queries(args.num_queries, args.vocab_size, args.seed)
+    print(f"{'docs':>9} | {'build s':>8} | {'postings':>11} | {'B/posting':>9} | {'postings MB':>11} | "
+          f"{'index MB':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7}")
+    try:
+        for num_docs in map(int, args.sizes.split(",")):
+            out_dir = os.path.join(work_dir, f"index_{num_docs}")
+            pages = synthetic_pages(num_docs, args.vocab_size, args.doc_words, args.seed)
+            truth = {f"https://example.org/{i}": (i % 10) / 10 for i in range(0, num_docs, 5)}
+            start = time.perf_counter()
+            build_index(pages, out_dir, truth)
+            build_seconds = time.perf_counter() - start
+
+            index = SearchIndex(out_dir)
+            num_postings = int(index.doc_freqs.sum())
+            sizes = index_size(out_dir)
+            # Everything but the page text kept for result snippets
+            index_bytes = sum(v for name, v in sizes.items() if name != "docs.jsonl")
+            for query in queries[:10]:
+                index.search(query, args.k)  # warm the page cache
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                index.search(query, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"{num_docs:>9} | {build_seconds:>8.1f} | {num_postings:>11} | "
+                  f"{sizes['postings.bin'] / num_postings:>9.2f} | {sizes['postings.bin'] / 1e6:>11.1f} | "
+                  f"{index_bytes / 1e6:>8.1f} | {np.percentile(latencies, 50):>7.2f} | "
+                  f"{np.percentile(latencies, 95):>7.2f} | {np.percentile(latencies, 99):>7.2f}")
+            del index
+            if not args.work_dir:
+                shutil.rmtree(out_dir)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print("Uncompressed postings would take 8 B each (4 B doc id + 4 B term frequency).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from torch.utils.data import DataLoader
+from transformers import AutoTokenizer
+
+from dynamic_padding import DynamicPaddingCollator
+from finetune_granite_on_articles import MAX_LENGTH, CachedStatementDataset, StatementDataset
+from token_cache import GRANITE_TEMPLATE, build_token_cache
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def epoch_throughput(dataset, collate_fn, batch_size):
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=collate_fn)
+    _, elapsed = timed(lambda: sum(1 for _ in loader))
+    return len(dataset) / elapsed
+
+def report(name, startup, throughput):
+    print(f"{name:>24}: startup {startup:7.2f}s | epoch {throughput:9.1f} samples/sec")
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and epoch throughput with and without the token cache")
+    parser.add_argument("--preset", choices=["granite", "liar"], default="granite")
+    parser.add_argument("--csv-path", required=True)
+    parser.add_argument("--tokenizer", required=True)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--cache-dir", default=None, help="defaults to a fresh temporary directory")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="token_cache_")
+
+    if args.preset == "liar":
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Demo UI Code"))
+        from train import CachedLiarDataset, LiarDataset
+
+        collate = DynamicPaddingCollator(tokenizer.pad_token_id)
+        dataset, startup = timed(lambda: LiarDataset(args.csv_path, tokenizer))
+        report("LiarDataset", startup, epoch_throughput(dataset, None, args.batch_size))
+        _, build = timed(lambda: CachedLiarDataset(args.csv_path, tokenizer, cache_dir))
+        dataset, startup = timed(lambda: CachedLiarDataset(args.csv_path, tokenizer, cache_dir))
+        print(f"{'one-time preprocessing':>24}: {build:7.2f}s")
+        report("CachedLiarDataset", startup, epoch_throughput(dataset, collate, args.batch_size))
+        return
+
+    df = pd.read_csv(args.csv_path)
+    collate = DynamicPaddingCollator(tokenizer.pad_token_id)
+    dataset, startup = timed(lambda: StatementDataset(df['statement'].tolist(), df['labels'].tolist(),
+                                                      tokenizer, MAX_LENGTH, padding=False))
+    report("StatementDataset", startup, epoch_throughput(dataset, collate, args.batch_size))
+    _, build = timed(lambda: build_token_cache(args.csv_path, tokenizer, cache_dir, GRANITE_TEMPLATE, MAX_LENGTH))
+    print(f"{'one-time preprocessing':>24}: {build:7.2f}s")
+
+    def open_cached():
+        cache = build_token_cache(args.csv_path, tokenizer, cache_dir, GRANITE_TEMPLATE, MAX_LENGTH)
+        return CachedStatementDataset(cache, tokenizer.pad_token_id, MAX_LENGTH, padding=False)
+    dataset, startup = timed(open_cached)
+    report("CachedStatementDataset", startup, epoch_throughput(dataset, collate, args.batch_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from granite_inference import CHECKPOINTS_DIR, MAX_LENGTH_PREDICTION, get_latest_checkpoint
+from reliability_scorer import GraniteReliabilityScorer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Demo UI Code"))
+from inference import TruthSeekerInference, truth_score  # noqa: E402
+
+# === CONFIG ===
+CLASSIFIER_PATH = "models/finetuned"  # BERT 3-class checkpoint used by the demo app
+CONFIDENCE_THRESHOLD = 0.8  # app.py calls softmax confidence above 80% "High confidence"
+CLASSIFIER_BATCH_SIZE = 32
+GRANITE_BATCH_SIZE = 8
+
+STAGE_CLASSIFIER = "classifier"
+STAGE_GRANITE = "granite"
+
+class CascadeScorer:
+    """Reliability in [0, 1] from the BERT classifier, escalating uncertain inputs to Granite.
+
+    Every input is scored by the classifier; its reliability is the expected truth score
+    P(True) + 0.5 * P(Mixed). Inputs whose softmax confidence is below
+    `confidence_threshold` are re-scored together, in batches, by Granite's score-only
+    reliability pass, whose score replaces the classifier's. Each result records the
+    stage that produced its score. Granite is only loaded on the first escalation, so a
+    threshold of 0 never pays for it.
+    """
+
+    def __init__(self, classifier, granite=None, granite_path=None, confidence_threshold=CONFIDENCE_THRESHOLD,
+                 classifier_batch_size=CLASSIFIER_BATCH_SIZE, granite_batch_size=GRANITE_BATCH_SIZE,
+                 granite_max_length=MAX_LENGTH_PREDICTION, device=None):
+        if granite is None and granite_path is None:
+            raise ValueError("Pass a GraniteReliabilityScorer or a granite_path to load one from")
+        self.classifier = classifier
+        self._granite = granite
+        self.granite_path = granite_path
+        self.confidence_threshold = confidence_threshold
+        self.classifier_batch_size = classifier_batch_size
+        self.granite_batch_size = granite_batch_size
+        self.granite_max_length = granite_max_length
+        self.device = device
+        self.counts = {STAGE_CLASSIFIER: 0, STAGE_GRANITE: 0}
+        self.seconds = {STAGE_CLASSIFIER: 0.0, STAGE_GRANITE: 0.0}
+
+    @property
+    def granite(self):
+        if self._granite is None:
+            self._granite = GraniteReliabilityScorer(self.granite_path, device=self.device,
+                                                     max_length=self.granite_max_length)
+        return self._granite
+
+    def score_batch(self, texts, long_documents=False):
+        """{"score", "stage", "classifier_score", "confidence", "label"} per text, plus "granite_score" if escalated.
+
+        long_documents scores the classifier stage with predict_long (overlapping windows)
+        instead of truncating each text to the classifier's max_length.
+        """
+        texts = [str(t) for t in texts]
+        start = time.perf_counter()
+        if long_documents:
+            predictions = self.classifier.predict_long(texts, batch_size=self.classifier_batch_size)
+        else:
+            predictions = self.classifier.predict_batch(texts, batch_size=self.classifier_batch_size)
+        self.seconds[STAGE_CLASSIFIER] += time.perf_counter() - start
+        results = []
+        for prediction in predictions:
+            score = truth_score(prediction["probabilities"])
+            results.append({
+                "score": score,
+                "stage": STAGE_CLASSIFIER,
+                "classifier_score": score,
+                "confidence": prediction["confidence"],
+                "label": prediction["label"],
+            })
+        escalate = [i for i, result in enumerate(results) if result["confidence"] < self.confidence_threshold]
+        if escalate:
+            start = time.perf_counter()
+            scored = self.granite.score_batch([texts[i] for i in escalate], batch_size=self.granite_batch_size)
+            self.seconds[STAGE_GRANITE] += time.perf_counter() - start
+            for i, granite_result in zip(escalate, scored):
+                results[i].update(score=granite_result["score"], stage=STAGE_GRANITE,
+                                  granite_score=granite_result["score"])
+        self.counts[STAGE_GRANITE] += len(escalate)
+        self.counts[STAGE_CLASSIFIER] += len(texts) - len(escalate)
+        return results
+
+    def score(self, text):
+        return self.score_batch([text])[0]["score"]
+
+    def stats(self):
+        total = sum(self.counts.values())
+        return {
+            "scored": total,
+            "escalated": self.counts[STAGE_GRANITE],
+            "escalation_rate": self.counts[STAGE_GRANITE] / total if total else 0.0,
+            "classifier_seconds": self.seconds[STAGE_CLASSIFIER],
+            "granite_seconds": self.seconds[STAGE_GRANITE],
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Score statements with the BERT -> Granite confidence cascade")
+    parser.add_argument("--csv-path", required=True, help="CSV with a 'statement' column")
+    parser.add_argument("--output", default="cascade_scores.csv")
+    parser.add_argument("--classifier-path", default=CLASSIFIER_PATH)
+    parser.add_argument("--granite-path", default=None, help="defaults to the latest checkpoint in CHECKPOINTS_DIR")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--long-documents", action="store_true", help="classifier reads whole articles in windows")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv_path)
+    cascade = CascadeScorer(TruthSeekerInference(args.classifier_path, device=args.device),
+                            granite_path=args.granite_path or get_latest_checkpoint(CHECKPOINTS_DIR),
+                            confidence_threshold=args.threshold, device=args.device)
+    results = pd.DataFrame(cascade.score_batch(df["statement"].tolist(), long_documents=args.long_documents))
+    df["reliability"] = results["score"]
+    df["stage"] = results["stage"]
+    df["classifier_confidence"] = results["confidence"]
+    df.to_csv(args.output, index=False)
+    print(json.dumps(cascade.stats(), indent=2))
+    print(f"Wrote {len(df)} scores to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import argparse
+import asyncio
+import hashlib
+import heapq
+import math
+import sqlite3
+import time
+from collections import deque
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+# === CONFIG ===
+CONCURRENCY = 32            # requests in flight across all hosts
+PER_HOST_RATE = 1.0         # requests per second to any one host (robots.txt Crawl-delay can lower it)
+REQUEST_TIMEOUT = 5         # seconds, as in crawler.js
+MAX_CONTENT_CHARS = 1000    # page text kept for indexing, as in crawler.js
+MAX_BODY_BYTES = 2 * 1024 * 1024
+MAX_DEPTH = 3
+BLOOM_CAPACITY = 10_000_000
+BLOOM_ERROR_RATE = 1e-4
+COMMIT_EVERY = 100          # pages between SQLite commits; uncommitted pages are refetched on resume
+USER_AGENT = "TrueGLBot/0.1 (+https://github.com/AlgazinovAleksandr/TrueGL)"
+
+QUEUED, LEASED, DONE, FAILED, DUPLICATE, SKIPPED = range(6)
+
+class BloomFilter:
+    """Fixed-size set of seen URLs; false positives (about error_rate) only mean a URL is not crawled."""
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Add item; returns False if it was (probably) already present."""
+        new = False
+        for p in self._positions(item):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                new = True
+        return new
+
+class CrawlStore:
+    """SQLite file holding the frontier and the crawled pages, so an interrupted crawl can resume.
+
+    The frontier row of every discovered URL carries its status; pages are only
+    stored for unique content. search_index.py and score_pages.py read the pages
+    table directly.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS frontier (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, "
+                              "depth INTEGER NOT NULL, status INTEGER NOT NULL DEFAULT 0, error TEXT)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status, id)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, "
+                              "title TEXT, content TEXT, content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pages_content_hash ON pages (content_hash)")
+            # Leased but unfinished when the last run stopped
+            self.conn.execute("UPDATE frontier SET status = ? WHERE status = ?", (QUEUED, LEASED))
+        self._uncommitted = 0
+
+    def urls(self):
+        return (url for (url,) in self.conn.execute("SELECT url FROM frontier"))
+
+    def content_hashes(self):
+        return {digest for (digest,) in self.conn.execute("SELECT content_hash FROM pages")}
+
+    def page_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def add_urls(self, items):
+        self.conn.executemany("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", items)
+
+    def lease(self, limit):
+        rows = self.conn.execute("SELECT id, url, depth FROM frontier WHERE status = ? ORDER BY id LIMIT ?",
+                                 (QUEUED, limit)).fetchall()
+        self.conn.executemany("UPDATE frontier SET status = ? WHERE id = ?", [(LEASED, row[0]) for row in rows])
+        return [(url, depth) for _, url, depth in rows]
+
+    def finish(self, url, status, error=None, page=None):
+        if page is not None:
+            self.conn.execute("INSERT OR REPLACE INTO pages (url, title, content, content_hash, fetched_at) "
+                              "VALUES (?, ?, ?, ?, ?)", (url, *page))
+        self.conn.execute("UPDATE frontier SET status = ?, error = ? WHERE url = ?", (status, error, url))
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+class PageParser(HTMLParser):
+    """Title, visible text and links of an HTML page (what crawler.js took from cheerio)."""
+
+    SKIP = {"script", "style", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title, self.text, self.links = [], [], []
+        self._in_title = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+        elif not self._skip_depth:
+            self.text.append(data)
+
+def parse_page(html, base_url):
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    links = []
+    for href in parser.links:
+        url = normalize_url(urljoin(base_url, href))
+        if url:
+            links.append(url)
+    return " ".join("".join(parser.title).split()), " ".join(" ".join(parser.text).split()), links
+
+def normalize_url(url):
+    """Absolute http(s) URL without fragment and with a lower-case host, or None."""
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower(), path=parts.path or "/").geturl()
+
+class Host:
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.queue = deque()      # leased (url, depth) waiting for this host
+        self.next_ready = 0.0
+        self.scheduled = False    # has an entry in Crawler._ready
+        self.robots = None        # RobotFileParser once robots.txt was fetched
+        self.loading_robots = False
+
+class Crawler:
+    """Concurrent breadth-first crawler with per-host politeness.
+
+    Up to `concurrency` workers fetch at once. The frontier lives in SQLite and
+    only a bounded slice of it is leased into memory, grouped by host. A heap of
+    hosts ordered by the time their next request is allowed enforces the per-host
+    rate; robots.txt is fetched before a host's first page. Discovered URLs pass
+    a Bloom filter before they reach the frontier, and pages whose text hashes to
+    an already stored page are recorded as duplicates instead of stored.
+    """
+
+    def __init__(self, db_path, concurrency=CONCURRENCY, per_host_rate=PER_HOST_RATE, max_pages=None,
+                 max_depth=MAX_DEPTH, allowed_hosts=None, timeout=REQUEST_TIMEOUT, respect_robots=True,
+                 max_content_chars=MAX_CONTENT_CHARS, bloom_capacity=BLOOM_CAPACITY):
+        self.store = CrawlStore(db_path)
+        self.concurrency = concurrency
+        self.interval = 1.0 / per_host_rate if per_host_rate else 0.0
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.allowed_hosts = set(allowed_hosts) if allowed_hosts else None
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.max_content_chars = max_content_chars
+        self.seen = BloomFilter(bloom_capacity)
+        for url in self.store.urls():
+            self.seen.add(url)
+        self.content_hashes = self.store.content_hashes()
+        self.hosts = {}
+        self._ready = []          # (next_ready, seq, host)
+        self._seq = 0
+        self._buffered = 0        # leased URLs waiting in host queues
+        self._in_flight = 0
+        self._frontier_empty = False
+        self._wakeup = None
+        self.stats = {"fetched": 0, "stored": self.store.page_count(), "duplicates": 0, "failed": 0,
+                      "skipped": 0, "bytes": 0}
+
+    def add_urls(self, urls, depth):
+        new = []
+        for url in urls:
+            if self.allowed_hosts is not None and urlsplit(url).netloc not in self.allowed_hosts:
+                continue
+            if self.seen.add(url):
+                new.append((url, depth))
+        if new:
+            self.store.add_urls(new)
+            self._frontier_empty = False
+        return len(new)
+
+    def _schedule(self, host):
+        if host.queue and not host.scheduled and not host.loading_robots:
+            self._seq += 1
+            heapq.heappush(self._ready, (host.next_ready, self._seq, host))
+            host.scheduled = True
+
+    def _refill(self):
+        """Lease queued URLs from SQLite into per-host queues, keeping the in-memory frontier bounded."""
+        if self._buffered >= self.concurrency * 4 or self._frontier_empty:
+            return
+        leased = self.store.lease(self.concurrency * 16)
+        self._frontier_empty = not leased
+        for url, depth in leased:
+            name = urlsplit(url).netloc
+            host = self.hosts.get(name)
+            if host is None:
+                host = self.hosts[name] = Host(name, self.interval)
+            host.queue.append((url, depth))
+            self._buffered += 1
+            self._schedule(host)
+
+    def _done(self):
+        return self.max_pages is not None and self.stats["stored"] >= self.max_pages
+
+    async def _next(self):
+        """Wait for a host whose rate limit allows a request; returns (host, url, depth) or None when finished."""
+        while True:
+            if self._done():
+                return None
+            self._refill()
+            now = time.monotonic()
+            if self._ready and self._ready[0][0] <= now:
+                _, _, host = heapq.heappop(self._ready)
+                host.scheduled = False
+                url, depth = host.queue.popleft()
+                self._buffered -= 1
+                if self.respect_robots and host.robots is not None and not host.robots.can_fetch(USER_AGENT, url):
+                    self.store.finish(url, SKIPPED, "robots.txt")  # costs no request, so keeps the host's slot
+                    self.stats["skipped"] += 1
+                    self._schedule(host)
+                    continue
+                host.next_ready = now + host.interval
+                if self.respect_robots and host.robots is None:
+                    host.loading_robots = True  # rescheduled once robots.txt is in
+                else:
+                    self._schedule(host)
+                self._in_flight += 1
+                return host, url, depth
+            if not self._ready and not self._in_flight and self._frontier_empty:
+                return None
+            timeout = self._ready[0][0] - now if self._ready else None
+            if self._wakeup is None or self._wakeup.is_set():
+                self._wakeup = asyncio.Event()  # shared by every waiting worker until the next _notify()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, session):
+        while True:
+            item = await self._next()
+            if item is None:
+                self._notify()  # let the other workers see that the crawl is over
+                return
+            host, url, depth = item
+            try:
+                if self.respect_robots and host.robots is None:
+                    await self._load_robots(session, host, urlsplit(url).scheme)
+                    host.loading_robots = False
+                    host.queue.appendleft((url, depth))
+                    self._buffered += 1
+                    host.next_ready = time.monotonic() + host.interval
+                    self._schedule(host)
+                    continue
+                await self._crawl_page(session, url, depth)
+            finally:
+                self._in_flight -= 1
+                self._notify()
+
+    async def _load_robots(self, session, host, scheme):
+        robots = RobotFileParser()
+        try:
+            async with session.get(f"{scheme}://{host.name}/robots.txt", allow_redirects=True) as response:
+                lines = (await response.text(errors="replace")).splitlines() if response.status == 200 else []
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            lines = []
+        robots.parse(lines)
+        delay = robots.crawl_delay(USER_AGENT)
+        if delay:
+            host.interval = max(host.interval, float(delay))
+        host.robots = robots
+
+    async def _crawl_page(self, session, url, depth):
+        try:
+            async with session.get(url, allow_redirects=True) as response:
+                if response.status != 200:
+                    self.store.finish(url, FAILED, f"HTTP {response.status}")
+                    self.stats["failed"] += 1
+                    return
+                if "html" not in response.headers.get("Content-Type", "text/html"):
+                    self.store.finish(url, SKIPPED, response.headers.get("Content-Type"))
+                    self.stats["skipped"] += 1
+                    return
+                # content.read(n) returns whatever is buffered, so read chunks until EOF or the size cap
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk[:MAX_BODY_BYTES - len(body)]
+                    if len(body) >= MAX_BODY_BYTES:
+                        break
+                html = body.decode(response.charset or "utf-8", errors="replace")
+                base_url = str(response.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError) as e:
+            self.store.finish(url, FAILED, f"{type(e).__name__}: {e}")
+            self.stats["failed"] += 1
+            return
+        self.stats["fetched"] += 1
+        self.stats["bytes"] += len(body)
+
+        title, text, links = parse_page(html, base_url)
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        if digest in self.content_hashes:
+            self.store.finish(url, DUPLICATE, "same content as an earlier page")
+            self.stats["duplicates"] += 1
+        elif self._done():
+            self.store.finish(url, QUEUED)  # over the page budget; a later run picks it up
+        else:
+            self.content_hashes.add(digest)
+            self.store.finish(url, DONE, page=(title or "No Title", text[:self.max_content_chars], digest, time.time()))
+            self.stats["stored"] += 1
+        if depth < self.max_depth:
+            self.add_urls(links, depth + 1)
+
+    async def crawl(self, seeds=()):
+        """Crawl from the seeds plus whatever an earlier run left in the frontier; returns the stats."""
+        self.add_urls([u for u in map(normalize_url, seeds) if u], 0)
+        self.store.commit()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        start = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                             headers={"User-Agent": USER_AGENT}) as session:
+                await asyncio.gather(*[self._worker(session) for _ in range(self.concurrency)])
+        finally:
+            self.store.commit()
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
+
+    def close(self):
+        self.store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl pages into a resumable SQLite store for the TrueGL index")
+    parser.add_argument("seeds", nargs="*", help="start URLs (omit to resume the frontier in --db)")
+    parser.add_argument("--db", default="crawl.sqlite3")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--per-host-rate", type=float, default=PER_HOST_RATE,
+                        help="requests/sec per host; 0 = no limit")
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--same-host", action="store_true", help="only follow links to the seeds' hosts")
+    parser.add_argument("--ignore-robots", action="store_true")
+    args = parser.parse_args()
+
+    allowed = {urlsplit(normalize_url(s) or "").netloc for s in args.seeds} if args.same_host else None
+    crawler = Crawler(args.db, args.concurrency, args.per_host_rate, args.max_pages, args.max_depth, allowed,
+                      respect_robots=not args.ignore_robots)
+    try:
+        stats = asyncio.run(crawler.crawl(args.seeds))
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same --db to resume")
+        return
+    finally:
+        crawler.close()
+    print(f"Stored {stats['stored']} pages ({stats['fetched']} fetched, {stats['duplicates']} duplicates, "
+          f"{stats['failed']} failed, {stats['skipped']} skipped) in {stats['seconds']:.1f}s "
+          f"= {stats['fetched'] / stats['seconds']:.1f} pages/sec -> {args.db}")
+
+if __name__ == "__main__":
+    main()
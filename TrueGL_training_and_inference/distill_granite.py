@@ -0,0 +1,270 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, Trainer, TrainingArguments
+
+from dynamic_padding import DynamicPaddingCollator
+from granite_inference import CHECKPOINTS_DIR, MAX_LENGTH_PREDICTION, get_latest_checkpoint
+from reliability_scorer import SCORE_BINS, GraniteReliabilityScorer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Demo UI Code"))
+from inference import LABEL_MAP, TruthSeekerInference, truth_score  # noqa: E402
+from prediction_cache import model_fingerprint  # noqa: E402
+from score_pages import content_hash  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+CSV_PATH = "/root/Fine-Tuning_Truth/all_articles_fine_tuning.csv"  # the corpus Granite was fine-tuned on
+TEACHER_PATH = None  # None = latest checkpoint in CHECKPOINTS_DIR
+TEACHER_CACHE_PATH = "/root/Fine-Tuning_Truth/teacher_targets.parquet"
+TEACHER_BATCH_SIZE = 8
+CHECKPOINT_EVERY = 512  # teacher rows scored between cache rewrites, so an interrupted pass resumes
+STUDENT_BASE = "google/bert_uncased_L-4_H-512_A-8"  # BERT-small, 29M params; "bert-base-uncased" for BERT-sized
+OUTPUT_DIR = "/root/Fine-Tuning_Truth/student"  # loads with TruthSeekerInference(OUTPUT_DIR)
+STUDENT_MAX_LENGTH = 512
+BATCH_SIZE = 32
+EPOCHS = 3
+LEARNING_RATE = 5e-5
+SCORE_LOSS_WEIGHT = 1.0  # weight of the squared error between student and teacher reliability
+VAL_SIZE = 0.1  # share of documents held out for the agreement report (split by content hash)
+TIMING_DOCS = None  # held-out documents both models are timed on; None = all of them
+
+CACHE_COLUMNS = ["content_hash", "teacher_score", "distribution", "answer_mass", "teacher", "seconds"]
+# Score bin b -> (P(False), P(Mixed), P(True)), linear so that P(True) + 0.5 * P(Mixed) == b
+BIN_TO_CLASSES = np.array([[max(0.0, 1 - 2 * b), 1 - abs(2 * b - 1), max(0.0, 2 * b - 1)] for b in SCORE_BINS])
+
+def soft_targets(distributions):
+    """3-class targets in LABEL_MAP order whose truth score equals the teacher's expected score."""
+    return np.asarray(distributions, dtype=np.float64) @ BIN_TO_CLASSES
+
+def read_teacher_cache(path, teacher):
+    """{content_hash: row} for rows scored by `teacher`; rows from other teachers are ignored."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_parquet(path)
+    df = df[df["teacher"] == teacher]
+    return {row["content_hash"]: row for row in df.to_dict("records")}
+
+def write_teacher_cache(rows, path):
+    """Write the cache atomically, so an interrupted run never leaves a truncated file."""
+    tmp_path = f"{path}.tmp"
+    pd.DataFrame(rows, columns=CACHE_COLUMNS).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def build_teacher_cache(texts, teacher_path, cache_path=TEACHER_CACHE_PATH, batch_size=TEACHER_BATCH_SIZE,
+                        max_length=MAX_LENGTH_PREDICTION, checkpoint_every=CHECKPOINT_EVERY, device=None):
+    """Score every distinct text with Granite once; returns {content_hash: cached row}.
+
+    Rows are keyed by content hash and by the teacher's fingerprint, so rerunning
+    resumes where the last run stopped and a new Granite checkpoint rescores everything.
+    """
+    teacher = model_fingerprint(teacher_path, max_length, SCORE_BINS)
+    cached = read_teacher_cache(cache_path, teacher)
+    todo = {}
+    for text in texts:
+        key = content_hash(text)
+        if key not in cached:
+            todo.setdefault(key, text)
+    logger.info(f"{len(cached)} documents cached for teacher {teacher}, {len(todo)} to score")
+    if not todo:
+        return cached
+    scorer = GraniteReliabilityScorer(teacher_path, device=device, max_length=max_length)
+    keys = list(todo)
+    for start in range(0, len(keys), checkpoint_every):
+        chunk = keys[start:start + checkpoint_every]
+        began = time.perf_counter()
+        results = scorer.score_batch([todo[k] for k in chunk], batch_size=batch_size)
+        seconds = (time.perf_counter() - began) / len(chunk)
+        for key, result in zip(chunk, results):
+            cached[key] = {"content_hash": key, "teacher_score": result["score"],
+                           "distribution": result["distribution"], "answer_mass": result["answer_mass"],
+                           "teacher": teacher, "seconds": seconds}
+        write_teacher_cache(list(cached.values()), cache_path)
+        logger.info(f"Teacher scored {min(start + checkpoint_every, len(keys))}/{len(keys)} "
+                    f"({1 / seconds:.2f} docs/sec)")
+    return cached
+
+def is_validation(key, val_size=VAL_SIZE):
+    """Stable split from the content hash, so the held-out documents never change between runs."""
+    return int(key, 16) % 1000 < val_size * 1000
+
+class DistillationDataset(Dataset):
+    def __init__(self, texts, targets, scores, tokenizer, max_length=STUDENT_MAX_LENGTH):
+        self.encodings = tokenizer(list(texts), truncation=True, max_length=max_length)["input_ids"]
+        self.targets = torch.tensor(np.asarray(targets), dtype=torch.float32)
+        self.scores = torch.tensor(np.asarray(scores), dtype=torch.float32)
+
+    def __getitem__(self, idx):
+        return {"input_ids": self.encodings[idx], "targets": self.targets[idx], "teacher_score": self.scores[idx]}
+
+    def __len__(self):
+        return len(self.encodings)
+
+class DistillationCollator(DynamicPaddingCollator):
+    """DynamicPaddingCollator that also stacks the soft targets and teacher scores."""
+
+    def __call__(self, features):
+        batch = super().__call__(features)
+        batch["targets"] = torch.stack([f["targets"] for f in features])
+        batch["teacher_score"] = torch.stack([f["teacher_score"] for f in features])
+        return batch
+
+class DistillationTrainer(Trainer):
+    """Soft-label cross-entropy against the teacher's 3-class targets, plus squared error on the reliability."""
+
+    def __init__(self, *args, score_loss_weight=SCORE_LOSS_WEIGHT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.score_loss_weight = score_loss_weight
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        targets = inputs.pop("targets")
+        teacher_score = inputs.pop("teacher_score")
+        outputs = model(**inputs)
+        log_probs = torch.log_softmax(outputs.logits.float(), dim=-1)
+        loss = -(targets * log_probs).sum(dim=-1).mean()
+        probs = log_probs.exp()
+        student_score = probs[:, 2] + 0.5 * probs[:, 1]  # truth_score() in LABEL_MAP order
+        loss = loss + self.score_loss_weight * torch.mean((student_score - teacher_score) ** 2)
+        return (loss, outputs) if return_outputs else loss
+
+def load_split(texts, cached):
+    """(train, validation) DataFrames of text, soft targets and teacher score for every cached text."""
+    rows = {}
+    for text in texts:
+        key = content_hash(text)
+        if key in cached and key not in rows:
+            rows[key] = {"content_hash": key, "text": text, "teacher_score": cached[key]["teacher_score"],
+                         "distribution": list(cached[key]["distribution"])}
+    df = pd.DataFrame(list(rows.values()))
+    val = df["content_hash"].map(is_validation)
+    return df[~val].reset_index(drop=True), df[val].reset_index(drop=True)
+
+def train_student(train_df, student_base=STUDENT_BASE, output_dir=OUTPUT_DIR, epochs=EPOCHS, batch_size=BATCH_SIZE,
+                  learning_rate=LEARNING_RATE, max_length=STUDENT_MAX_LENGTH):
+    """Fine-tune the student on the soft targets and save it in TruthSeekerInference's layout."""
+    tokenizer = AutoTokenizer.from_pretrained(student_base)
+    labels = [LABEL_MAP[i - 1] for i in range(len(LABEL_MAP))]
+    model = AutoModelForSequenceClassification.from_pretrained(
+        student_base, num_labels=len(labels),
+        id2label=dict(enumerate(labels)), label2id={label: i for i, label in enumerate(labels)})
+    dataset = DistillationDataset(train_df["text"], soft_targets(train_df["distribution"].tolist()),
+                                  train_df["teacher_score"], tokenizer, max_length)
+    training_args = TrainingArguments(
+        output_dir=os.path.join(output_dir, "checkpoints"),
+        num_train_epochs=epochs,
+        per_device_train_batch_size=batch_size,
+        learning_rate=learning_rate,
+        warmup_steps=max(1, int(0.1 * epochs * len(dataset) / batch_size)),  # 10% of training
+        weight_decay=0.01,
+        logging_steps=10,
+        save_strategy="no",
+        remove_unused_columns=False,
+        report_to=[],
+    )
+    trainer = DistillationTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=dataset,
+        data_collator=DistillationCollator(tokenizer.pad_token_id),
+    )
+    trainer.train()
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    logger.info(f"Saved student to {output_dir}")
+
+def cpu_docs_per_sec(score_batch, texts, batch_size):
+    """Documents/sec of score_batch(texts, batch_size=...) after one warm-up batch."""
+    score_batch(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    results = score_batch(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start), results
+
+def evaluate_student(val_df, teacher_path, output_dir=OUTPUT_DIR, batch_size=BATCH_SIZE,
+                     teacher_batch_size=TEACHER_BATCH_SIZE, teacher_max_length=MAX_LENGTH_PREDICTION,
+                     timing_docs=TIMING_DOCS):
+    """Student vs teacher on held-out documents: agreement, MAE and CPU docs/sec of both.
+
+    Agreement uses the cached teacher scores; throughput times both models on CPU
+    over the same held-out texts (the first timing_docs of them, if set).
+    """
+    texts = val_df["text"].tolist()
+    timed = texts[:timing_docs] if timing_docs else texts
+    teacher = GraniteReliabilityScorer(teacher_path, device="cpu", max_length=teacher_max_length)
+    teacher_docs_per_sec, _ = cpu_docs_per_sec(teacher.score_batch, timed, teacher_batch_size)
+    del teacher
+    student = TruthSeekerInference(output_dir, device="cpu")  # no cache_path, so predict_batch always scores
+    student_docs_per_sec, predictions = cpu_docs_per_sec(student.predict_batch, timed, batch_size)
+    if len(timed) < len(texts):
+        predictions = student.predict_batch(texts, batch_size)
+    student_scores = np.array([truth_score(p["probabilities"]) for p in predictions])
+    teacher_scores = val_df["teacher_score"].to_numpy()
+    diff = np.abs(student_scores - teacher_scores)
+    report = {
+        "documents": len(texts),
+        "mae": float(diff.mean()),
+        "within_0.1": float((diff <= 0.1).mean()),
+        "same_side_of_0.5": float(((student_scores >= 0.5) == (teacher_scores >= 0.5)).mean()),
+        "pearson": float(np.corrcoef(student_scores, teacher_scores)[0, 1]) if len(texts) > 1 else float("nan"),
+        "timed_documents": len(timed),
+        "student_docs_per_sec": student_docs_per_sec,
+        "teacher_docs_per_sec": teacher_docs_per_sec,
+    }
+    report["speedup"] = report["student_docs_per_sec"] / report["teacher_docs_per_sec"]
+    with open(os.path.join(output_dir, "distillation_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the Granite reliability scorer into a small classifier")
+    parser.add_argument("step", choices=["teacher", "train", "evaluate", "all"])
+    parser.add_argument("--csv-path", default=CSV_PATH, help="corpus with a 'statement' column")
+    parser.add_argument("--teacher-path", default=TEACHER_PATH, help="defaults to the latest Granite checkpoint")
+    parser.add_argument("--teacher-cache", default=TEACHER_CACHE_PATH)
+    parser.add_argument("--teacher-batch-size", type=int, default=TEACHER_BATCH_SIZE)
+    parser.add_argument("--teacher-max-length", type=int, default=MAX_LENGTH_PREDICTION)
+    parser.add_argument("--student-base", default=STUDENT_BASE)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--epochs", type=float, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--max-length", type=int, default=STUDENT_MAX_LENGTH, help="student max tokens")
+    parser.add_argument("--device", default=None, help="teacher device for labelling (evaluation times both on CPU)")
+    parser.add_argument("--timing-docs", type=int, default=TIMING_DOCS, help="held-out documents to time both models on")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv_path)["statement"].dropna().astype(str).tolist()
+    teacher_path = args.teacher_path or get_latest_checkpoint(CHECKPOINTS_DIR)
+    if args.step in ("teacher", "all"):
+        cached = build_teacher_cache(texts, teacher_path, args.teacher_cache, args.teacher_batch_size,
+                                     args.teacher_max_length, device=args.device)
+    else:
+        cached = read_teacher_cache(args.teacher_cache, model_fingerprint(teacher_path, args.teacher_max_length,
+                                                                          SCORE_BINS))
+    if args.step == "teacher":
+        return
+    train_df, val_df = load_split(texts, cached)
+    logger.info(f"{len(train_df)} training and {len(val_df)} held-out documents with teacher targets")
+    if args.step in ("train", "all"):
+        train_student(train_df, args.student_base, args.output_dir, args.epochs, args.batch_size,
+                      args.learning_rate, args.max_length)
+    report = evaluate_student(val_df, teacher_path, args.output_dir, args.batch_size, args.teacher_batch_size,
+                              args.teacher_max_length, args.timing_docs)
+    print(f"student vs teacher on {report['documents']} held-out documents: MAE {report['mae']:.4f}, "
+          f"|Δ| <= 0.1 for {report['within_0.1']:.1%}, same side of 0.5 for {report['same_side_of_0.5']:.1%}, "
+          f"Pearson {report['pearson']:.3f}")
+    print(f"CPU throughput on {report['timed_documents']} held-out documents: "
+          f"student {report['student_docs_per_sec']:.1f} docs/sec, "
+          f"teacher {report['teacher_docs_per_sec']:.2f} docs/sec ({report['speedup']:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import random
+
+import torch
+from torch.utils.data import Sampler
+
+class LengthGroupedBatchSampler(Sampler):
+    """Yield batches of indices whose sequences have similar lengths.
+
+    With shuffle=True (training) indices are shuffled, split into mega-batches of
+    batch_size * mega_batch_mult, sorted by length inside each mega-batch and cut
+    into batches whose order is shuffled again, so batches stay random while
+    padding stays small. With shuffle=False (inference) the whole set is sorted by
+    length. If max_tokens is set, a batch is also closed once its padded size
+    (batch rows x longest row) would exceed that budget.
+    """
+
+    def __init__(self, lengths, batch_size, shuffle=True, seed=42, mega_batch_mult=50, max_tokens=None, drop_last=False):
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.mega_batch_mult = mega_batch_mult
+        self.max_tokens = max_tokens
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _split(self, ordered):
+        batches, batch, longest = [], [], 0
+        for idx in ordered:
+            length = self.lengths[idx]
+            too_wide = self.max_tokens and batch and max(longest, length) * (len(batch) + 1) > self.max_tokens
+            if len(batch) == self.batch_size or too_wide:
+                batches.append(batch)
+                batch, longest = [], 0
+            batch.append(idx)
+            longest = max(longest, length)
+        if batch and not (self.drop_last and len(batch) < self.batch_size):
+            batches.append(batch)
+        return batches
+
+    def _batches(self):
+        indices = list(range(len(self.lengths)))
+        if not self.shuffle:
+            return self._split(sorted(indices, key=self.lengths.__getitem__, reverse=True))
+        rng = random.Random(self.seed + self.epoch)
+        rng.shuffle(indices)
+        mega = self.batch_size * self.mega_batch_mult
+        batches = []
+        for start in range(0, len(indices), mega):
+            group = sorted(indices[start:start + mega], key=self.lengths.__getitem__, reverse=True)
+            batches.extend(self._split(group))
+        rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        batches = self._batches()
+        self.epoch += 1  # reshuffle differently on the next pass
+        yield from batches
+
+    def __len__(self):
+        return len(self._batches())
+
+class DynamicPaddingCollator:
+    """Pad each batch to its own longest sequence, optionally rounded up to a multiple of 8.
+
+    Use padding_side="left" for batch generation with decoder-only models.
+    Labels, when present, are padded with -100 so padding never contributes to the loss.
+    """
+
+    def __init__(self, pad_token_id, pad_to_multiple_of=8, padding_side="right", label_pad_token_id=-100):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.padding_side = padding_side
+        self.label_pad_token_id = label_pad_token_id
+
+    def _pad(self, sequences, width, value):
+        out = torch.full((len(sequences), width), value, dtype=torch.long)
+        for row, seq in enumerate(sequences):
+            seq = torch.as_tensor(seq, dtype=torch.long)
+            if self.padding_side == "left":
+                out[row, width - len(seq):] = seq
+            else:
+                out[row, :len(seq)] = seq
+        return out
+
+    def __call__(self, features):
+        width = max(len(f["input_ids"]) for f in features)
+        if self.pad_to_multiple_of:
+            width = -(-width // self.pad_to_multiple_of) * self.pad_to_multiple_of
+        batch = {
+            "input_ids": self._pad([f["input_ids"] for f in features], width, self.pad_token_id),
+            "attention_mask": self._pad(
+                [f.get("attention_mask", [1] * len(f["input_ids"])) for f in features], width, 0),
+        }
+        if "labels" in features[0]:
+            labels = [torch.as_tensor(f["labels"]) for f in features]
+            if labels[0].dim() == 0:
+                # Sequence-classification labels: one value per sample
+                batch["labels"] = torch.stack(labels)
+            else:
+                batch["labels"] = self._pad(labels, width, self.label_pad_token_id)
+        return batch
+
+def padding_ratio(lengths, batches):
+    """Fraction of padded positions when each batch is padded to its longest sequence."""
+    real = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+    return 1 - real / padded if padded else 0.0
@@ -2,15 +2,20 @@ import os
 import pandas as pd
 import torch
 from sklearn.model_selection import train_test_split
-from torch.utils.data import Dataset, random_split
+from torch.utils.data import DataLoader, Dataset, random_split
 from transformers import (
     AutoTokenizer,
     AutoModelForCausalLM,
     Trainer,
     TrainingArguments,
-    DataCollatorForLanguageModeling
+    DataCollatorForLanguageModeling,
+    default_data_collator
 )
 
+from dynamic_padding import DynamicPaddingCollator, LengthGroupedBatchSampler
+from packing import PackedDataset, PackingCollator, mask_prompt
+from token_cache import GRANITE_TEMPLATE, build_token_cache, encode_examples
+
 # === CONFIG ===
 MODEL_PATH = "/root/Fine-Tuning_Truth/granite-3.1-1b-a400m-base" # default
 CSV_PATH = "/root/Fine-Tuning_Truth/all_articles_fine_tuning.csv"
@@ -20,42 +25,127 @@ EPOCHS = 3
 MAX_LENGTH = 1660
 LEARNING_RATE = 3e-5
 VAL_SIZE = 0.1   # 10% for validation
+DYNAMIC_PADDING = True  # pad each length-grouped batch to its longest sample instead of MAX_LENGTH
+TOKEN_CACHE_DIR = "/root/Fine-Tuning_Truth/token_cache"  # pre-tokenized splits (see token_cache.py); None to tokenize on the fly
+LOSS_MASKING = "label"  # "label": loss only on the "Label: ..." completion; "full": loss on prompt and article too
+PACKING = True  # pack several samples into each MAX_LENGTH sequence (block-diagonal attention, requires DYNAMIC_PADDING)
 
 # === Custom Dataset ===
 class StatementDataset(Dataset):
-    def __init__(self, texts, labels, tokenizer, max_length=MAX_LENGTH):
+    def __init__(self, texts, labels, tokenizer, max_length=MAX_LENGTH, padding="max_length", loss_masking="full"):
         self.texts = texts
         self.labels = labels
         self.tokenizer = tokenizer
         self.max_length = max_length
+        self.padding = padding  # False leaves padding to DynamicPaddingCollator
+        self.loss_masking = loss_masking
 
     def __len__(self):
         return len(self.texts)
 
-    def __getitem__(self, idx):
-        text = str(self.texts[idx])
-        label = str(self.labels[idx])
-        
+    def format_text(self, idx):
         # Format the input for causal LM
-        full_text = f"Classify this statement as true, false, or unknown:\nStatement: {text}\nLabel: {label}"
-        
-        encoding = self.tokenizer(
-            full_text,
-            truncation=True,
-            max_length=self.max_length,
-            padding="max_length",
-            return_tensors="pt"
-        )
-        
-        # Ensure all tensors are 2D before squeezing
-        input_ids = encoding["input_ids"].view(1, -1).squeeze(0)
-        attention_mask = encoding["attention_mask"].view(1, -1).squeeze(0)
-        
-        return {
-            "input_ids": input_ids,
-            "attention_mask": attention_mask,
-            "labels": input_ids.clone()  # For causal LM, labels are same as input_ids
-        }
+        return GRANITE_TEMPLATE.format(statement=self.texts[idx], label=self.labels[idx])
+
+    def lengths(self):
+        """Unpadded token length of every sample, for LengthGroupedBatchSampler."""
+        examples = encode_examples(self.tokenizer, GRANITE_TEMPLATE, self.texts, self.labels, self.max_length)
+        return [len(ids) for ids, _ in examples]
+
+    def __getitem__(self, idx):
+        # Truncates the article rather than the label, so every sample keeps its "Label: ..." completion
+        (ids, prompt_length), = encode_examples(self.tokenizer, GRANITE_TEMPLATE, [self.texts[idx]], [self.labels[idx]], self.max_length)
+        return build_sample(torch.tensor(ids), prompt_length, self.tokenizer.pad_token_id,
+                            self.max_length, self.padding, self.loss_masking)
+
+def build_sample(input_ids, prompt_length, pad_token_id, max_length, padding, loss_masking):
+    """input_ids/attention_mask/labels for one sample; padding and, with loss_masking="label", the prompt get -100."""
+    labels = mask_prompt(input_ids, prompt_length) if loss_masking == "label" else input_ids.clone()
+    attention_mask = torch.ones_like(input_ids)
+    if padding == "max_length":
+        pad = max_length - len(input_ids)
+        input_ids = torch.nn.functional.pad(input_ids, (0, pad), value=pad_token_id)
+        attention_mask = torch.nn.functional.pad(attention_mask, (0, pad), value=0)
+        labels = torch.nn.functional.pad(labels, (0, pad), value=-100)
+    return {
+        "input_ids": input_ids,
+        "attention_mask": attention_mask,
+        "labels": labels  # For causal LM, labels are the input_ids themselves
+    }
+
+class CachedStatementDataset(Dataset):
+    """StatementDataset backed by a TokenCache: no tokenization at startup or per sample."""
+
+    def __init__(self, cache, pad_token_id, max_length=MAX_LENGTH, padding="max_length", loss_masking="full"):
+        self.cache = cache
+        self.pad_token_id = pad_token_id
+        self.max_length = max_length
+        self.padding = padding
+        self.loss_masking = loss_masking
+
+    def __len__(self):
+        return len(self.cache)
+
+    def lengths(self):
+        return self.cache.lengths()
+
+    def __getitem__(self, idx):
+        input_ids = torch.from_numpy(self.cache[idx].astype("int64"))
+        return build_sample(input_ids, int(self.cache.prompt_lengths[idx]), self.pad_token_id,
+                            self.max_length, self.padding, self.loss_masking)
+
+def cached_split(df, name, tokenizer, padding, loss_masking="full"):
+    """Write a split to CSV and load it through the token cache (rebuilt only when data, template or tokenizer change)."""
+    os.makedirs(TOKEN_CACHE_DIR, exist_ok=True)
+    csv_path = os.path.join(TOKEN_CACHE_DIR, f"{name}.csv")
+    if not os.path.exists(csv_path) or not pd.read_csv(csv_path).equals(df.reset_index(drop=True)):
+        df.to_csv(csv_path, index=False)
+    cache = build_token_cache(csv_path, tokenizer, TOKEN_CACHE_DIR, GRANITE_TEMPLATE, MAX_LENGTH)
+    return CachedStatementDataset(cache, tokenizer.pad_token_id, MAX_LENGTH, padding, loss_masking)
+
+class LengthGroupedTrainer(Trainer):
+    """Trainer that batches samples of similar length so the collator pads only to each batch's longest."""
+
+    def __init__(self, *args, max_tokens=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_tokens = max_tokens
+        self._lengths = {}
+
+    def _length_grouped_dataloader(self, dataset, batch_size, shuffle):
+        if id(dataset) not in self._lengths:
+            self._lengths[id(dataset)] = dataset.lengths()
+        sampler = LengthGroupedBatchSampler(self._lengths[id(dataset)], batch_size, shuffle=shuffle,
+                                            seed=self.args.seed, max_tokens=self.max_tokens)
+        dataloader = DataLoader(dataset, batch_sampler=sampler, collate_fn=self.data_collator,
+                                num_workers=self.args.dataloader_num_workers, pin_memory=self.args.dataloader_pin_memory)
+        return self.accelerator.prepare(dataloader)
+
+    def get_train_dataloader(self):
+        return self._length_grouped_dataloader(self.train_dataset, self.args.per_device_train_batch_size, shuffle=True)
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        return self._length_grouped_dataloader(dataset, self.args.per_device_eval_batch_size, shuffle=False)
+
+def build_datasets(train_df, val_df, tokenizer, padding, loss_masking="full"):
+    train_dataset = StatementDataset(
+        train_df['statement'].tolist(), 
+        train_df['labels'].tolist(), 
+        tokenizer, 
+        MAX_LENGTH,
+        padding,
+        loss_masking
+    )
+    
+    val_dataset = StatementDataset(
+        val_df['statement'].tolist(), 
+        val_df['labels'].tolist(), 
+        tokenizer, 
+        MAX_LENGTH,
+        padding,
+        loss_masking
+    )
+    return train_dataset, val_dataset
 
 def split_data(df, val_size=VAL_SIZE):
     """Split data into train and validation sets, stratified by the labels column."""
@@ -96,25 +186,29 @@ def main():
     )
 
     # === Create Datasets ===
-    train_dataset = StatementDataset(
-        train_df['statement'].tolist(), 
-        train_df['labels'].tolist(), 
-        tokenizer, 
-        MAX_LENGTH
-    )
-    
-    val_dataset = StatementDataset(
-        val_df['statement'].tolist(), 
-        val_df['labels'].tolist(), 
-        tokenizer, 
-        MAX_LENGTH
-    )
+    padding = False if DYNAMIC_PADDING else "max_length"
+    if TOKEN_CACHE_DIR:
+        train_dataset = cached_split(train_df[['statement', 'labels']], "train", tokenizer, padding, LOSS_MASKING)
+        val_dataset = cached_split(val_df[['statement', 'labels']], "val", tokenizer, padding, LOSS_MASKING)
+    else:
+        train_dataset, val_dataset = build_datasets(train_df, val_df, tokenizer, padding, LOSS_MASKING)
+    if PACKING and DYNAMIC_PADDING:
+        # Only the training set is packed; eval loss stays per sample and comparable across runs
+        train_dataset = PackedDataset(train_dataset, MAX_LENGTH)
+        print(f"Packed training samples into {len(train_dataset)} sequences of up to {MAX_LENGTH} tokens")
 
     # Data collator for language modeling
-    data_collator = DataCollatorForLanguageModeling(
-        tokenizer=tokenizer,
-        mlm=False
-    )
+    if PACKING and DYNAMIC_PADDING:
+        data_collator = PackingCollator(tokenizer.pad_token_id, pad_to_multiple_of=8, mask_dtype=model.dtype)
+    elif DYNAMIC_PADDING:
+        data_collator = DynamicPaddingCollator(tokenizer.pad_token_id, pad_to_multiple_of=8)
+    elif LOSS_MASKING == "label":
+        data_collator = default_data_collator  # samples are already padded and their labels masked
+    else:
+        data_collator = DataCollatorForLanguageModeling(
+            tokenizer=tokenizer,
+            mlm=False
+        )
 
     # === Training Arguments ===
     training_args = TrainingArguments(
@@ -142,7 +236,8 @@ def main():
     )
 
     # === Trainer ===
-    trainer = Trainer(
+    trainer_class = LengthGroupedTrainer if DYNAMIC_PADDING else Trainer
+    trainer = trainer_class(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
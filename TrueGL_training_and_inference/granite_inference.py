@@ -0,0 +1,239 @@
+import os
+import re
+
+import pandas as pd
+import torch
+from torch.utils.data import Dataset
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+# === CONFIG (shared with TrueGL_Granite_model_inference.ipynb) ===
+CHECKPOINTS_DIR = "/root/Fine-Tuning_Truth/granite-finetuned-articles" # Path to directory of fine-tuned checkpoints
+BASE_MODEL_PATH = "/root/Fine-Tuning_Truth/granite-3.1-1b-a400m-base" # Path to the original base model
+MAX_LENGTH_PREDICTION = 1660
+MAX_LENGTH_JUSTIFICATION = 768
+MAX_NEW_TOKENS_PREDICTION = 10
+MAX_NEW_TOKENS_JUSTIFICATION = 300
+QUANTIZED_FILE = "model_int8.pt"  # INT8 linear layers written by Demo UI Code/quantize_model.py --granite-path
+
+PREDICTION_LABEL_SUFFIX = "\nLabel:"
+PREDICTION_PROMPT = (
+    "Assess the reliability of this statement (article from the Internet) on the scale from 0 to 1, "
+    "where 0 is completely unreliable and 1 is completely reliable. Do not provide any explanation. "
+    "Just the number:\nStatement: {statement}" + PREDICTION_LABEL_SUFFIX
+)
+
+def get_default_device():
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+# === Helper to find latest checkpoint ===
+def get_latest_checkpoint(checkpoints_dir):
+    if not os.path.exists(checkpoints_dir):
+        print(f"Error: Checkpoints directory not found at {checkpoints_dir}")
+        return None
+    checkpoints = [d for d in os.listdir(checkpoints_dir) if d.startswith("checkpoint-") and os.path.isdir(os.path.join(checkpoints_dir, d))]
+    if not checkpoints:
+        print(f"No checkpoints found in {checkpoints_dir}")
+        return None
+    checkpoints.sort(key=lambda x: int(x.split("-")[1]))
+    latest_checkpoint_name = checkpoints[-1]
+    print(f"Found latest checkpoint for scoring: {latest_checkpoint_name}")
+    return os.path.join(checkpoints_dir, latest_checkpoint_name)
+
+def load_causal_tokenizer(model_path):
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+def quantize_causal_lm(model):
+    """Dynamic INT8 quantization of the nn.Linear layers (attention projections and LM head); CPU only."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_quantized_causal_lm(model_path):
+    """The QUANTIZED_FILE artifact in model_path: quantize an empty model of the same config, then load it."""
+    path = os.path.join(model_path, QUANTIZED_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No quantized artifact at {path}; run quantize_model.py --granite-path {model_path}")
+    model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(model_path), torch_dtype=torch.float32)
+    model = quantize_causal_lm(model.eval())
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    return model.eval()
+
+def load_causal_lm(model_path, device=None, torch_dtype=None, tokenizer=None, quantized=False):
+    """Load a Granite tokenizer/model pair the way the notebook does, with a CPU-friendly dtype.
+
+    Pass `tokenizer` to reuse one already loaded for a checkpoint with the same vocabulary,
+    and quantized=True to load the INT8 artifact instead of the full-precision weights.
+    """
+    device = device or get_default_device()
+    if tokenizer is None:
+        tokenizer = load_causal_tokenizer(model_path)
+    if quantized:
+        if device != "cpu":
+            raise ValueError("The quantized Granite model only runs on CPU")
+        return tokenizer, load_quantized_causal_lm(model_path)
+    if torch_dtype is None:
+        # float16 matmuls are slow or unsupported on CPU
+        if device == "cuda":
+            torch_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        else:
+            torch_dtype = torch.float32
+    model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch_dtype)
+    model.to(device)
+    model.eval()
+    return tokenizer, model
+
+def build_prediction_prompt(statement):
+    return PREDICTION_PROMPT.format(statement=str(statement))
+
+# === Custom Dataset for Reliability Prediction ===
+class PredictionDataset(Dataset):
+    def __init__(self, statements, tokenizer, max_length, padding="max_length"):
+        self.statements = statements
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.padding = padding  # False leaves padding to DynamicPaddingCollator(padding_side="left")
+
+    def lengths(self):
+        encodings = self.tokenizer([build_prediction_prompt(s) for s in self.statements], truncation=True, max_length=self.max_length)
+        return [len(ids) for ids in encodings["input_ids"]]
+
+    def __len__(self):
+        return len(self.statements)
+
+    def __getitem__(self, idx):
+        prompt = build_prediction_prompt(self.statements[idx])
+        encoding = self.tokenizer(
+            prompt,
+            truncation=True,
+            max_length=self.max_length,
+            padding=self.padding,
+            return_tensors="pt"
+        )
+        return {
+            "input_ids": encoding["input_ids"].squeeze(0),
+            "attention_mask": encoding["attention_mask"].squeeze(0)
+        }
+
+# === Few-shot justification prompt (shared by JustificationDataset and justification_service.py) ===
+example_statement_reliable = "The Eiffel Tower is located in Paris, France. It is a famous landmark."
+example_score_reliable = 0.95
+example_justification_reliable = """- The statement is factually accurate (Eiffel Tower is in Paris).
+- It describes a well-known fact, easily verifiable.
+- Writing quality is good and consistent."""
+
+example_statement_unreliable = "The moon is made of green cheese and visited by cows weekly."
+example_score_unreliable = 0.05
+example_justification_unreliable = """- The statement contains obvious factual inaccuracies (moon not cheese, cows don't visit).
+- It presents scientifically implausible claims.
+- Lacks any supporting evidence or credibility."""
+
+# Identical for every statement, so its KV cache can be computed once (see prefix_cache.py)
+JUSTIFICATION_PREFIX = f"""You are an expert analyst. Your task is to provide a concise, bullet-point justification for a given reliability score of a statement.
+The reliability score is on a scale from 0 (completely unreliable) to 1 (completely reliable).
+Your justification should ONLY be the bullet points explaining the score. Do NOT repeat the statement or the score in your response.
+
+Here are some examples of how to format your justification:
+
+Example 1:
+Statement context: "{example_statement_reliable}"
+Assigned reliability score: {example_score_reliable:.2f}
+Correct Justification:
+{example_justification_reliable}
+
+Example 2:
+Statement context: "{example_statement_unreliable}"
+Assigned reliability score: {example_score_unreliable:.2f}
+Correct Justification:
+{example_justification_unreliable}
+
+---
+Now, provide the justification for the following:
+"""
+
+def build_justification_prompt(statement, score):
+    statement_str = str(statement)
+    max_statement_chars_in_prompt = 700
+    if len(statement_str) > max_statement_chars_in_prompt:
+        statement_str = statement_str[:max_statement_chars_in_prompt] + "..."
+
+    if score == -1.0 or pd.isna(score):
+        current_task_prompt = f"""Statement context: "{statement_str}"
+The reliability score for this statement could not be determined.
+Provide your overall impression of this statement's potential reliability using concise bullet points.
+Consider factors like text consistency, apparent factual accuracy, and potential AI generation.
+Justification:"""
+    else:
+        current_task_prompt = f"""Statement context: "{statement_str}"
+Assigned reliability score: {score:.2f}
+Provide a concise bullet-point justification for THIS SCORE.
+Justification:"""
+    return JUSTIFICATION_PREFIX + "\n" + current_task_prompt
+
+# === Custom Dataset for Justification Generation (Using Few-Shot) ===
+class JustificationDataset(Dataset):
+    def __init__(self, statements, scores, tokenizer, max_length, padding="max_length"):
+        self.statements = statements
+        self.scores = scores
+        self.tokenizer = tokenizer # This will be the tokenizer for the BASE model
+        self.max_length = max_length
+        self.padding = padding
+
+    def __len__(self):
+        return len(self.statements)
+
+    def lengths(self):
+        prompts = [self.get_justification_prompt(s, score) for s, score in zip(self.statements, self.scores)]
+        return [len(ids) for ids in self.tokenizer(prompts, truncation=True, max_length=self.max_length)["input_ids"]]
+
+    def get_justification_prompt(self, statement, score):
+        return build_justification_prompt(statement, score)
+
+    def __getitem__(self, idx):
+        statement = self.statements[idx]
+        score = self.scores[idx]
+        prompt_text = self.get_justification_prompt(statement, score)
+        encoding = self.tokenizer(
+            prompt_text,
+            truncation=True,
+            max_length=self.max_length,
+            padding=self.padding,
+            return_tensors="pt"
+        )
+        return {
+            "input_ids": encoding["input_ids"].squeeze(0),
+            "attention_mask": encoding["attention_mask"].squeeze(0)
+        }
+
+def clean_justification(text):
+    """The notebook's cleanup of generated justification text."""
+    text = text.strip()
+    # Basic cleanup if model still prepends "Justification:"
+    if text.lower().startswith("justification:"):
+        text = text[len("justification:"):].strip()
+    # If the model is still confused by "Statement context:", keep the text after the last justification marker
+    if "statement context:" in text.lower():
+        parts_after_context = re.split(r'Correct Justification:|Justification:', text, flags=re.IGNORECASE)
+        if len(parts_after_context) > 1:
+            text = parts_after_context[-1].strip()
+    return text
+
+# === Improved Label Extraction Function ===
+def extract_label(text):
+    try:
+        match = re.search(r"Label:(.*?)([\d\.]+)", text, re.IGNORECASE | re.DOTALL)
+        if match:
+            label_str = match.group(2).strip()
+            if label_str.endswith('.'): label_str = label_str[:-1]
+            return float(label_str)
+        else:
+            parts = text.split("Label:")
+            target_part = parts[-1] if len(parts) > 1 else text
+            numeric_match = re.search(r"([\d\.]+)", target_part)
+            if numeric_match:
+                label_str = numeric_match.group(1).strip()
+                if label_str.endswith('.'): label_str = label_str[:-1]
+                return float(label_str)
+            return None
+    except ValueError:
+        return None
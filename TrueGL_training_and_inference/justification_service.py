@@ -0,0 +1,447 @@
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import logging
+import queue
+import threading
+import time
+
+import torch
+
+from granite_inference import (
+    BASE_MODEL_PATH,
+    MAX_LENGTH_JUSTIFICATION,
+    MAX_NEW_TOKENS_JUSTIFICATION,
+    build_justification_prompt,
+    clean_justification,
+    load_causal_lm,
+)
+from kv_cache import cache_layers, concat_rows, make_cache, select_rows
+from prefix_cache import SharedPrefixCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === CONFIG (sampling settings from TrueGL_Granite_model_inference.ipynb) ===
+TEMPERATURE = 0.6
+TOP_P = 0.9
+REPETITION_PENALTY = 1.2
+MAX_BATCH_SIZE = 16  # sequences decoded together; further requests wait for a free slot
+# The base model starting another few-shot block means the justification is over
+STOP_STRINGS = ("Statement context:", "\nExample")
+
+class JustificationError(RuntimeError):
+    """A justification request was ended by a failed engine step or by the engine stopping."""
+
+class JustificationRequest:
+    def __init__(self, prompt_ids, max_new_tokens, on_event):
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.on_event = on_event  # called from the engine thread with (text_delta, finished)
+        self.generated = []
+        self.decoded = ""  # text of generated[:read_offset]
+        self.text = ""     # text streamed so far
+        self.prefix_offset = self.read_offset = 0
+        self.cancelled = False
+        self.finished = False
+        self.error = None  # set before the final event when the request failed
+        self.submitted_at = time.perf_counter()
+        self.first_token_at = None
+
+    def cancel(self):
+        """Ask the engine to drop this sequence at its next step (e.g. the client disconnected)."""
+        self.cancelled = True
+
+def _held_back(text):
+    """Length of the tail of text that could still grow into a stop string, so it is not streamed yet."""
+    for n in range(min(len(text), max(map(len, STOP_STRINGS))), 0, -1):
+        if any(stop.startswith(text[-n:]) for stop in STOP_STRINGS):
+            return n
+    return 0
+
+class ContinuousBatchingEngine:
+    """Decode many justification requests together, admitting new ones between decode steps.
+
+    Active sequences share one left-padded KV cache, and every step runs a single
+    forward pass over the last sampled token of each of them. Waiting requests are
+    prefilled together and their caches are left-padded and stacked onto the
+    running batch. Prompts that start with the shared few-shot preamble only
+    prefill their suffix on top of its cached keys/values (prefix_cache.py).
+    Finished or cancelled rows are dropped, along with any leading
+    columns that are padding in every remaining row. The engine runs on its own
+    thread; results are delivered through each request's on_event callback.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size=MAX_BATCH_SIZE, temperature=TEMPERATURE,
+                 top_p=TOP_P, repetition_penalty=REPETITION_PENALTY, seed=None, prefix_reuse=True):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = model.device
+        self.max_batch_size = max_batch_size
+        self.temperature = temperature
+        self.top_p = top_p
+        self.repetition_penalty = repetition_penalty
+        self.generator = torch.Generator(device=self.device)
+        if seed is not None:
+            self.generator.manual_seed(seed)
+        forward_params = inspect.signature(model.forward).parameters
+        keep_kwarg = next((k for k in ("logits_to_keep", "num_logits_to_keep") if k in forward_params), None)
+        self._keep_last = {keep_kwarg: 1} if keep_kwarg else {}
+        # KV cache of the few-shot preamble shared by every prompt; None prefills whole prompts
+        self.prefix_cache = SharedPrefixCache(model, tokenizer) if prefix_reuse else None
+
+        self.pending = queue.Queue()
+        self.active = []           # JustificationRequest per batch row
+        self.cache = None          # KV cache of the active rows
+        self.attention_mask = None # (rows, cache length), 0 on left padding
+        self.positions = None      # next position id of every row
+        self.last_tokens = None    # sampled but not yet fed to the model
+        self.seen = None           # (rows, vocab) tokens seen so far, for the repetition penalty
+        self.stats = {"steps": 0, "tokens": 0, "requests": 0, "failed": 0}
+        self._stopping = False
+        self._admitting = []       # requests taken off `pending` whose prefill has not finished
+        self._thread = threading.Thread(target=self._run, name="justification-engine", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        self.pending.put(None)
+        self._thread.join()
+
+    def submit(self, prompt_ids, max_new_tokens, on_event):
+        if self._stopping or not self._thread.is_alive():
+            raise JustificationError("Justification engine is not running")
+        request = JustificationRequest(prompt_ids, max_new_tokens, on_event)
+        self.pending.put(request)
+        return request
+
+    def _run(self):
+        with torch.inference_mode():
+            while not self._stopping:
+                try:
+                    self._admit(block=not self.active)
+                    if self.active:
+                        self._decode_step()
+                except Exception as e:
+                    # The shared batch state may be half-updated, so every sequence in it fails;
+                    # requests still waiting in `pending` are admitted into a fresh batch next
+                    logger.exception(f"Justification engine step failed for {len(self.active) + len(self._admitting)} requests")
+                    self._fail(self.active + self._admitting, e)
+        stopped = []
+        with contextlib.suppress(queue.Empty):
+            while True:
+                stopped.append(self.pending.get_nowait())
+        # In-flight sequences are cut off too, so nobody waits on a decode that will never run
+        self._fail(self.active + self._admitting + [request for request in stopped if request is not None],
+                   JustificationError("Justification engine stopped"))
+
+    def _fail(self, requests, error):
+        """Reset the batch and end each unfinished request with a final event carrying `error`."""
+        self.active, self._admitting = [], []
+        self.cache = self.attention_mask = self.positions = self.last_tokens = self.seen = None
+        for request in requests:
+            if request.finished:
+                continue
+            request.error, request.finished = error, True
+            self.stats["failed"] += 1
+            if not request.cancelled:
+                try:
+                    request.on_event("", True)
+                except Exception:
+                    logger.exception("on_event callback failed while reporting an engine error")
+
+    def _admit(self, block):
+        new = []
+        while len(self.active) + len(new) < self.max_batch_size:
+            try:
+                request = self.pending.get(block=block and not new)
+            except queue.Empty:
+                break
+            if request is None:  # stop()
+                return
+            if not request.cancelled:
+                new.append(request)
+        if new:
+            self._admitting = new
+            self._prefill(new)
+            self._admitting = []
+
+    def _prefill(self, new):
+        groups, rest = [], new
+        if self.prefix_cache is not None:
+            self.prefix_cache.refresh(self.model, self.tokenizer)  # no-op unless the model or template changed
+            suffixes = [self.prefix_cache.suffix(r.prompt_ids) for r in new]
+            if any(s is not None for s in suffixes):
+                groups.append(self._prefill_suffixes([r for r, s in zip(new, suffixes) if s is not None],
+                                                     [s for s in suffixes if s is not None]))
+            rest = [r for r, s in zip(new, suffixes) if s is None]
+        if rest:
+            groups.append(self._prefill_prompts(rest))
+        new = [request for group in groups for request in group[0]]
+
+        had_active = bool(self.active)
+        if had_active:
+            groups.insert(0, (self.active, cache_layers(self.cache), self.attention_mask, self.seen, None))
+        total = max(g[2].shape[1] for g in groups)
+        self.cache = make_cache(concat_rows([g[1] for g in groups], total))
+        self.attention_mask = torch.cat([self._left_pad_mask(g[2], total) for g in groups])
+        self.seen = torch.cat([g[3] for g in groups])
+        self.positions = self.attention_mask.sum(dim=1)
+        self.active.extend(new)
+        self.stats["requests"] += len(new)
+
+        logits = torch.cat([g[4] for g in groups if g[4] is not None])
+        first = self._sample(logits, self.seen[-len(new):])
+        self.last_tokens = torch.cat([self.last_tokens, first]) if had_active else first
+        self._accept(first, rows=range(len(self.active) - len(new), len(self.active)))
+
+    def _prefill_prompts(self, requests):
+        """Run whole prompts, left-padded; returns (requests, cache layers, attention mask, seen, last logits)."""
+        width = max(len(r.prompt_ids) for r in requests)
+        input_ids = torch.full((len(requests), width), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(requests), width), dtype=torch.long)
+        for row, request in enumerate(requests):
+            input_ids[row, width - len(request.prompt_ids):] = torch.tensor(request.prompt_ids)
+            attention_mask[row, width - len(request.prompt_ids):] = 1
+        input_ids, attention_mask = input_ids.to(self.device), attention_mask.to(self.device)
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask,
+                             position_ids=(attention_mask.cumsum(dim=1) - 1).clamp(min=0), use_cache=True,
+                             **self._keep_last)
+        seen = torch.zeros((len(requests), outputs.logits.shape[-1]), dtype=torch.bool, device=self.device)
+        seen.scatter_(1, input_ids, attention_mask.bool())
+        return requests, cache_layers(outputs.past_key_values), attention_mask, seen, outputs.logits[:, -1]
+
+    def _prefill_suffixes(self, requests, suffixes):
+        """Run only what follows the shared few-shot prefix, on top of its precomputed KV cache."""
+        input_ids, attention_mask, position_ids = self.prefix_cache.prefill_inputs(suffixes, self.tokenizer.pad_token_id)
+        input_ids, attention_mask = input_ids.to(self.device), attention_mask.to(self.device)
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids.to(self.device),
+                             past_key_values=self.prefix_cache.expand(len(requests)), use_cache=True,
+                             **self._keep_last)
+        seen = torch.zeros((len(requests), outputs.logits.shape[-1]), dtype=torch.bool, device=self.device)
+        seen[:, self.prefix_cache.ids] = True
+        seen.scatter_(1, input_ids, attention_mask[:, len(self.prefix_cache):].bool())
+        return requests, cache_layers(outputs.past_key_values), attention_mask, seen, outputs.logits[:, -1]
+
+    @staticmethod
+    def _left_pad_mask(mask, width):
+        return torch.nn.functional.pad(mask, (width - mask.shape[1], 0))
+
+    def _decode_step(self):
+        self.attention_mask = torch.cat([self.attention_mask, self.attention_mask.new_ones((len(self.active), 1))], dim=1)
+        outputs = self.model(input_ids=self.last_tokens[:, None], attention_mask=self.attention_mask,
+                             position_ids=self.positions[:, None], past_key_values=self.cache, use_cache=True)
+        self.cache = outputs.past_key_values
+        self.positions = self.positions + 1
+        self.last_tokens = self._sample(outputs.logits[:, -1], self.seen)
+        self.stats["steps"] += 1
+        self._accept(self.last_tokens, rows=range(len(self.active)))
+
+    def _sample(self, logits, seen):
+        logits = logits.float()
+        if self.repetition_penalty != 1.0:
+            penalized = torch.where(logits > 0, logits / self.repetition_penalty, logits * self.repetition_penalty)
+            logits = torch.where(seen, penalized, logits)
+        if self.temperature <= 0:
+            return logits.argmax(dim=-1)
+        probs = torch.softmax(logits / self.temperature, dim=-1)
+        if self.top_p < 1.0:
+            sorted_probs, order = probs.sort(dim=-1, descending=True)
+            sorted_probs[sorted_probs.cumsum(dim=-1) - sorted_probs > self.top_p] = 0
+            choice = torch.multinomial(sorted_probs, 1, generator=self.generator)
+            return order.gather(1, choice).squeeze(1)
+        return torch.multinomial(probs, 1, generator=self.generator).squeeze(1)
+
+    def _accept(self, tokens, rows):
+        """Record one sampled token for the given rows, stream text deltas and retire finished rows."""
+        rows = list(rows)
+        self.seen[rows, tokens] = True
+        finished_rows = []
+        for row, token in zip(rows, tokens.tolist()):
+            request = self.active[row]
+            request.generated.append(token)
+            self.stats["tokens"] += 1
+            done = (request.cancelled or token == self.tokenizer.eos_token_id
+                    or len(request.generated) >= request.max_new_tokens)
+            done = self._emit(request, done)
+            if done:
+                finished_rows.append(row)
+        if finished_rows:
+            self._retire(finished_rows)
+
+    def _detokenize(self, request, done):
+        """Incremental decode: only re-decode the last few tokens, waiting while a character is incomplete."""
+        ids = request.generated
+        prefix = self.tokenizer.decode(ids[request.prefix_offset:request.read_offset], skip_special_tokens=True)
+        text = self.tokenizer.decode(ids[request.prefix_offset:], skip_special_tokens=True)
+        if len(text) > len(prefix) and (done or not text.endswith("\ufffd")):
+            request.decoded += text[len(prefix):]
+            request.prefix_offset, request.read_offset = request.read_offset, len(ids)
+        return request.decoded
+
+    def _emit(self, request, done):
+        text = self._detokenize(request, done)
+        stops = [i for i in (text.find(stop) for stop in STOP_STRINGS) if i >= 0]
+        if stops:
+            text, done = text[:min(stops)], True
+        if not done:
+            text = text[:len(text) - _held_back(text)]  # may still turn into a stop string
+        if len(text) < len(request.text):
+            text = request.text
+        delta, request.text = text[len(request.text):], text
+        if delta and request.first_token_at is None:
+            request.first_token_at = time.perf_counter()
+        request.finished = done
+        if (delta or done) and not request.cancelled:
+            request.on_event(delta, done)
+        return done
+
+    def _retire(self, finished_rows):
+        keep = [row for row in range(len(self.active)) if row not in set(finished_rows)]
+        self.active = [self.active[row] for row in keep]
+        if not keep:
+            self.cache = self.attention_mask = self.positions = self.last_tokens = self.seen = None
+            return
+        index = torch.tensor(keep, device=self.device)
+        mask = self.attention_mask[index]
+        start = int((mask.sum(dim=0) == 0).long().cumprod(dim=0).sum())  # leading all-padding columns
+        self.cache = make_cache(select_rows(cache_layers(self.cache), index, start))
+        self.attention_mask = mask[:, start:]
+        self.positions = self.positions[index]
+        self.last_tokens = self.last_tokens[index]
+        self.seen = self.seen[index]
+
+class JustificationService:
+    """asyncio front end: stream(statement, score) yields justification text as it is generated."""
+
+    def __init__(self, model_path=BASE_MODEL_PATH, device=None, max_batch_size=MAX_BATCH_SIZE,
+                 max_length=MAX_LENGTH_JUSTIFICATION, tokenizer=None, model=None, quantized=False, **sampling):
+        if model is None:
+            tokenizer, model = load_causal_lm(model_path, device, quantized=quantized)
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.engine = ContinuousBatchingEngine(model, tokenizer, max_batch_size, **sampling).start()
+
+    def encode(self, statement, score):
+        prompt = build_justification_prompt(statement, score)
+        return self.tokenizer(prompt, truncation=True, max_length=self.max_length)["input_ids"]
+
+    async def stream(self, statement, score=-1.0, max_new_tokens=MAX_NEW_TOKENS_JUSTIFICATION):
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def on_event(delta, done):
+            with contextlib.suppress(RuntimeError):  # event loop already closed
+                loop.call_soon_threadsafe(events.put_nowait, (delta, done))
+
+        request = self.engine.submit(self.encode(statement, score), max_new_tokens, on_event)
+        try:
+            while True:
+                delta, done = await events.get()
+                if delta:
+                    yield delta
+                if done:
+                    break
+        finally:
+            request.cancel()
+        if request.error is not None:
+            raise JustificationError(f"Justification failed: {request.error!r}") from request.error
+
+    async def justify(self, statement, score=-1.0, max_new_tokens=MAX_NEW_TOKENS_JUSTIFICATION):
+        return clean_justification("".join([d async for d in self.stream(statement, score, max_new_tokens)]))
+
+    def metrics(self):
+        return {**self.engine.stats, "active": len(self.engine.active), "pending": self.engine.pending.qsize()}
+
+    def close(self):
+        self.engine.stop()
+
+def create_app(service):
+    """aiohttp app: GET/POST /justify streams Server-Sent Events, one per text delta, then an 'done' event.
+
+    A request the engine failed ends with an 'error' event instead.
+    """
+    from aiohttp import web
+
+    def sse(data, event=None):
+        return (f"event: {event}\n" if event else "").encode() + f"data: {json.dumps(data)}\n\n".encode()
+
+    async def justify(request):
+        if request.method == "POST":
+            try:
+                params = await request.json()
+            except ValueError:
+                return web.json_response({"error": "Request body must be valid JSON"}, status=400)
+            if not isinstance(params, dict):
+                return web.json_response({"error": "Request body must be a JSON object"}, status=400)
+        else:
+            params = request.query
+        statement = params.get("statement")
+        if not statement or not isinstance(statement, str):
+            return web.json_response({"error": "No statement provided"}, status=400)
+        try:
+            score = float(params.get("score", -1.0))
+            max_new_tokens = int(params.get("max_new_tokens", MAX_NEW_TOKENS_JUSTIFICATION))
+        except (TypeError, ValueError):
+            return web.json_response({"error": "score must be a number and max_new_tokens an integer"}, status=400)
+        if max_new_tokens <= 0:
+            return web.json_response({"error": "max_new_tokens must be positive"}, status=400)
+        max_new_tokens = min(max_new_tokens, MAX_NEW_TOKENS_JUSTIFICATION)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        start, first, text = time.perf_counter(), None, ""
+        try:
+            async with contextlib.aclosing(service.stream(statement, score, max_new_tokens)) as deltas:
+                async for delta in deltas:
+                    first = first or time.perf_counter()
+                    text += delta
+                    await response.write(sse({"text": delta}))
+        except JustificationError as e:
+            await response.write(sse({"error": str(e)}, event="error"))
+            await response.write_eof()
+            return response
+        await response.write(sse({
+            "justification": clean_justification(text),
+            "ttft_ms": round((first - start) * 1000, 1) if first else None,
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+        }, event="done"))
+        await response.write_eof()
+        return response
+
+    async def health(request):
+        return web.json_response({"status": "ok"})
+
+    async def metrics(request):
+        return web.json_response(service.metrics())
+
+    app = web.Application()
+    app.router.add_route("GET", "/justify", justify)
+    app.router.add_route("POST", "/justify", justify)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.on_cleanup.append(lambda app: asyncio.to_thread(service.close))
+    return app
+
+def main():
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="Stream Granite justifications over Server-Sent Events")
+    parser.add_argument("--model-path", default=BASE_MODEL_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--quantized", action="store_true", help="serve the INT8 model_int8.pt written by quantize_model.py")
+    args = parser.parse_args()
+
+    service = JustificationService(args.model_path, args.device, args.max_batch_size, quantized=args.quantized)
+    web.run_app(create_app(service), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
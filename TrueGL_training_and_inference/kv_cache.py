@@ -0,0 +1,34 @@
+import torch
+from transformers import DynamicCache
+
+def cache_layers(cache):
+    """Per-layer (keys, values) tensors of shape (batch, heads, seq, head_dim) from any transformers KV cache."""
+    if hasattr(cache, "layers"):  # transformers >= 4.56
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    if hasattr(cache, "key_cache"):
+        return list(zip(cache.key_cache, cache.value_cache))
+    return [(keys, values) for keys, values, *_ in cache]
+
+def make_cache(layers):
+    return DynamicCache(ddp_cache_data=[(keys, values) for keys, values in layers])
+
+def left_pad(layers, width):
+    """Left-pad every layer along the sequence axis to `width` positions with zeros."""
+    padded = []
+    for keys, values in layers:
+        pad = width - keys.shape[-2]
+        if pad > 0:
+            keys = torch.nn.functional.pad(keys, (0, 0, pad, 0))
+            values = torch.nn.functional.pad(values, (0, 0, pad, 0))
+        padded.append((keys, values))
+    return padded
+
+def concat_rows(layer_groups, width):
+    """Left-pad several batches of cache layers to `width` and stack them along the batch axis."""
+    groups = [left_pad(layers, width) for layers in layer_groups]
+    return [(torch.cat([g[i][0] for g in groups]), torch.cat([g[i][1] for g in groups]))
+            for i in range(len(groups[0]))]
+
+def select_rows(layers, rows, start=0):
+    """Keep batch `rows` and drop the first `start` sequence positions."""
+    return [(keys[rows, :, start:], values[rows, :, start:]) for keys, values in layers]
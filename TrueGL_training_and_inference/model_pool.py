@@ -0,0 +1,343 @@
+import argparse
+import contextlib
+import gc
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from granite_inference import (
+    BASE_MODEL_PATH,
+    CHECKPOINTS_DIR,
+    MAX_LENGTH_PREDICTION,
+    get_latest_checkpoint,
+    load_causal_lm,
+    load_causal_tokenizer,
+)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Demo UI Code"))
+from startup import StartupTimer, load_tokenizer  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+CLASSIFIER_PATH = "models/finetuned"  # BERT 3-class checkpoint used by the demo app
+MEMORY_BUDGET_GB = 8.0  # weights of resident models; least recently used models are evicted above it
+# Files that define a tokenizer; checkpoints whose files hash the same share one tokenizer object
+TOKENIZER_FILES = ("tokenizer.json", "vocab.json", "merges.txt", "vocab.txt", "tokenizer.model",
+                   "tokenizer_config.json", "special_tokens_map.json", "added_tokens.json")
+WEIGHT_PATTERNS = ("*.safetensors", "pytorch_model*.bin")
+HALF_PRECISION = ("float16", "bfloat16")
+
+def tokenizer_key(model_path):
+    """Hash of the checkpoint's tokenizer files, equal for checkpoints with the same vocabulary."""
+    digest = hashlib.sha256()
+    found = False
+    for name in TOKENIZER_FILES:
+        path = os.path.join(model_path, name)
+        if os.path.exists(path):
+            found = True
+            digest.update(name.encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    # Without tokenizer files the tokenizer is specific to this path
+    return digest.hexdigest()[:16] if found else os.path.abspath(model_path)
+
+def estimate_bytes(model_path, device="cpu"):
+    """Expected weight memory before loading: the weight files, doubled when half precision is upcast on CPU."""
+    size = sum(os.path.getsize(path) for pattern in WEIGHT_PATTERNS
+               for path in glob.glob(os.path.join(model_path, pattern)))
+    config_path = os.path.join(model_path, "config.json")
+    if str(device).startswith("cpu") and os.path.exists(config_path):
+        with open(config_path, encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("torch_dtype", config.get("dtype")) in HALF_PRECISION:
+            size *= 2  # load_causal_lm loads float32 on CPU
+    return size
+
+def module_bytes(module):
+    """Bytes held by a torch module's parameters and buffers, counting tied or shared storage once."""
+    storages = {}
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        storage = tensor.untyped_storage()
+        storages[storage.data_ptr()] = storage.nbytes()
+    return sum(storages.values())
+
+def process_rss():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+class ModelSpec:
+    """How to load one named model: load_tokenizer(path), then load(path, tokenizer, device) -> (model, torch module).
+
+    close(model) runs on eviction, e.g. to stop a background thread.
+    """
+
+    def __init__(self, name, path, load_tokenizer, load, close=None):
+        self.name = name
+        self.path = path
+        self.load_tokenizer = load_tokenizer
+        self.load = load
+        self.close = close
+
+class _Entry:
+    def __init__(self, spec):
+        self.spec = spec
+        self.model = None
+        self.tokenizer_key = None
+        self.bytes = 0
+        self.users = 0
+        self.loaded_at = None
+        self.stats = {"loads": 0, "evictions": 0, "hits": 0, "load_seconds": 0.0, "resident_seconds": 0.0}
+
+class ModelPool:
+    """Named models that load on first use and share one memory budget in a single process.
+
+    acquire(name) yields the loaded model, loading it first if needed. Each resident
+    model is charged the bytes of its weights. Before a load, least recently used
+    models are evicted until the new model's estimated size fits in budget_bytes; after
+    it, its measured size is charged and eviction runs again. Models in use by a
+    request are never evicted. If they alone exceed the budget, the pool goes over it
+    and counts that in "over_budget". Checkpoints whose tokenizer files are identical
+    (the fine-tuned and base Granite) share one tokenizer object, kept while any model
+    using it is resident.
+    """
+
+    def __init__(self, budget_bytes=int(MEMORY_BUDGET_GB * 2**30), device=None):
+        self.budget_bytes = budget_bytes
+        self.device = device
+        self._entries = OrderedDict()  # least recently used first
+        self._tokenizers = {}          # tokenizer_key -> [tokenizer, resident models using it]
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # from_pretrained is not thread-safe, so loads run one at a time
+        self._counts = {"over_budget": 0, "tokenizer_loads": 0, "tokenizer_reuses": 0}
+
+    def register(self, spec):
+        self._entries[spec.name] = _Entry(spec)
+        return self
+
+    @property
+    def resident_bytes(self):
+        return sum(entry.bytes for entry in self._entries.values() if entry.model is not None)
+
+    @contextlib.contextmanager
+    def acquire(self, name):
+        """Yield model `name`, loaded on demand; it cannot be evicted until the block exits."""
+        entry = self._entries[name]
+        if not self._use(entry):
+            with self._load_lock:
+                if not self._use(entry):
+                    self._load(entry)
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                self._entries.move_to_end(name)
+
+    def evict(self, name):
+        """Unload model `name` now if it is resident and unused; returns whether it was evicted."""
+        with self._lock:
+            entry = self._entries[name]
+            if entry.model is None or entry.users:
+                return False
+            evicted = [self._take(entry)]
+        self._free(evicted)
+        return True
+
+    def metrics(self):
+        now = time.time()
+        with self._lock:
+            models = {}
+            for name, entry in self._entries.items():
+                resident = entry.model is not None
+                models[name] = {
+                    **entry.stats,
+                    "resident": resident,
+                    "bytes": entry.bytes if resident else 0,
+                    "in_use": entry.users,
+                    "resident_for_seconds": now - entry.loaded_at if resident else 0.0,
+                    "tokenizer": entry.tokenizer_key if resident else None,
+                }
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self.resident_bytes,
+                "process_rss_bytes": process_rss(),
+                "shared_tokenizers": {key: users for key, (_, users) in self._tokenizers.items()},
+                **self._counts,
+                "models": models,
+            }
+
+    def _use(self, entry):
+        """Count a request on entry if it is resident; False if it has to be loaded first."""
+        with self._lock:
+            if entry.model is None:
+                return False
+            entry.users += 1
+            entry.stats["hits"] += 1
+            self._entries.move_to_end(entry.spec.name)
+            return True
+
+    def _load(self, entry):
+        spec = entry.spec
+        estimate = estimate_bytes(spec.path, self.device or "cpu")
+        with self._lock:
+            evicted = self._make_room(estimate)
+        self._free(evicted)
+        started = time.perf_counter()
+        key = tokenizer_key(spec.path)
+        with self._lock:
+            # Count this model as a user of a shared tokenizer before loading, so evict() cannot drop it meanwhile
+            shared = self._tokenizers.get(key)
+            if shared is not None:
+                shared[1] += 1
+                self._counts["tokenizer_reuses"] += 1
+        if shared is not None:
+            tokenizer = shared[0]
+        else:
+            tokenizer = spec.load_tokenizer(spec.path)
+            with self._lock:  # loads run one at a time, so nobody registered this key in between
+                self._tokenizers[key] = [tokenizer, 1]
+                self._counts["tokenizer_loads"] += 1
+        try:
+            model, module = spec.load(spec.path, tokenizer, self.device)
+        except BaseException:
+            with self._lock:
+                self._release_tokenizer(key)
+            raise
+        seconds = time.perf_counter() - started
+        with self._lock:
+            entry.model, entry.tokenizer_key = model, key
+            entry.bytes = module_bytes(module) if module is not None else estimate
+            entry.loaded_at = time.time()
+            entry.users += 1
+            entry.stats["loads"] += 1
+            entry.stats["load_seconds"] += seconds
+            self._entries.move_to_end(spec.name)
+            evicted = self._make_room()
+        self._free(evicted)
+        logger.info(f"Loaded {spec.name} ({entry.bytes / 2**20:.0f} MiB, tokenizer "
+                    f"{'shared' if shared is not None else 'loaded'}) in {seconds:.1f}s; "
+                    f"{self.resident_bytes / 2**20:.0f}/{self.budget_bytes / 2**20:.0f} MiB resident")
+
+    def _make_room(self, incoming=0):
+        """Take least recently used idle models out of the pool until `incoming` more bytes fit (lock held)."""
+        evicted = []
+        for entry in list(self._entries.values()):
+            if self.resident_bytes + incoming <= self.budget_bytes:
+                return evicted
+            if entry.model is not None and not entry.users:
+                evicted.append(self._take(entry))
+        if not incoming and self.resident_bytes > self.budget_bytes:
+            self._counts["over_budget"] += 1
+            logger.warning(f"Models in use hold {self.resident_bytes / 2**20:.0f} MiB, "
+                           f"over the {self.budget_bytes / 2**20:.0f} MiB budget")
+        return evicted
+
+    def _take(self, entry):
+        """Detach a resident model and its tokenizer reference (lock held); _free releases it."""
+        model, entry.model = entry.model, None
+        entry.stats["evictions"] += 1
+        entry.stats["resident_seconds"] += time.time() - entry.loaded_at
+        entry.bytes = 0
+        self._release_tokenizer(entry.tokenizer_key)
+        logger.info(f"Evicting {entry.spec.name} after {time.time() - entry.loaded_at:.0f}s resident")
+        return entry, model
+
+    def _release_tokenizer(self, key):
+        """Drop one model's use of a shared tokenizer, forgetting it after the last (lock held)."""
+        shared = self._tokenizers[key]
+        shared[1] -= 1
+        if not shared[1]:
+            del self._tokenizers[key]
+
+    def _free(self, evicted):
+        """Close evicted models and drop the pool's last references to their weights."""
+        if not evicted:
+            return
+        while evicted:
+            entry, model = evicted.pop()
+            if entry.spec.close:
+                entry.spec.close(model)
+            del model
+        gc.collect()
+
+def classifier_spec(path=CLASSIFIER_PATH, name="classifier"):
+    """The BERT classifier as TruthSeekerInference."""
+    def load(path, tokenizer, device):
+        from inference import TruthSeekerInference
+
+        inference = TruthSeekerInference(path, device=device, tokenizer=tokenizer)
+        return inference, inference.model
+
+    return ModelSpec(name, path, lambda path: load_tokenizer(path, StartupTimer()), load)
+
+def scorer_spec(path, name="scorer", max_length=MAX_LENGTH_PREDICTION):
+    """The fine-tuned Granite as GraniteReliabilityScorer."""
+    def load(path, tokenizer, device):
+        from reliability_scorer import GraniteReliabilityScorer
+
+        tokenizer, model = load_causal_lm(path, device, tokenizer=tokenizer)
+        return GraniteReliabilityScorer(path, max_length=max_length, tokenizer=tokenizer, model=model), model
+
+    return ModelSpec(name, path, load_causal_tokenizer, load)
+
+def justifier_spec(path=BASE_MODEL_PATH, name="justifier", **sampling):
+    """The Granite base model as JustificationService; its decoding thread stops on eviction."""
+    def load(path, tokenizer, device):
+        from justification_service import JustificationService
+
+        tokenizer, model = load_causal_lm(path, device, tokenizer=tokenizer)
+        return JustificationService(tokenizer=tokenizer, model=model, **sampling), model
+
+    return ModelSpec(name, path, load_causal_tokenizer, load, close=lambda service: service.close())
+
+def default_pool(classifier_path=CLASSIFIER_PATH, scorer_path=None, justification_path=BASE_MODEL_PATH,
+                 budget_bytes=int(MEMORY_BUDGET_GB * 2**30), device=None):
+    """The three TrueGL models behind one budget: "classifier", "scorer" and "justifier"."""
+    pool = ModelPool(budget_bytes, device)
+    pool.register(classifier_spec(classifier_path))
+    pool.register(scorer_spec(scorer_path or get_latest_checkpoint(CHECKPOINTS_DIR)))
+    pool.register(justifier_spec(justification_path))
+    return pool
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mixed classify/score/justify workload through one "
+                                                 "memory-budgeted model pool and print its metrics")
+    parser.add_argument("--classifier-path", default=CLASSIFIER_PATH)
+    parser.add_argument("--scorer-path", default=None, help="defaults to the latest checkpoint in CHECKPOINTS_DIR")
+    parser.add_argument("--justification-path", default=BASE_MODEL_PATH)
+    parser.add_argument("--budget-gb", type=float, default=MEMORY_BUDGET_GB)
+    parser.add_argument("--sequence", default="classifier,scorer,classifier,justifier,scorer,classifier",
+                        help="models to call, in order")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    pool = default_pool(args.classifier_path, args.scorer_path, args.justification_path,
+                        int(args.budget_gb * 2**30), args.device)
+    statement = "The Great Wall of China is visible from space with the naked eye."
+    for name in args.sequence.split(","):
+        started = time.perf_counter()
+        with pool.acquire(name) as model:
+            if name == "classifier":
+                result = model.predict_batch([statement])[0]["label"]
+            elif name == "scorer":
+                result = round(model.score(statement), 3)
+            else:
+                import asyncio
+                result = asyncio.run(model.justify(statement, 0.2, max_new_tokens=args.max_new_tokens))[:60]
+        print(f"{name:>10}: {1000 * (time.perf_counter() - started):8.0f} ms  {result!r}")
+    print(json.dumps(pool.metrics(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import torch
+from torch.utils.data import Dataset
+
+def pack_lengths(lengths, max_length):
+    """Group sample indices into packs of at most max_length tokens (first-fit decreasing)."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__, reverse=True)
+    packs, room = [], []
+    for idx in order:
+        length = min(lengths[idx], max_length)
+        for p, free in enumerate(room):
+            if length <= free:
+                packs[p].append(idx)
+                room[p] -= length
+                break
+        else:
+            packs.append([idx])
+            room.append(max_length - length)
+    return packs
+
+class PackedDataset(Dataset):
+    """Concatenate several unpadded samples of `dataset` into one sequence of up to max_length tokens.
+
+    Each item carries position_ids that restart at 0 for every sample, which
+    PackingCollator turns into a block-diagonal causal mask so packed samples never
+    attend to each other.
+    """
+
+    def __init__(self, dataset, max_length):
+        self.dataset = dataset
+        self.max_length = max_length
+        self.sample_lengths = dataset.lengths()
+        self.packs = pack_lengths(self.sample_lengths, max_length)
+
+    def __len__(self):
+        return len(self.packs)
+
+    def lengths(self):
+        return [sum(self.sample_lengths[i] for i in pack) for pack in self.packs]
+
+    def __getitem__(self, idx):
+        samples = [self.dataset[i] for i in self.packs[idx]]
+        labels = []
+        for s in samples:
+            # A sample's first token would otherwise be predicted from the previous sample's last one
+            labels.append(torch.cat([torch.tensor([-100]), s["labels"][1:]]))
+        return {
+            "input_ids": torch.cat([s["input_ids"] for s in samples]),
+            "labels": torch.cat(labels),
+            "position_ids": torch.cat([torch.arange(len(s["input_ids"])) for s in samples]),
+        }
+
+class PackingCollator:
+    """Right-pad packed samples and build their block-diagonal causal attention mask.
+
+    The mask is a (batch, 1, seq, seq) additive float mask in mask_dtype (the model's
+    dtype), which both eager and SDPA attention accept as is. Padding positions attend
+    only to themselves, so no attention row is fully masked. Unpacked samples (no
+    position_ids) are treated as a single segment, so the same collator serves the
+    evaluation set.
+    """
+
+    def __init__(self, pad_token_id, pad_to_multiple_of=8, mask_dtype=torch.float32, label_pad_token_id=-100):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.mask_dtype = mask_dtype
+        self.label_pad_token_id = label_pad_token_id
+
+    def __call__(self, features):
+        width = max(len(f["input_ids"]) for f in features)
+        if self.pad_to_multiple_of:
+            width = -(-width // self.pad_to_multiple_of) * self.pad_to_multiple_of
+        batch_size = len(features)
+        input_ids = torch.full((batch_size, width), self.pad_token_id, dtype=torch.long)
+        labels = torch.full((batch_size, width), self.label_pad_token_id, dtype=torch.long)
+        position_ids = torch.zeros((batch_size, width), dtype=torch.long)
+        # Segment id per position; padding gets unique negative ids so it forms 1-token segments
+        segments = -torch.arange(1, width + 1).repeat(batch_size, 1)
+        for row, f in enumerate(features):
+            n = len(f["input_ids"])
+            positions = torch.as_tensor(f.get("position_ids", range(n)), dtype=torch.long)
+            input_ids[row, :n] = torch.as_tensor(f["input_ids"], dtype=torch.long)
+            labels[row, :n] = torch.as_tensor(f["labels"], dtype=torch.long)
+            position_ids[row, :n] = positions
+            segments[row, :n] = (positions == 0).cumsum(0)
+
+        causal = torch.ones(width, width, dtype=torch.bool).tril()
+        allowed = (segments[:, :, None] == segments[:, None, :]) & causal
+        attention_mask = torch.zeros((batch_size, 1, width, width), dtype=self.mask_dtype)
+        attention_mask.masked_fill_(~allowed[:, None], torch.finfo(self.mask_dtype).min)
+        return {
+            "input_ids": input_ids,
+            "labels": labels,
+            "position_ids": position_ids,
+            "attention_mask": attention_mask,
+        }
+
+def mask_prompt(input_ids, prompt_length, label_pad_token_id=-100):
+    """Labels that supervise only the completion after the first prompt_length tokens."""
+    labels = input_ids.clone()
+    labels[:prompt_length] = label_pad_token_id
+    return labels
@@ -0,0 +1,80 @@
+import hashlib
+
+import torch
+
+from granite_inference import JUSTIFICATION_PREFIX, build_justification_prompt
+from kv_cache import cache_layers, make_cache
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+class SharedPrefixCache:
+    """KV cache of the constant few-shot preamble of every justification prompt.
+
+    The preamble is run through the model once and its keys/values are reused for
+    every batch, so prefill only covers the statement-specific suffix. The prefix
+    token ids are the tokens that tokenizing the preamble alone and tokenizing a
+    full prompt agree on, so a prompt split as prefix + suffix tokenizes exactly as
+    before. The cache is recomputed whenever the preamble text, the model object,
+    its weights' dtype/device or the tokenizer change (see refresh()).
+    """
+
+    def __init__(self, model, tokenizer, prefix_text=JUSTIFICATION_PREFIX):
+        self.key = None
+        self.refresh(model, tokenizer, prefix_text)
+
+    @staticmethod
+    def cache_key(model, tokenizer, prefix_text):
+        parts = [prefix_text, str(id(model)), getattr(model.config, "_name_or_path", ""), str(model.dtype),
+                 str(model.device), getattr(tokenizer, "name_or_path", ""), str(len(tokenizer))]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def refresh(self, model, tokenizer, prefix_text=JUSTIFICATION_PREFIX):
+        """Recompute the prefix KV cache if the model, tokenizer or template changed; returns self."""
+        key = self.cache_key(model, tokenizer, prefix_text)
+        if key == self.key:
+            return self
+        prefix_ids = tokenizer(prefix_text)["input_ids"]
+        probe_ids = tokenizer(build_justification_prompt("probe", 0.5))["input_ids"]
+        self.ids = prefix_ids[:_common_prefix(prefix_ids, probe_ids)]
+        with torch.inference_mode():
+            outputs = model(input_ids=torch.tensor([self.ids], device=model.device), use_cache=True)
+        self.layers = cache_layers(outputs.past_key_values)
+        self.key = key
+        return self
+
+    def __len__(self):
+        return len(self.ids)
+
+    def suffix(self, prompt_ids):
+        """The part of prompt_ids after the shared prefix, or None if the prompt does not start with it."""
+        n = len(self.ids)
+        if len(prompt_ids) <= n or prompt_ids[:n] != self.ids:
+            return None
+        return prompt_ids[n:]
+
+    def expand(self, batch_size):
+        """A fresh DynamicCache holding the prefix for batch_size rows (the stored tensors are never modified)."""
+        return make_cache([(keys.expand(batch_size, -1, -1, -1), values.expand(batch_size, -1, -1, -1))
+                           for keys, values in self.layers])
+
+    def prefill_inputs(self, suffixes, pad_token_id):
+        """input_ids / attention_mask / position_ids for running left-padded suffixes on top of the prefix.
+
+        Rows are laid out as [prefix][padding][suffix]; the padding is masked out and
+        suffix positions continue from the end of the prefix.
+        """
+        width = max(len(s) for s in suffixes)
+        input_ids = torch.full((len(suffixes), width), pad_token_id, dtype=torch.long)
+        suffix_mask = torch.zeros((len(suffixes), width), dtype=torch.long)
+        for row, suffix in enumerate(suffixes):
+            input_ids[row, width - len(suffix):] = torch.tensor(suffix)
+            suffix_mask[row, width - len(suffix):] = 1
+        attention_mask = torch.cat([torch.ones((len(suffixes), len(self.ids)), dtype=torch.long), suffix_mask], dim=1)
+        position_ids = len(self.ids) + (suffix_mask.cumsum(dim=1) - 1).clamp(min=0)
+        return input_ids, attention_mask, position_ids
@@ -0,0 +1,117 @@
+import inspect
+
+import torch
+
+from granite_inference import (
+    MAX_LENGTH_PREDICTION,
+    PREDICTION_LABEL_SUFFIX,
+    PREDICTION_PROMPT,
+    load_causal_lm,
+)
+
+# Scores the model can express with one decimal place: 0.0, 0.1, ..., 0.9, 1.0
+SCORE_BINS = [d / 10 for d in range(11)]
+
+class GraniteReliabilityScorer:
+    """Score reliability from next-token logits instead of generate() + regex.
+
+    Each prompt is extended with the teacher-forced answer prefix " 0." and run
+    through one forward pass. The logits just before the integer digit give
+    P(0) vs P(1), and the logits after the decimal point give P(tenths digit).
+    Together they form a distribution over SCORE_BINS whose expected value is the
+    score. Only the last few positions are projected onto the vocabulary.
+    """
+
+    def __init__(self, model_path, device=None, max_length=MAX_LENGTH_PREDICTION, tokenizer=None, model=None):
+        if model is None:
+            tokenizer, model = load_causal_lm(model_path, device)
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = model.device
+        self.max_length = max_length
+        self._prompt_head = PREDICTION_PROMPT[:-len(PREDICTION_LABEL_SUFFIX)]
+        self._build_answer_tokens()
+        forward_params = inspect.signature(self.model.forward).parameters
+        self._keep_kwarg = next((k for k in ("logits_to_keep", "num_logits_to_keep") if k in forward_params), None)
+
+    def _encode(self, text):
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def _build_answer_tokens(self):
+        """Work out which tokens spell ' 0.', ' 1.' and the tenths digit after PREDICTION_LABEL_SUFFIX."""
+        anchor = self._encode(PREDICTION_LABEL_SUFFIX)
+        zero, one = self._encode(PREDICTION_LABEL_SUFFIX + " 0."), self._encode(PREDICTION_LABEL_SUFFIX + " 1.")
+        if zero[:len(anchor)] != anchor or len(zero) != len(one):
+            raise ValueError("Tokenizer merges the label suffix with the answer; cannot score from logits")
+        suffix_zero, suffix_one = zero[len(anchor):], one[len(anchor):]
+        diff = [i for i, (a, b) in enumerate(zip(suffix_zero, suffix_one)) if a != b]
+        if len(diff) != 1:
+            raise ValueError("Tokenizer does not encode the integer digit as a single token")
+        digits = []
+        for d in range(10):
+            ids = self._encode(PREDICTION_LABEL_SUFFIX + f" 0.{d}")
+            if ids[:-1] != zero:
+                raise ValueError("Tokenizer does not split decimal digits into single tokens")
+            digits.append(ids[-1])
+        # tail_ids = "\nLabel:" + " 0." teacher-forced; the integer digit sits at tail index integer_pos
+        self.tail_ids = anchor + suffix_zero
+        self.integer_pos = len(anchor) + diff[0]
+        self.integer_token_ids = [suffix_zero[diff[0]], suffix_one[diff[0]]]
+        self.digit_token_ids = digits
+
+    def _encode_prompts(self, statements):
+        budget = self.max_length - len(self.tail_ids)
+        heads = self.tokenizer([self._prompt_head.format(statement=str(s)) for s in statements],
+                               truncation=True, max_length=budget)["input_ids"]
+        return [head + self.tail_ids for head in heads]
+
+    def _tail_logits(self, sequences):
+        """Left-pad so every row ends together, then keep logits for the tail positions only."""
+        width = max(len(seq) for seq in sequences)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = torch.full((len(sequences), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+        for row, seq in enumerate(sequences):
+            input_ids[row, width - len(seq):] = torch.tensor(seq)
+            attention_mask[row, width - len(seq):] = 1
+        position_ids = (attention_mask.cumsum(dim=1) - 1).clamp(min=0)
+        keep = len(self.tail_ids)
+        kwargs = {self._keep_kwarg: keep} if self._keep_kwarg else {}
+        outputs = self.model(
+            input_ids=input_ids.to(self.device),
+            attention_mask=attention_mask.to(self.device),
+            position_ids=position_ids.to(self.device),
+            use_cache=False,
+            **kwargs,
+        )
+        return outputs.logits[:, -keep:, :].float()
+
+    def score_batch(self, statements, batch_size=8):
+        """Return {"score", "distribution", "answer_mass"} per statement, in input order."""
+        sequences = self._encode_prompts(statements)
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+        results = [None] * len(sequences)
+        bins = torch.tensor(SCORE_BINS)
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                logits = self._tail_logits([sequences[i] for i in chunk]).cpu()
+                # Logits at position p predict token p + 1
+                integer_logits = logits[:, self.integer_pos - 1, self.integer_token_ids]
+                digit_logits = logits[:, -1, self.digit_token_ids]
+                integer_probs = torch.softmax(integer_logits, dim=-1)
+                digit_probs = torch.softmax(digit_logits, dim=-1)
+                distribution = torch.cat([integer_probs[:, :1] * digit_probs, integer_probs[:, 1:]], dim=-1)
+                # How much of the model's next-token mass falls on a valid answer digit
+                answer_mass = torch.softmax(logits[:, self.integer_pos - 1], dim=-1)[:, self.integer_token_ids].sum(dim=-1)
+                scores = distribution @ bins
+                for row, i in enumerate(chunk):
+                    results[i] = {
+                        "score": scores[row].item(),
+                        "distribution": distribution[row].tolist(),
+                        "answer_mass": answer_mass[row].item(),
+                    }
+        return results
+
+    def score(self, statement):
+        return self.score_batch([statement])[0]["score"]
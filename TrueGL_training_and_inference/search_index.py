@@ -0,0 +1,336 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+BM25_K1 = 1.2
+BM25_B = 0.75
+TRUTH_WEIGHT = 0.3      # share of the final score taken by the classifier's truth score
+UNSCORED_TRUTH = 0.5    # truth score assumed for pages the classifier has not scored yet
+DEFAULT_TOP_K = 10
+MIN_TOKEN_LENGTH = 3    # crawler.js only indexes words longer than two characters
+BLOCK_POSTINGS = 4_000_000  # postings buffered before they are sorted and encoded
+SNIPPET_LENGTH = 200
+INDEX_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower()) if len(t) >= MIN_TOKEN_LENGTH]
+
+def encode_varints(values):
+    """LEB128-encode non-negative integers; returns (uint8 array, bytes used per value)."""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    shift = 7
+    while True:
+        rest = values >> np.uint64(shift)
+        if not rest.any():
+            break
+        nbytes += rest > 0
+        shift += 7
+    owner = np.repeat(np.arange(len(values)), nbytes)
+    position = np.arange(int(nbytes.sum())) - (np.cumsum(nbytes) - nbytes)[owner]
+    out = ((values[owner] >> (7 * position).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    out[position < nbytes[owner] - 1] |= 0x80
+    return out, nbytes
+
+def decode_varints(buf):
+    data = np.frombuffer(buf, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    last = data < 0x80
+    if last.all():
+        return data.astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    owner = np.cumsum(last) - last
+    position = np.arange(len(data)) - starts[owner]
+    parts = (data & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(parts, starts)
+
+def iter_pages(path, chunksize=50_000):
+    """(url, title, content) from crawler.js's index.json, crawler.py's SQLite store, JSONL, CSV or Parquet."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            pages = json.load(f)["pages"]
+        for url, page in pages.items():
+            yield url, page.get("title", ""), page.get("content", "")
+    elif path.endswith((".sqlite3", ".sqlite", ".db")):  # crawler.py's store
+        with contextlib.closing(sqlite3.connect(path)) as conn:
+            yield from conn.execute("SELECT url, title, content FROM pages ORDER BY id")
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                page = json.loads(line)
+                yield page["url"], page.get("title", ""), page.get("content", "")
+    else:
+        frames = [pd.read_parquet(path)] if path.endswith(".parquet") else pd.read_csv(path, chunksize=chunksize)
+        for df in frames:
+            df = df.fillna("")
+            titles = df["title"] if "title" in df else [""] * len(df)
+            yield from zip(df["url"].astype(str), titles, df["content"].astype(str))
+
+def load_truth_scores(path):
+    """url -> truth score in [0, 1] from a CSV/Parquet file with url and truth_score columns."""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    return dict(zip(df["url"].astype(str), df["truth_score"].astype(float)))
+
+class IndexBuilder:
+    """Build the on-disk index in one pass over the pages.
+
+    Postings are buffered as flat (term id, doc id, tf) arrays. Every BLOCK_POSTINGS
+    postings they are sorted by term and each term's doc-id gaps and term
+    frequencies are varint-encoded into a segment. Doc ids only grow, so a term's
+    final postings list is its segments concatenated in order. Page metadata is
+    written to docs.jsonl as it arrives.
+    """
+
+    def __init__(self, out_dir, block_postings=BLOCK_POSTINGS):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.block_postings = block_postings
+        self.vocab = {}
+        self.segments = []          # per term id: list of (doc gap bytes, tf bytes)
+        self.doc_freqs = array("I")
+        self.last_doc = array("q")  # last doc id already encoded for each term
+        self.doc_lengths = array("I")
+        self.doc_offsets = array("Q")
+        self.urls = set()
+        self._terms, self._docs, self._tfs = array("I"), array("I"), array("I")
+        self._docs_file = open(os.path.join(out_dir, "docs.jsonl"), "wb")
+
+    def add(self, url, title, content):
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(f"{title} {content}")
+        for term, tf in Counter(tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self.vocab[term] = len(self.vocab)
+                self.segments.append([])
+                self.doc_freqs.append(0)
+                self.last_doc.append(0)
+            self._terms.append(term_id)
+            self._docs.append(doc_id)
+            self._tfs.append(tf)
+        self.doc_lengths.append(len(tokens))
+        self.doc_offsets.append(self._docs_file.tell())
+        self._docs_file.write(json.dumps({"url": url, "title": title, "content": content}).encode() + b"\n")
+        if len(self._terms) >= self.block_postings:
+            self._flush()
+        return True
+
+    def _flush(self):
+        if not len(self._terms):
+            return
+        terms = np.frombuffer(self._terms, dtype=np.uint32).astype(np.int64)
+        order = np.argsort(terms, kind="stable")  # stable: doc ids stay ascending within a term
+        terms, docs = terms[order], np.frombuffer(self._docs, dtype=np.uint32).astype(np.int64)[order]
+        tfs = np.frombuffer(self._tfs, dtype=np.uint32)[order]
+        starts = np.flatnonzero(np.concatenate(([True], terms[1:] != terms[:-1])))
+        block_terms = terms[starts]
+
+        gaps = np.diff(docs, prepend=0)
+        last_doc = np.frombuffer(self.last_doc, dtype=np.int64)
+        gaps[starts] = docs[starts] - last_doc[block_terms]
+        gap_bytes, gap_sizes = encode_varints(gaps)
+        tf_bytes, tf_sizes = encode_varints(tfs)
+        ends = np.append(starts[1:], len(terms))
+        gap_bounds, tf_bounds = np.cumsum(gap_sizes), np.cumsum(tf_sizes)
+        for term_id, start, end in zip(block_terms.tolist(), starts.tolist(), ends.tolist()):
+            g0 = gap_bounds[start - 1] if start else 0
+            t0 = tf_bounds[start - 1] if start else 0
+            self.segments[term_id].append((gap_bytes[g0:gap_bounds[end - 1]].tobytes(),
+                                           tf_bytes[t0:tf_bounds[end - 1]].tobytes()))
+            self.doc_freqs[term_id] += end - start
+            self.last_doc[term_id] = int(docs[end - 1])
+        self._terms, self._docs, self._tfs = array("I"), array("I"), array("I")
+
+    def finish(self, truth_scores=None):
+        """Write postings, lexicon, doc lengths and the truth score sidecar; returns the index directory."""
+        self._flush()
+        self._docs_file.close()
+        terms = sorted(self.vocab)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_bytes = np.zeros(len(terms), dtype=np.int64)
+        with open(os.path.join(self.out_dir, "postings.bin"), "wb") as f:
+            for i, term in enumerate(terms):
+                segments = self.segments[self.vocab[term]]
+                gaps = b"".join(g for g, _ in segments)
+                f.write(gaps)
+                f.write(b"".join(t for _, t in segments))
+                doc_bytes[i] = len(gaps)
+                offsets[i + 1] = f.tell()
+        with open(os.path.join(self.out_dir, "terms.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(terms))
+        np.save(os.path.join(self.out_dir, "term_offsets.npy"), offsets)
+        np.save(os.path.join(self.out_dir, "term_doc_bytes.npy"), doc_bytes)
+        np.save(os.path.join(self.out_dir, "doc_freqs.npy"),
+                np.frombuffer(self.doc_freqs, dtype=np.uint32)[[self.vocab[t] for t in terms]])
+        np.save(os.path.join(self.out_dir, "doc_lengths.npy"), np.frombuffer(self.doc_lengths, dtype=np.uint32))
+        np.save(os.path.join(self.out_dir, "doc_offsets.npy"), np.frombuffer(self.doc_offsets, dtype=np.uint64))
+        write_truth_scores(self.out_dir, read_urls(self.out_dir), truth_scores or {})
+        with open(os.path.join(self.out_dir, "meta.json"), "w") as f:
+            json.dump({"version": INDEX_VERSION, "num_docs": len(self.doc_lengths), "num_terms": len(terms),
+                       "avg_doc_length": float(np.mean(self.doc_lengths)) if len(self.doc_lengths) else 0.0}, f)
+        return self.out_dir
+
+def read_urls(index_dir):
+    """Page urls in doc id order."""
+    with open(os.path.join(index_dir, "docs.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line)["url"] for line in f]
+
+def write_truth_scores(index_dir, urls, truth_scores):
+    """truth_scores.npy: one float32 per doc id, NaN where the page has no score yet."""
+    scores = np.array([truth_scores.get(url, np.nan) for url in urls], dtype=np.float32)
+    np.save(os.path.join(index_dir, "truth_scores.npy"), scores)
+    return int(np.isfinite(scores).sum())
+
+def build_index(pages, out_dir, truth_scores=None, block_postings=BLOCK_POSTINGS):
+    builder = IndexBuilder(out_dir, block_postings)
+    for url, title, content in pages:
+        builder.add(url, title, content)
+    return builder.finish(truth_scores)
+
+class SearchIndex:
+    """Query side of the index: BM25 over compressed postings, blended with per-page truth scores."""
+
+    def __init__(self, index_dir, k1=BM25_K1, b=BM25_B):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != INDEX_VERSION:
+            raise ValueError(f"{index_dir} has index version {self.meta['version']}, expected {INDEX_VERSION}")
+        self.index_dir = index_dir
+        self.k1, self.b = k1, b
+        with open(os.path.join(index_dir, "terms.txt"), encoding="utf-8") as f:
+            terms = f.read().split("\n") if self.meta["num_terms"] else []
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.term_offsets = np.load(os.path.join(index_dir, "term_offsets.npy"))
+        self.term_doc_bytes = np.load(os.path.join(index_dir, "term_doc_bytes.npy"))
+        self.doc_freqs = np.load(os.path.join(index_dir, "doc_freqs.npy"))
+        self.doc_lengths = np.load(os.path.join(index_dir, "doc_lengths.npy"))
+        self.doc_offsets = np.load(os.path.join(index_dir, "doc_offsets.npy"))
+        self.truth_scores = np.load(os.path.join(index_dir, "truth_scores.npy"))
+        self.postings = np.memmap(os.path.join(index_dir, "postings.bin"), dtype=np.uint8, mode="r") \
+            if self.term_offsets[-1] else np.zeros(0, dtype=np.uint8)
+        self.num_docs = self.meta["num_docs"]
+        avg = self.meta["avg_doc_length"] or 1.0
+        # Per-doc part of the BM25 denominator, computed once
+        self._length_norm = (self.k1 * (1 - self.b + self.b * self.doc_lengths / avg)).astype(np.float32)
+
+    def postings_for(self, term):
+        """(doc ids, term frequencies) of a term, or None if it is not in the index."""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return None
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        split = start + self.term_doc_bytes[term_id]
+        return np.cumsum(decode_varints(self.postings[start:split])), decode_varints(self.postings[split:end])
+
+    def bm25(self, query):
+        """(candidate doc ids, BM25 scores) for pages containing any query term."""
+        scores = None
+        for term, query_tf in Counter(tokenize(query)).items():
+            postings = self.postings_for(term)
+            if postings is None:
+                continue
+            docs, tfs = postings
+            df = len(docs)
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            if scores is None:
+                scores = np.zeros(self.num_docs, dtype=np.float32)
+            scores[docs] += query_tf * idf * tfs * (self.k1 + 1) / (tfs + self._length_norm[docs])
+        if scores is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        candidates = np.flatnonzero(scores)
+        return candidates, scores[candidates]
+
+    def search(self, query, k=DEFAULT_TOP_K, truth_weight=TRUTH_WEIGHT):
+        """Top-k pages for the query by (1 - w) * BM25 / max BM25 + w * truth score."""
+        candidates, bm25 = self.bm25(query)
+        if not len(candidates):
+            return []
+        truth = self.truth_scores[candidates]
+        truth = np.where(np.isfinite(truth), truth, UNSCORED_TRUTH)
+        blended = (1 - truth_weight) * bm25 / bm25.max() + truth_weight * truth
+        if len(candidates) > k:
+            top = np.argpartition(-blended, k - 1)[:k]  # O(n) partial selection, then sort only the top k
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-blended[top], kind="stable")]
+        results = []
+        for i in top:
+            page = self.document(int(candidates[i]))
+            content = page["content"]
+            results.append({
+                "url": page["url"],
+                "title": page["title"],
+                "content": content[:SNIPPET_LENGTH] + "..." if len(content) > SNIPPET_LENGTH else content,
+                "score": float(blended[i]),
+                "bm25": float(bm25[i]),
+                "truth_score": None if math.isnan(self.truth_scores[candidates[i]]) else float(truth[i]),
+            })
+        return results
+
+    def document(self, doc_id):
+        with open(os.path.join(self.index_dir, "docs.jsonl"), "rb") as f:
+            f.seek(int(self.doc_offsets[doc_id]))
+            return json.loads(f.readline())
+
+def index_size(index_dir):
+    """Bytes on disk per index file."""
+    return {name: os.path.getsize(os.path.join(index_dir, name)) for name in sorted(os.listdir(index_dir))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the BM25 + truth score search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="bulk-build an index from crawled pages")
+    build.add_argument("pages", help="crawler.js index.json, crawler.py .sqlite3 store, "
+                                     "or .jsonl/.csv/.parquet with url/title/content")
+    build.add_argument("out_dir")
+    build.add_argument("--truth-scores", default=None, help="CSV/Parquet with url and truth_score columns")
+    build.add_argument("--block-postings", type=int, default=BLOCK_POSTINGS)
+    scores = commands.add_parser("scores", help="refresh an index's truth scores from a sidecar "
+                                                "(e.g. Demo UI Code/score_pages.py's truth_scores.parquet)")
+    scores.add_argument("index_dir")
+    scores.add_argument("truth_scores", help="CSV/Parquet with url and truth_score columns")
+    query = commands.add_parser("query", help="search an index")
+    query.add_argument("index_dir")
+    query.add_argument("query")
+    query.add_argument("--k", type=int, default=DEFAULT_TOP_K)
+    query.add_argument("--truth-weight", type=float, default=TRUTH_WEIGHT)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        truth_scores = load_truth_scores(args.truth_scores) if args.truth_scores else None
+        build_index(iter_pages(args.pages), args.out_dir, truth_scores, args.block_postings)
+        with open(os.path.join(args.out_dir, "meta.json")) as f:
+            meta = json.load(f)
+        print(f"Indexed {meta['num_docs']} pages, {meta['num_terms']} terms in {time.perf_counter() - start:.1f}s; "
+              f"{sum(index_size(args.out_dir).values()) / 1e6:.1f} MB in {args.out_dir}")
+    elif args.command == "scores":
+        urls = read_urls(args.index_dir)
+        scored = write_truth_scores(args.index_dir, urls, load_truth_scores(args.truth_scores))
+        print(f"{scored} of {len(urls)} pages in {args.index_dir} have a truth score")
+    else:
+        index = SearchIndex(args.index_dir)
+        start = time.perf_counter()
+        results = index.search(args.query, args.k, args.truth_weight)
+        print(json.dumps({"query": args.query, "results": results,
+                          "took_ms": round((time.perf_counter() - start) * 1000, 2)}, indent=2))
+
+if __name__ == "__main__":
+    main()
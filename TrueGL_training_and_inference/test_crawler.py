@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+from urllib.parse import urlsplit
+
+import crawler
+from benchmark_crawler import TAIL_HTML, FixtureSite, crawl
+from crawler import DONE, LEASED, QUEUED, SKIPPED, Crawler
+
+NUM_PAGES = 60
+UNIQUE_PAGES = NUM_PAGES - NUM_PAGES // 10  # every tenth page repeats the text of the one before it
+BASE_PORT = 18380
+
+def run_with_site(scenario, num_hosts=3):
+    """Start the fixture site, await scenario(site), stop the site; returns the scenario's result."""
+    async def run():
+        site = FixtureSite(NUM_PAGES, num_hosts, latency=0, base_port=BASE_PORT)
+        await site.start()
+        try:
+            return await scenario(site)
+        finally:
+            await site.stop()
+    return asyncio.run(run())
+
+def query(db_path, sql, *params):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+def test_bloom_filter_admits_each_url_once(tmp_path):
+    spider = Crawler(str(tmp_path / "crawl.sqlite3"))
+    try:
+        assert spider.add_urls(["http://a/1", "http://a/1", "http://a/2"], 0) == 2
+        assert spider.add_urls(["http://a/2", "http://a/3"], 1) == 1
+    finally:
+        spider.close()
+    # A new crawler over the same store seeds its Bloom filter from the frontier
+    spider = Crawler(str(tmp_path / "crawl.sqlite3"))
+    try:
+        assert spider.add_urls(["http://a/1", "http://a/2", "http://a/3", "http://a/4"], 0) == 1
+    finally:
+        spider.close()
+
+def test_crawl_fetches_every_page_once_and_dedups_content(tmp_path):
+    db_path = str(tmp_path / "crawl.sqlite3")
+    stats = run_with_site(lambda site: crawl(site, db_path, concurrency=8, per_host_rate=0))
+
+    assert stats["stored"] == UNIQUE_PAGES
+    assert stats["duplicates"] == NUM_PAGES - UNIQUE_PAGES
+    assert stats["failed"] == 0
+    assert query(db_path, "SELECT COUNT(DISTINCT content_hash) FROM pages") == [(UNIQUE_PAGES,)]
+    assert query(db_path, "SELECT COUNT(*) FROM frontier WHERE url LIKE '%/page/%'") == [(NUM_PAGES,)]
+
+def test_pages_are_requested_at_most_once(tmp_path):
+    db_path = str(tmp_path / "crawl.sqlite3")
+
+    async def scenario(site):
+        await crawl(site, db_path, concurrency=8, per_host_rate=0)
+        return site.requests
+
+    requests = run_with_site(scenario)
+    pages = {path: n for path, n in requests.items() if path.startswith("/page/")}
+    assert len(pages) == NUM_PAGES
+    assert max(pages.values()) == 1
+
+def test_robots_txt_disallow_is_respected(tmp_path):
+    db_path = str(tmp_path / "crawl.sqlite3")
+
+    async def scenario(site):
+        stats = await crawl(site, db_path, concurrency=4, per_host_rate=0)
+        return stats, site.requests
+
+    stats, requests = run_with_site(scenario)
+    private = query(db_path, "SELECT status, error FROM frontier WHERE url LIKE '%/private/%'")
+    assert private and all(row == (SKIPPED, "robots.txt") for row in private)
+    assert stats["skipped"] == len(private)
+    assert not any(path.startswith("/private/") for path in requests)
+    assert requests["/robots.txt"] == 3  # once per host
+
+def test_resume_from_sqlite_frontier_after_interruption(tmp_path):
+    db_path = str(tmp_path / "crawl.sqlite3")
+
+    async def scenario(site):
+        first = await crawl(site, db_path, concurrency=4, per_host_rate=0, max_pages=UNIQUE_PAGES // 2)
+        first_paths = {urlsplit(url).path for (url,) in query(db_path, "SELECT url FROM pages")}
+        # A process killed mid-crawl leaves leased rows behind; reopening the store must requeue them
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE frontier SET status = ? WHERE id IN "
+                         "(SELECT id FROM frontier WHERE status = ? LIMIT 3)", (LEASED, QUEUED))
+        before = dict(site.requests)
+        second = await crawl(site, db_path, concurrency=4, per_host_rate=0, seeds=[])
+        refetched = {path for path in first_paths if site.requests[path] > before[path]}
+        return first, second, first_paths, refetched
+
+    first, second, first_paths, refetched = run_with_site(scenario)
+    assert first["stored"] == UNIQUE_PAGES // 2 == len(first_paths)
+    assert second["stored"] == UNIQUE_PAGES  # counted from the store, so it includes the first run
+    assert query(db_path, "SELECT COUNT(DISTINCT content_hash), COUNT(*) FROM pages") == [(UNIQUE_PAGES, UNIQUE_PAGES)]
+    assert query(db_path, "SELECT COUNT(*) FROM frontier WHERE status IN (?, ?)", QUEUED, LEASED) == [(0,)]
+    assert not refetched, "pages stored before the restart were fetched again"
+
+def test_large_body_is_read_whole(tmp_path):
+    db_path = str(tmp_path / "crawl.sqlite3")
+
+    async def scenario(site):
+        stats = await crawl(site, db_path, concurrency=2, per_host_rate=0,
+                            seeds=[f"http://127.0.0.1:{site.ports[0]}/big"])
+        return stats, len(site.big_html().encode())
+
+    stats, big_bytes = run_with_site(scenario, num_hosts=1)
+    assert big_bytes > 64 * 1024  # spans many network reads
+    assert stats["bytes"] == big_bytes + len(TAIL_HTML.encode())
+    assert query(db_path, "SELECT status FROM frontier WHERE url LIKE '%/tail'") == [(DONE,)]
+
+def test_oversized_body_is_capped(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "crawl.sqlite3")
+    monkeypatch.setattr(crawler, "MAX_BODY_BYTES", 100_000)
+
+    async def scenario(site):
+        return await crawl(site, db_path, concurrency=2, per_host_rate=0,
+                           seeds=[f"http://127.0.0.1:{site.ports[0]}/big"])
+
+    stats = run_with_site(scenario, num_hosts=1)
+    assert stats["fetched"] == 1 and stats["bytes"] == 100_000
+    assert query(db_path, "SELECT COUNT(*) FROM frontier WHERE url LIKE '%/tail'") == [(0,)]  # link was past the cap
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from justification_service import ContinuousBatchingEngine, JustificationError, create_app
+
+VOCAB_SIZE = 64
+
+class LetterTokenizer:
+    """Just enough of a tokenizer for the engine: ids decode to lowercase letters and nothing is EOS."""
+
+    pad_token_id = 0
+    eos_token_id = -1
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(ord("a") + i % 26) for i in ids)
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=VOCAB_SIZE, hidden_size=16, intermediate_size=32, num_hidden_layers=1,
+                         num_attention_heads=2, num_key_value_heads=2, max_position_embeddings=4096)
+    return LlamaForCausalLM(config).eval()
+
+class Waiter:
+    """Records the events of one request, like stream() and justify_batch do."""
+
+    def __init__(self):
+        self.events = []
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def __call__(self, delta, done):
+        self.events.append((delta, done))
+        self.started.set()
+        if done:
+            self.finished.set()
+
+def test_stop_mid_generation_fails_every_waiter(model):
+    engine = ContinuousBatchingEngine(model, LetterTokenizer(), max_batch_size=2, seed=0, prefix_reuse=False).start()
+    waiters = [Waiter() for _ in range(3)]  # two decoding, one still pending
+    requests = [engine.submit([1, 2, 3 + i], 100_000, waiter) for i, waiter in enumerate(waiters)]
+    assert waiters[0].started.wait(30) and waiters[1].started.wait(30)
+
+    engine.stop()
+
+    for request, waiter in zip(requests, waiters):
+        assert waiter.finished.wait(5), "waiter never got a final event"
+        assert [done for _, done in waiter.events].count(True) == 1
+        assert isinstance(request.error, JustificationError)
+    assert engine.stats["failed"] == 3
+    with pytest.raises(JustificationError):
+        engine.submit([1, 2], 4, Waiter())
+
+def test_failed_step_fails_batch_and_keeps_serving(model):
+    engine = ContinuousBatchingEngine(model, LetterTokenizer(), max_batch_size=4, seed=0, prefix_reuse=False)
+    decode_step, calls = engine._decode_step, []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("simulated OOM")
+        return decode_step()
+
+    engine._decode_step = flaky
+    engine.start()
+    try:
+        first = Waiter()
+        failed = engine.submit([1, 2, 3], 50, first)
+        assert first.finished.wait(30)
+        assert isinstance(failed.error, RuntimeError)
+
+        second = Waiter()
+        served = engine.submit([1, 2, 3], 5, second)
+        assert second.finished.wait(30)
+        assert served.error is None and len(served.generated) == 5
+    finally:
+        engine.stop()
+
+class EchoService:
+    """Stands in for JustificationService behind create_app."""
+
+    async def stream(self, statement, score, max_new_tokens):
+        yield statement[:max_new_tokens]
+
+    def metrics(self):
+        return {}
+
+    def close(self):
+        pass
+
+def post_justify(**kwargs):
+    from aiohttp.test_utils import TestClient, TestServer
+
+    async def run():
+        async with TestClient(TestServer(create_app(EchoService()))) as client:
+            response = await client.post("/justify", **kwargs)
+            return response.status, await response.text()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("kwargs", [
+    {"json": ["a list"]},
+    {"json": "a string"},
+    {"data": "not json", "headers": {"Content-Type": "application/json"}},
+    {"json": {"statement": 5}},
+    {"json": {"statement": "x", "score": "high"}},
+    {"json": {"statement": "x", "max_new_tokens": "many"}},
+    {"json": {"statement": "x", "max_new_tokens": [1]}},
+    {"json": {"statement": "x", "max_new_tokens": 0}},
+])
+def test_justify_rejects_bad_input_with_400(kwargs):
+    status, body = post_justify(**kwargs)
+    assert status == 400 and '"error"' in body
+
+def test_justify_streams_done_event():
+    status, body = post_justify(json={"statement": "the sky is blue", "score": 0.9, "max_new_tokens": 3})
+    assert status == 200 and "event: done" in body
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 2
+CSV_CHUNK_SIZE = 10000
+LIAR_TEMPLATE = "{statement}"
+GRANITE_TEMPLATE = "Classify this statement as true, false, or unknown:\nStatement: {statement}\nLabel: {label}"
+
+def tokenizer_fingerprint(tokenizer):
+    """Hash the full tokenizer definition when available, so vocab or normalizer changes invalidate the cache."""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        definition = json.loads(backend.to_str())
+        # Truncation/padding are call-time settings that the fast tokenizer stores in its state
+        definition.pop("truncation", None)
+        definition.pop("padding", None)
+        definition = json.dumps(definition, sort_keys=True)
+    else:
+        definition = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    return hashlib.sha256(f"{type(tokenizer).__name__}\0{definition}".encode()).hexdigest()
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+def encode_examples(tokenizer, template, statements, labels, max_length):
+    """Tokenize template-formatted examples into (input_ids, prompt_length) pairs.
+
+    prompt_length is the number of tokens before the label completion. Overlong
+    examples are truncated at the end of the statement rather than at the end of
+    the text, so the "Label: ..." completion always survives.
+    """
+    statements = [str(s) for s in statements]
+    texts = [template.format(statement=s, label=l) for s, l in zip(statements, labels)]
+    statement_ends = [len(template.split("{statement}")[0].format(label=l)) + len(s) for s, l in zip(statements, labels)]
+    label_starts = [len(template.split("{label}")[0].format(statement=s)) if "{label}" in template else len(t)
+                    for s, t in zip(statements, texts)]
+    full = tokenizer(texts)["input_ids"]
+    upto_statement = tokenizer([t[:end] for t, end in zip(texts, statement_ends)])["input_ids"]
+    upto_label = tokenizer([t[:start] for t, start in zip(texts, label_starts)])["input_ids"]
+
+    examples = []
+    for ids, statement_ids, prompt_ids in zip(full, upto_statement, upto_label):
+        # Common prefixes, so merges across the boundary or trailing special tokens don't shift it
+        statement_end = _common_prefix(ids, statement_ids)
+        prompt_length = _common_prefix(ids, prompt_ids)
+        overflow = len(ids) - max_length
+        if overflow > 0:
+            if statement_end >= overflow:
+                ids = ids[:statement_end - overflow] + ids[statement_end:]
+                prompt_length -= overflow
+            else:
+                ids = ids[:max_length]
+                prompt_length = min(prompt_length, max_length)
+        examples.append((ids, prompt_length))
+    return examples
+
+def cache_key(csv_path, tokenizer, template, max_length, text_column, label_column):
+    stat = os.stat(csv_path)
+    parts = {
+        "version": CACHE_VERSION,
+        "csv": os.path.abspath(csv_path),
+        "csv_stat": [stat.st_size, stat.st_mtime_ns],
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "template": template,
+        "max_length": max_length,
+        "columns": [text_column, label_column],
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+def cache_dir_for(csv_path, cache_root, key):
+    return os.path.join(cache_root, f"{os.path.splitext(os.path.basename(csv_path))[0]}-{key}")
+
+class TokenCache:
+    """Read-only view of a pre-tokenized corpus.
+
+    tokens.bin holds every sample's token ids back to back (uint16, or uint32 for
+    vocabularies over 65535), offsets.npy holds the n + 1 start positions,
+    labels.npy the numeric labels and prompt_lengths.npy the number of prompt
+    tokens before each label completion. All are memory-mapped, so sample lookups
+    are zero-copy slices.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.tokens = np.memmap(os.path.join(path, "tokens.bin"), dtype=self.meta["dtype"], mode="r",
+                                shape=(self.meta["num_tokens"],))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(path, "labels.npy"), mmap_mode="r")
+        self.prompt_lengths = np.load(os.path.join(path, "prompt_lengths.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.tokens[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def lengths(self):
+        return np.diff(self.offsets).tolist()
+
+def build_token_cache(csv_path, tokenizer, cache_root, template=LIAR_TEMPLATE, max_length=512,
+                      text_column="statement", label_column="labels", batch_size=1000):
+    """Tokenize csv_path once into cache_root and return its TokenCache (reused if already built)."""
+    key = cache_key(csv_path, tokenizer, template, max_length, text_column, label_column)
+    path = cache_dir_for(csv_path, cache_root, key)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return TokenCache(path)
+
+    dtype = np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max else np.uint32
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    offsets, labels, prompt_lengths = [0], [], []
+    with open(os.path.join(tmp_path, "tokens.bin"), "wb") as token_file:
+        for chunk in pd.read_csv(csv_path, chunksize=CSV_CHUNK_SIZE):
+            chunk = chunk.dropna(subset=[text_column, label_column])
+            statements, chunk_labels = chunk[text_column].tolist(), chunk[label_column].tolist()
+            labels.extend(chunk[label_column].astype(float).tolist())
+            for start in range(0, len(statements), batch_size):
+                batch = slice(start, start + batch_size)
+                if "{label}" in template:
+                    examples = encode_examples(tokenizer, template, statements[batch], chunk_labels[batch], max_length)
+                else:
+                    texts = [template.format(statement=s) for s in statements[batch]]
+                    encodings = tokenizer(texts, truncation=True, max_length=max_length)
+                    examples = [(ids, len(ids)) for ids in encodings["input_ids"]]
+                for ids, prompt_length in examples:
+                    np.asarray(ids, dtype=dtype).tofile(token_file)
+                    offsets.append(offsets[-1] + len(ids))
+                    prompt_lengths.append(prompt_length)
+    np.save(os.path.join(tmp_path, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(tmp_path, "labels.npy"), np.asarray(labels, dtype=np.float64))
+    np.save(os.path.join(tmp_path, "prompt_lengths.npy"), np.asarray(prompt_lengths, dtype=np.int32))
+    meta = {
+        "version": CACHE_VERSION, "key": key, "csv": os.path.abspath(csv_path),
+        "tokenizer": getattr(tokenizer, "name_or_path", ""), "template": template, "max_length": max_length,
+        "dtype": np.dtype(dtype).name, "num_rows": len(labels), "num_tokens": offsets[-1],
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Publish atomically, then drop caches of the same CSV built with an older template/tokenizer
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    for name in os.listdir(cache_root):
+        stale = os.path.join(cache_root, name)
+        if stale != path and is_stale_cache(stale, meta["csv"], key):
+            shutil.rmtree(stale, ignore_errors=True)
+    return TokenCache(path)
+
+def is_stale_cache(path, csv_path, key):
+    """True if path is a finished cache of the same CSV (by absolute path) under another key.
+
+    Caches of other CSVs that share the file name, and directories without a
+    readable meta.json (e.g. another process's build in progress), are left alone.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(meta, dict) and meta.get("csv") == csv_path and meta.get("key") != key
+
+def main():
+    from transformers import AutoTokenizer
+
+    parser = argparse.ArgumentParser(description="Pre-tokenize a statement/labels CSV into a memory-mapped cache")
+    parser.add_argument("csv_path")
+    parser.add_argument("--tokenizer", required=True, help="tokenizer name or path")
+    parser.add_argument("--cache-dir", default="token_cache")
+    parser.add_argument("--preset", choices=["granite", "liar"], default="granite",
+                        help="granite: StatementDataset prompt, 'labels' column; liar: raw statement, 'label' column")
+    parser.add_argument("--template", default=None, help="override the preset's prompt template")
+    parser.add_argument("--max-length", type=int, default=None)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    if args.preset == "granite":
+        template, label_column, max_length = GRANITE_TEMPLATE, "labels", 1660
+    else:
+        template, label_column, max_length = LIAR_TEMPLATE, "label", 512
+    os.makedirs(args.cache_dir, exist_ok=True)
+    start = time.perf_counter()
+    cache = build_token_cache(args.csv_path, tokenizer, args.cache_dir, args.template or template,
+                              args.max_length or max_length, label_column=label_column)
+    print(f"{len(cache)} rows, {cache.meta['num_tokens']} tokens ({cache.meta['dtype']}) "
+          f"in {cache.path} after {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()